@@ -0,0 +1,191 @@
+# backend/app/aggregates.py
+"""Per-student, per-lesson and daily progress summaries.
+
+record_session() folds one new ReadingSession into the summary rows inside the
+caller's transaction, so progress endpoints read a single row instead of
+scanning every session. Run `python -m app.aggregates backfill` once to build
+the summaries for sessions recorded before this existed.
+"""
+import asyncio
+import sys
+import time
+
+from sqlalchemy import case, delete
+from sqlmodel import select
+
+from .db import engine, async_session_factory, dialect_insert
+from .models import ReadingSession, StudentProgressSummary, LessonProgressSummary, DailyProgress
+
+RECENT_WINDOW = 10
+HISTORY_DAYS = 30
+
+
+def _recent_entry(reading_session):
+    return {
+        "id": reading_session.id,
+        "lesson_id": reading_session.lesson_id,
+        "accuracy": reading_session.accuracy,
+        "wpm": reading_session.wpm,
+        "created_at": reading_session.created_at.isoformat(),
+    }
+
+
+async def _upsert_stats(session, model, key, reading_session):
+    """Atomically add one session to the counters of a summary row."""
+    table = model.__table__
+    c = table.c
+    statement = dialect_insert(table).values(
+        **key,
+        session_count=1,
+        accuracy_sum=reading_session.accuracy,
+        wpm_count=int(reading_session.wpm is not None),
+        wpm_sum=reading_session.wpm or 0,
+        accuracy_min=reading_session.accuracy,
+        accuracy_max=reading_session.accuracy,
+        wpm_min=reading_session.wpm,
+        wpm_max=reading_session.wpm,
+        last_session_at=reading_session.created_at,
+        **({"recent": []} if "recent" in c else {}),
+    )
+    new = statement.excluded
+
+    # a NULL (untimed) wpm compares as unknown, so it never replaces wpm_min/wpm_max
+    def smaller(column):
+        return case((c[column].is_(None) | (new[column] < c[column]), new[column]), else_=c[column])
+
+    def larger(column):
+        return case((c[column].is_(None) | (new[column] > c[column]), new[column]), else_=c[column])
+
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key),
+        set_={
+            "session_count": c.session_count + 1,
+            "accuracy_sum": c.accuracy_sum + new.accuracy_sum,
+            "wpm_count": c.wpm_count + new.wpm_count,
+            "wpm_sum": c.wpm_sum + new.wpm_sum,
+            "accuracy_min": smaller("accuracy_min"),
+            "accuracy_max": larger("accuracy_max"),
+            "wpm_min": smaller("wpm_min"),
+            "wpm_max": larger("wpm_max"),
+            "last_session_at": larger("last_session_at"),
+        },
+    )
+    await session.exec(statement)
+
+
+async def _push_recent(session, model, key, reading_session):
+    # The upsert above already holds the row's write lock for this
+    # transaction, so this read-modify-write cannot interleave with another.
+    row = await session.get(model, key, populate_existing=True)
+    row.recent = (row.recent or [])[-(RECENT_WINDOW - 1):] + [_recent_entry(reading_session)]
+    session.add(row)
+
+
+async def record_session(session, reading_session):
+    """Fold a new ReadingSession into the summaries. Call before commit,
+    after the session row has been flushed (so it has an id)."""
+    student_key = {"user_id": reading_session.user_id}
+    lesson_key = {"lesson_id": reading_session.lesson_id}
+    day_key = {"user_id": reading_session.user_id, "day": reading_session.created_at.date()}
+
+    await _upsert_stats(session, StudentProgressSummary, student_key, reading_session)
+    await _upsert_stats(session, LessonProgressSummary, lesson_key, reading_session)
+    await _upsert_stats(session, DailyProgress, day_key, reading_session)
+    await _push_recent(session, StudentProgressSummary, student_key, reading_session)
+    await _push_recent(session, LessonProgressSummary, lesson_key, reading_session)
+
+
+def summary_out(row):
+    count = row.session_count
+    return {
+        "session_count": count,
+        "avg_accuracy": row.accuracy_sum / count if count else 0.0,
+        "avg_wpm": row.wpm_sum / row.wpm_count if row.wpm_count else None,
+        "accuracy_min": row.accuracy_min,
+        "accuracy_max": row.accuracy_max,
+        "wpm_min": row.wpm_min,
+        "wpm_max": row.wpm_max,
+        "last_session_at": row.last_session_at,
+    }
+
+
+async def get_daily_history(session, user_id: int, days: int = HISTORY_DAYS):
+    statement = (
+        select(DailyProgress)
+        .where(DailyProgress.user_id == user_id)
+        .order_by(DailyProgress.day.desc())
+        .limit(days)
+    )
+    rows = (await session.exec(statement)).all()
+    return [{"day": row.day, **summary_out(row)} for row in reversed(rows)]
+
+
+# --- backfill ---
+def _fold(stats, reading_session, with_recent):
+    if stats.session_count == 0:
+        stats.accuracy_min = stats.accuracy_max = reading_session.accuracy
+    else:
+        stats.accuracy_min = min(stats.accuracy_min, reading_session.accuracy)
+        stats.accuracy_max = max(stats.accuracy_max, reading_session.accuracy)
+    stats.session_count += 1
+    stats.accuracy_sum += reading_session.accuracy
+    if reading_session.wpm is not None:
+        wpm = reading_session.wpm
+        stats.wpm_min = wpm if stats.wpm_min is None else min(stats.wpm_min, wpm)
+        stats.wpm_max = wpm if stats.wpm_max is None else max(stats.wpm_max, wpm)
+        stats.wpm_count += 1
+        stats.wpm_sum += wpm
+    if stats.last_session_at is None or reading_session.created_at > stats.last_session_at:
+        stats.last_session_at = reading_session.created_at
+    if with_recent:
+        stats.recent = stats.recent[-(RECENT_WINDOW - 1):] + [_recent_entry(reading_session)]
+
+
+async def backfill(chunk_size: int = 5000):
+    """Rebuild every summary table from reading_sessions in one pass."""
+    students, lessons, days = {}, {}, {}
+    seen = 0
+    async with async_session_factory() as session:
+        columns = [ReadingSession.id, ReadingSession.user_id, ReadingSession.lesson_id,
+                   ReadingSession.accuracy, ReadingSession.wpm, ReadingSession.created_at]
+        statement = select(*columns).order_by(ReadingSession.created_at, ReadingSession.id)
+        result = await session.stream(statement.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            for rs in partition:
+                student = students.setdefault(rs.user_id, StudentProgressSummary(user_id=rs.user_id, recent=[]))
+                lesson = lessons.setdefault(rs.lesson_id, LessonProgressSummary(lesson_id=rs.lesson_id, recent=[]))
+                day_key = (rs.user_id, rs.created_at.date())
+                day = days.setdefault(day_key, DailyProgress(user_id=day_key[0], day=day_key[1]))
+                _fold(student, rs, True)
+                _fold(lesson, rs, True)
+                _fold(day, rs, False)
+                seen += 1
+
+    async with async_session_factory() as session:
+        for model in (StudentProgressSummary, LessonProgressSummary, DailyProgress):
+            await session.exec(delete(model))
+        rows = [*students.values(), *lessons.values(), *days.values()]
+        for start in range(0, len(rows), chunk_size):
+            session.add_all(rows[start:start + chunk_size])
+            await session.flush()
+        await session.commit()
+    return {"sessions": seen, "students": len(students), "lessons": len(lessons), "days": len(days)}
+
+
+async def _main(argv):
+    from .db import init_db
+    if argv[:1] != ["backfill"]:
+        print("usage: python -m app.aggregates backfill")
+        return 2
+    await init_db()
+    started = time.perf_counter()
+    try:
+        counts = await backfill()
+    finally:
+        await engine.dispose()
+    print(f"Backfilled {counts} in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
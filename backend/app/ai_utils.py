@@ -1,18 +1,557 @@
-import difflib
+import hashlib
+import re
+import sys
+import threading
+from bisect import bisect_left
+from collections import Counter, OrderedDict, namedtuple
 
-def calculate_accuracy(spoken_text: str, reference_text: str):
-    """Compare spoken text with reference and return similarity %."""
-    spoken_words = spoken_text.lower().split()
-    ref_words = reference_text.lower().split()
 
-    matcher = difflib.SequenceMatcher(None, spoken_words, ref_words)
-    accuracy = round(matcher.ratio() * 100, 2)
+# --- compiled lesson references ---
+class LessonReference:
+    """Pre-tokenized lesson text, built once per lesson content and reused for scoring."""
 
-    # Find missing or incorrect words (for simple feedback)
-    errors = [word for word in ref_words if word not in spoken_words]
+    def __init__(self, lesson_id, content: str):
+        self.lesson_id = lesson_id
+        self.content_hash = content_hash(content)
+        self.tokens = [sys.intern(tok) for tok in normalize_words(content)]
+
+        # token -> integer id, so alignment compares ints instead of strings
+        self.vocab = {}
+        self.ids = [self.vocab.setdefault(tok, len(self.vocab)) for tok in self.tokens]
+
+        # token id -> positions in the reference
+        self.positions = {}
+        for i, tok_id in enumerate(self.ids):
+            self.positions.setdefault(tok_id, []).append(i)
+
+    def encode(self, words):
+        """Map spoken words onto reference ids; unknown words get fresh ids."""
+        vocab = self.vocab
+        unknown = {}
+        next_id = len(vocab)
+        ids = []
+        for word in words:
+            tok_id = vocab.get(word)
+            if tok_id is None:
+                tok_id = unknown.get(word)
+                if tok_id is None:
+                    tok_id = unknown[word] = next_id
+                    next_id += 1
+            ids.append(tok_id)
+        return ids
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_words(text: str):
+    # speech recognition never produces punctuation, so the lesson side must not keep it
+    return _PUNCTUATION.sub("", text.lower()).split()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+MAX_CACHED_REFERENCES = 1024
+
+_references = OrderedDict()
+_references_lock = threading.Lock()
+
+
+def compile_lesson_reference(lesson_id, content: str) -> LessonReference:
+    """(Re)build the reference for a lesson and store it in the cache."""
+    reference = LessonReference(lesson_id, content)
+    with _references_lock:
+        _references[lesson_id] = reference
+        _references.move_to_end(lesson_id)
+        while len(_references) > MAX_CACHED_REFERENCES:
+            _references.popitem(last=False)
+    return reference
+
+
+def get_lesson_reference(lesson_id, content: str) -> LessonReference:
+    """Return the cached reference for a lesson, rebuilding it if the content changed."""
+    with _references_lock:
+        reference = _references.get(lesson_id)
+        if reference is not None:
+            _references.move_to_end(lesson_id)
+    if reference is None or reference.content_hash != content_hash(content):
+        reference = compile_lesson_reference(lesson_id, content)
+    return reference
+
+
+def invalidate_lesson_reference(lesson_id):
+    with _references_lock:
+        _references.pop(lesson_id, None)
+
+
+# --- word alignment ---
+WordOp = namedtuple("WordOp", ["kind", "ref_index", "spoken_index", "expected", "spoken"])
+
+MATCH = "match"
+SUBSTITUTION = "substitution"
+OMISSION = "omission"
+INSERTION = "insertion"
+REPETITION = "repetition"
+
+# Gaps without unique anchors are solved exactly when small, greedily otherwise.
+SMALL_GAP_CELLS = 16
+DP_MAX_CELLS = 1024
+GREEDY_WINDOW = 8
+
+
+class Alignment:
+    """Aligned word pairs plus an op kind per pair; WordOps are built on demand."""
+
+    def __init__(self, pairs, kinds, reference, spoken_words):
+        self.pairs = pairs
+        self.kinds = kinds
+        self.reference = reference
+        self.spoken_words = spoken_words
+        self.ref_len = len(reference.tokens)
+        self.spoken_len = len(spoken_words)
+        self.counts = {MATCH: 0, SUBSTITUTION: 0, OMISSION: 0, INSERTION: 0, REPETITION: 0}
+        for kind in kinds:
+            self.counts[kind] += 1
+
+    @property
+    def matches(self) -> int:
+        return self.counts[MATCH]
+
+    def ratio(self) -> float:
+        """Same definition as difflib's ratio: 2 * matches / total words."""
+        total = self.ref_len + self.spoken_len
+        return 2.0 * self.matches / total if total else 1.0
+
+    def _op(self, k):
+        i, j = self.pairs[k]
+        return WordOp(
+            self.kinds[k], i, j,
+            self.reference.tokens[i] if i is not None else None,
+            self.spoken_words[j] if j is not None else None,
+        )
+
+    @property
+    def ops(self):
+        return [self._op(k) for k in range(len(self.pairs))]
+
+    def errors(self):
+        return [self._op(k) for k, kind in enumerate(self.kinds) if kind is not MATCH]
+
+
+def align_words(spoken_text: str, reference) -> Alignment:
+    """Token-level alignment of a transcript against a lesson reference.
+
+    Common prefix/suffix are trimmed, words that occur exactly once on both
+    sides are used as anchors (longest increasing run, patience-diff style),
+    and the remaining gaps are aligned with a small edit-distance table or a
+    bounded lookahead. Runs in roughly linear time for real readings.
+    """
+    if not isinstance(reference, LessonReference):
+        reference = LessonReference(None, reference)
+
+    spoken_words = normalize_words(spoken_text)
+    a = reference.ids
+    b = reference.encode(spoken_words)
+    pairs = _align_ids(a, b, reference.positions)
+
+    kinds = []
+    append = kinds.append
+    last_spoken = None
+    last_matched = None
+    for i, j in pairs:
+        if j is None:
+            append(OMISSION)
+            continue
+        tok = b[j]
+        if i is None:
+            append(REPETITION if tok == last_spoken or tok == last_matched else INSERTION)
+        elif a[i] == tok:
+            append(MATCH)
+            last_matched = tok
+        else:
+            append(SUBSTITUTION)
+        last_spoken = tok
+    return Alignment(pairs, kinds, reference, spoken_words)
+
+
+def _align_ids(a, b, a_positions):
+    """Return aligned (ref_index, spoken_index) pairs; None marks a gap."""
+    b_positions = {}
+    for j, tok in enumerate(b):
+        b_positions.setdefault(tok, []).append(j)
+
+    out = []
+    # stack items are a gap (alo, ahi, blo, bhi), a run of equal tokens
+    # (i, j, length) or a single aligned pair (i, j)
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        item = stack.pop()
+        if len(item) == 2:
+            out.append(item)
+            continue
+        if len(item) == 3:
+            i, j, k = item
+            out.extend(zip(range(i, i + k), range(j, j + k)))
+            continue
+        alo, ahi, blo, bhi = item
+
+        k = _common_run(a, b, alo, blo, min(ahi - alo, bhi - blo), 1)
+        if k:
+            out.extend(zip(range(alo, alo + k), range(blo, blo + k)))
+            alo += k
+            blo += k
+        k = _common_run(a, b, ahi - 1, bhi - 1, min(ahi - alo, bhi - blo), -1)
+        if k:
+            stack.extend(zip(range(ahi - 1, ahi - k - 1, -1), range(bhi - 1, bhi - k - 1, -1)))
+            ahi -= k
+            bhi -= k
+
+        if alo == ahi or blo == bhi:
+            out.extend((i, None) for i in range(alo, ahi))
+            out.extend((None, j) for j in range(blo, bhi))
+            continue
+
+        cells = (ahi - alo) * (bhi - blo)
+        anchors = None
+        if cells > SMALL_GAP_CELLS:
+            anchors = _unique_anchors(a, b, alo, ahi, blo, bhi, a_positions, b_positions)
+        if anchors:
+            # each segment starts at an anchor; segments that read back
+            # verbatim are merged into one run instead of being re-scanned
+            segments = [(alo, anchors[0][0], blo, anchors[0][1])]
+            run = None
+            for (i, j), (next_i, next_j) in zip(anchors, anchors[1:]):
+                if next_i - i == next_j - j and a[i:next_i] == b[j:next_j]:
+                    if run is None:
+                        run = [i, j, 0]
+                    run[2] += next_i - i
+                    continue
+                if run is not None:
+                    segments.append(tuple(run))
+                    run = None
+                segments.append((i, next_i, j, next_j))
+            if run is not None:
+                segments.append(tuple(run))
+            segments.append((anchors[-1][0], ahi, anchors[-1][1], bhi))
+            stack.extend(reversed(segments))
+        elif cells <= DP_MAX_CELLS:
+            out.extend(_edit_distance_pairs(a, b, alo, ahi, blo, bhi))
+        else:
+            out.extend(_greedy_pairs(a, b, alo, ahi, blo, bhi, a_positions, b_positions))
+    return out
+
+
+def _common_run(a, b, i, j, limit, step):
+    """Length of the run of equal tokens starting at a[i], b[j] going forward
+    (step=1) or backward (step=-1). Compares slices so the scan runs in C."""
+    if limit <= 0 or a[i] != b[j]:
+        return 0
+
+    def equal(n):
+        if step == 1:
+            return a[i:i + n] == b[j:j + n]
+        return a[i - n + 1:i + 1] == b[j - n + 1:j + 1]
+
+    lo, hi = 1, 2
+    while hi <= limit and equal(hi):
+        lo, hi = hi, hi * 2
+    hi = min(hi, limit + 1)
+    # lo tokens are known equal, hi are not (or out of range)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if equal(mid):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _unique_anchors(a, b, alo, ahi, blo, bhi, a_positions, b_positions):
+    a_count = Counter(a[alo:ahi])
+    b_count = Counter(b[blo:bhi])
+    candidates = []
+    for tok, n in a_count.items():
+        if n == 1 and b_count.get(tok) == 1:
+            a_pos = a_positions[tok]
+            b_pos = b_positions[tok]
+            candidates.append((a_pos[bisect_left(a_pos, alo)], b_pos[bisect_left(b_pos, blo)]))
+    if not candidates:
+        return []
+    candidates.sort()
+
+    # longest increasing subsequence on spoken index
+    tails = []
+    tail_idx = []
+    prev = [-1] * len(candidates)
+    for k, (_, j) in enumerate(candidates):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = k
+        prev[k] = tail_idx[pos - 1] if pos else -1
+    result = []
+    k = tail_idx[-1]
+    while k >= 0:
+        result.append(candidates[k])
+        k = prev[k]
+    result.reverse()
+    return result
+
+
+def _edit_distance_pairs(a, b, alo, ahi, blo, bhi):
+    n, m = ahi - alo, bhi - blo
+    width = m + 1
+    dist = list(range(width))
+    moves = [None] * ((n + 1) * width)
+    for j in range(1, width):
+        moves[j] = 2
+    for i in range(1, n + 1):
+        ai = a[alo + i - 1]
+        row = [i] + [0] * m
+        moves[i * width] = 1
+        for j in range(1, width):
+            diag = dist[j - 1] + (ai != b[blo + j - 1])
+            up = dist[j] + 1
+            left = row[j - 1] + 1
+            if diag <= up and diag <= left:
+                row[j] = diag
+                moves[i * width + j] = 0
+            elif up <= left:
+                row[j] = up
+                moves[i * width + j] = 1
+            else:
+                row[j] = left
+                moves[i * width + j] = 2
+        dist = row
+
+    pairs = []
+    i, j = n, m
+    while i or j:
+        move = moves[i * width + j]
+        if move == 0:
+            i -= 1
+            j -= 1
+            pairs.append((alo + i, blo + j))
+        elif move == 1:
+            i -= 1
+            pairs.append((alo + i, None))
+        else:
+            j -= 1
+            pairs.append((None, blo + j))
+    pairs.reverse()
+    return pairs
+
+
+def _open_end_pairs(a, b):
+    """Align all of b against a prefix of a; the rest of a is left out.
+
+    Minimises edits first and then maximises matches, so a trailing word
+    that could be either an insertion or a skip-then-match is matched and
+    the reader's position keeps up with them.
+    """
+    n, m = len(a), len(b)
+    width = m + 1
+    edit = n + m + 1  # one edit outweighs any number of matches
+    dist = [j * edit for j in range(width)]
+    moves = [None] * ((n + 1) * width)
+    for j in range(1, width):
+        moves[j] = 2
+    best_i, best = 0, dist[m]
+    for i in range(1, n + 1):
+        ai = a[i - 1]
+        row = [i * edit] + [0] * m
+        moves[i * width] = 1
+        for j in range(1, width):
+            diag = dist[j - 1] + (edit if ai != b[j - 1] else -1)
+            up = dist[j] + edit
+            left = row[j - 1] + edit
+            # on ties prefer "match, then extra word" so a repeated word is
+            # reported as a repetition of the one just read
+            if left <= diag and left <= up:
+                row[j] = left
+                moves[i * width + j] = 2
+            elif diag <= up:
+                row[j] = diag
+                moves[i * width + j] = 0
+            else:
+                row[j] = up
+                moves[i * width + j] = 1
+        dist = row
+        if row[m] < best:
+            best_i, best = i, row[m]
+
+    pairs = []
+    i, j = best_i, m
+    while i or j:
+        move = moves[i * width + j]
+        if move == 0:
+            i -= 1
+            j -= 1
+            pairs.append((i, j))
+        elif move == 1:
+            i -= 1
+            pairs.append((i, None))
+        else:
+            j -= 1
+            pairs.append((None, j))
+    pairs.reverse()
+    return pairs
+
+
+def _greedy_pairs(a, b, alo, ahi, blo, bhi, a_positions, b_positions):
+    def next_in(positions, tok, start, stop):
+        found = positions.get(tok)
+        if not found:
+            return None
+        k = bisect_left(found, start)
+        if k < len(found) and found[k] < stop:
+            return found[k]
+        return None
+
+    pairs = []
+    i, j = alo, blo
+    while i < ahi and j < bhi:
+        if a[i] == b[j]:
+            pairs.append((i, j))
+            i += 1
+            j += 1
+            continue
+        skip_a = next_in(a_positions, b[j], i + 1, min(ahi, i + 1 + GREEDY_WINDOW))
+        skip_b = next_in(b_positions, a[i], j + 1, min(bhi, j + 1 + GREEDY_WINDOW))
+        if skip_a is not None and (skip_b is None or skip_a - i <= skip_b - j):
+            pairs.extend((k, None) for k in range(i, skip_a))
+            i = skip_a
+        elif skip_b is not None:
+            pairs.extend((None, k) for k in range(j, skip_b))
+            j = skip_b
+        else:
+            pairs.append((i, j))
+            i += 1
+            j += 1
+    pairs.extend((k, None) for k in range(i, ahi))
+    pairs.extend((None, k) for k in range(j, bhi))
+    return pairs
+
+
+# --- live (incremental) alignment ---
+# A chunk of k spoken words is aligned against at most 2k + LIVE_WINDOW_SLACK
+# reference words from the reader's current position.
+LIVE_WINDOW_SLACK = 16
+LIVE_MAX_CHUNK = 32  # longer chunks are fed in pieces to keep the table small
+
+
+class LiveAlignment:
+    """Aligns a reading chunk by chunk as speech recognition produces it.
+
+    Each feed() only looks at the new words and a window of the reference
+    starting where the reader currently is, so its cost depends on the chunk,
+    not on the passage. Reference words past the last aligned word stay
+    pending (not yet read) rather than being counted as omissions.
+    """
+
+    def __init__(self, reference: LessonReference):
+        self.reference = reference
+        self.position = 0  # next reference index the reader is expected at
+        self.spoken_words = []
+        self.counts = {MATCH: 0, SUBSTITUTION: 0, OMISSION: 0, INSERTION: 0, REPETITION: 0}
+        self.missed = []  # expected words of substitutions and omissions, in order
+        self._last_spoken = None
+        self._last_matched = None
+
+    def feed(self, text: str):
+        """Align the next chunk of final transcript; returns its WordOps."""
+        words = normalize_words(text)
+        ops = []
+        for start in range(0, len(words), LIVE_MAX_CHUNK):
+            ops.extend(self._feed_words(words[start:start + LIVE_MAX_CHUNK]))
+        return ops
+
+    def _feed_words(self, words):
+        reference = self.reference
+        lo = self.position
+        hi = min(len(reference.ids), lo + 2 * len(words) + LIVE_WINDOW_SLACK)
+        window = reference.ids[lo:hi]
+        pairs = _open_end_pairs(window, reference.encode(words))
+
+        last_aligned = -1
+        for k, (i, j) in enumerate(pairs):
+            if i is not None and j is not None:
+                last_aligned = k
+
+        ops = []
+        spoken_offset = len(self.spoken_words)
+        tokens = reference.tokens
+        counts = self.counts
+        for k, (i, j) in enumerate(pairs):
+            if j is None:
+                if k > last_aligned:
+                    continue  # not reached yet
+                kind = OMISSION
+            else:
+                word = words[j]
+                if i is None:
+                    kind = REPETITION if word == self._last_spoken or word == self._last_matched else INSERTION
+                elif tokens[lo + i] == word:
+                    kind = MATCH
+                    self._last_matched = word
+                else:
+                    kind = SUBSTITUTION
+                self._last_spoken = word
+            expected = tokens[lo + i] if i is not None else None
+            if kind is SUBSTITUTION or kind is OMISSION:
+                self.missed.append(expected)
+            counts[kind] += 1
+            ops.append(WordOp(kind, lo + i if i is not None else None,
+                              spoken_offset + j if j is not None else None,
+                              expected, words[j] if j is not None else None))
+
+        if last_aligned >= 0:
+            self.position = lo + pairs[last_aligned][0] + 1
+        self.spoken_words.extend(words)
+        return ops
+
+    def progress_accuracy(self) -> float:
+        """Accuracy over the part of the passage read so far."""
+        total = self.position + len(self.spoken_words)
+        return round(200.0 * self.counts[MATCH] / total, 2) if total else 100.0
+
+    def result(self):
+        """Final scores, with the same accuracy definition as calculate_accuracy."""
+        unread = self.reference.tokens[self.position:]
+        counts = dict(self.counts)
+        counts[OMISSION] += len(unread)
+        total = len(self.reference.tokens) + len(self.spoken_words)
+        errors = (self.missed + unread[:5])[:5]
+        return {
+            "accuracy": round(200.0 * counts[MATCH] / total, 2) if total else 100.0,
+            "errors": errors,
+            "counts": counts,
+            "recommendations": "Focus on pronouncing the highlighted words clearly."
+        }
+
+
+# --- scoring ---
+def calculate_accuracy(spoken_text: str, reference):
+    """Compare spoken text with reference and return similarity %.
+
+    `reference` may be the raw lesson text or a compiled LessonReference.
+    """
+    alignment = align_words(spoken_text, reference)
+    accuracy = round(alignment.ratio() * 100, 2)
+
+    # Words the reader missed or misread, in passage order (for simple feedback)
+    details = alignment.errors()
+    errors = [op.expected for op in details if op.kind in (SUBSTITUTION, OMISSION)]
 
     return {
         "accuracy": accuracy,
         "errors": errors[:5],  # show top few differences
+        "details": [op._asdict() for op in details],
+        "counts": alignment.counts,
         "recommendations": "Focus on pronouncing the highlighted words clearly."
     }
@@ -1,10 +1,15 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from .config import settings
 from .schemas import TokenData
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes whose cost differs from BCRYPT_ROUNDS are flagged by needs_update,
+# so changing the setting upgrades (or downgrades) users as they log in.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +17,52 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+
+# --- password hashing off the event loop ---
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue stays full for longer than HASH_QUEUE_TIMEOUT."""
+
+
+HASH_WORKERS = settings.HASH_WORKERS or os.cpu_count() or 1
+
+# bcrypt releases the GIL, so a small thread pool gives real parallelism.
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = {}
+
+
+def _get_hash_slots(loop):
+    # Running + queued hashes; anything beyond this waits on the semaphore and is
+    # rejected after HASH_QUEUE_TIMEOUT instead of piling up behind the pool.
+    slots = _hash_slots.get(loop)
+    if slots is None:
+        _hash_slots.clear()
+        slots = _hash_slots[loop] = asyncio.Semaphore(HASH_WORKERS + settings.HASH_MAX_QUEUE)
+    return slots
+
+
+async def _run_hash(fn, *args):
+    if not settings.HASH_EXECUTOR_ENABLED:
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    slots = _get_hash_slots(loop)
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PasswordHasherBusy()
+    try:
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run_hash(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Return (valid, new_hash); new_hash is set when the stored hash should be replaced."""
+    return await _run_hash(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_access_token(subject: str, role: str, expires_delta: timedelta = None):
     to_encode = {"sub": str(subject), "role": role}
     if expires_delta:
@@ -27,6 +78,6 @@ def decode_token(token: str) -> TokenData:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         sub: str = payload.get("sub")
         role: str = payload.get("role")
-        return TokenData(sub=sub, role=role)
+        return TokenData(sub=sub, role=role, exp=payload.get("exp"))
     except JWTError:
         return TokenData()
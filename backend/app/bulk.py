@@ -0,0 +1,267 @@
+# backend/app/bulk.py
+"""Bulk lesson import and streaming export.
+
+Import reads NDJSON or CSV a line at a time, validates every record with
+LessonCreate and inserts the valid ones CHUNK_SIZE per transaction, so
+memory stays flat however large the file is. Reading and validating run in
+a worker thread, a chunk ahead of the inserts, so a large upload doesn't
+hold up the event loop. Invalid records are skipped
+and reported by line number (the first MAX_REPORTED_ERRORS of them); if a
+chunk is rejected by the database its rows are retried one by one so only
+the offending rows are lost. Each chunk's TF-IDF vectors are added to the
+loaded lesson index while the next chunk is inserted; at the end the compiled scoring
+references are built for the last imported lessons, as many as the
+reference cache holds. The search index follows through its triggers.
+
+Export streams lessons or reading sessions as NDJSON or CSV from a
+server-side cursor, in the same columns import reads back.
+
+    python -m app.bulk import lessons.ndjson [--creator-id N] [--dry-run]
+    python -m app.bulk export lessons|sessions [--format csv] [--out FILE]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+
+from .ai_utils import MAX_CACHED_REFERENCES, compile_lesson_reference
+from .db import engine
+from .http_cache import lesson_responses
+from .ml_utils import update_lesson_vectors
+from .models import Lesson, ReadingSession
+from .schemas import LessonCreate
+
+FORMATS = ("ndjson", "csv")
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename: str = None, content_type: str = None):
+    suffix = Path(filename or "").suffix.lower()
+    if suffix in (".ndjson", ".jsonl") or "ndjson" in (content_type or ""):
+        return "ndjson"
+    if suffix == ".csv" or "csv" in (content_type or ""):
+        return "csv"
+    return None
+
+
+# --- reading records ---
+def iter_records(lines, format: str):
+    """(line number, record dict or None, error or None) for each record in a text stream."""
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # empty cells are missing values, not empty strings
+            yield reader.line_num, {k: v for k, v in record.items() if k and v not in (None, "")}, None
+        return
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'record'}: {e['msg']}" for e in error.errors())
+
+
+# --- import ---
+class ImportReport:
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, line_no, message: str):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def as_dict(self):
+        return {
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "dry_run": self.dry_run,
+            "errors": self.errors,
+            "errors_truncated": self.skipped > len(self.errors),
+            "seconds": round(time.perf_counter() - self.started, 3),
+        }
+
+
+async def _insert_chunk(chunk, report: ImportReport):
+    """Insert (line, row) pairs in one transaction; returns (id, content) of the inserted lessons."""
+    # a Core multi-row INSERT; the ORM bulk path issues a statement per row
+    # once RETURNING has to follow parameter order, so return content instead
+    statement = insert(Lesson.__table__).returning(Lesson.__table__.c.id, Lesson.__table__.c.content)
+    try:
+        async with engine.begin() as conn:
+            return [tuple(row) for row in await conn.execute(statement, [row for _, row in chunk])]
+    except DBAPIError:
+        if len(chunk) == 1:
+            line_no, _ = chunk[0]
+            report.error(line_no, "rejected by the database (unknown creator_id?)")
+            return []
+    inserted = []
+    for pair in chunk:
+        inserted.extend(await _insert_chunk([pair], report))
+    return inserted
+
+
+def validated_chunks(records, chunk_size: int, creator_id: int = None):
+    """(rows, errors) for every chunk_size valid records from iter_records().
+
+    rows are (line, row) pairs ready to insert, errors (line, message) pairs.
+    Synchronous and CPU-bound; import_lessons runs it in a worker thread.
+    """
+    rows, errors = [], []
+    line_no = 0
+    try:
+        for line_no, record, error in records:
+            if error is None:
+                try:
+                    row = LessonCreate.model_validate(record).model_dump()
+                except ValidationError as e:
+                    error = validation_message(e)
+            if error is not None:
+                errors.append((line_no, error))
+            else:
+                if creator_id is not None:
+                    row["creator_id"] = creator_id
+                rows.append((line_no, row))
+            if len(rows) >= chunk_size or len(errors) >= chunk_size:
+                yield rows, errors
+                rows, errors = [], []
+    except UnicodeDecodeError:
+        errors.append((line_no + 1, "not valid UTF-8; the rest of the file was not read"))
+    if rows or errors:
+        yield rows, errors
+
+
+async def import_lessons(records, creator_id: int = None, chunk_size: int = CHUNK_SIZE, dry_run: bool = False):
+    """Validate and insert records from iter_records(); returns the report as a dict.
+
+    creator_id, when given, overrides the records' own. `records` is read
+    from a worker thread, one chunk at a time.
+    """
+    report = ImportReport(dry_run)
+    recent = deque(maxlen=MAX_CACHED_REFERENCES)
+    vectorizing = None
+
+    async def flush(chunk):
+        nonlocal vectorizing
+        inserted = await _insert_chunk(chunk, report)
+        report.imported += len(inserted)
+        lesson_responses.invalidate()
+        recent.extend(inserted)
+        # vectorise this chunk while the next one is read and inserted
+        # (SQLite releases the GIL); at most one chunk is in flight
+        if vectorizing is not None:
+            await vectorizing
+        vectorizing = asyncio.create_task(asyncio.to_thread(update_lesson_vectors, inserted))
+
+    chunks = validated_chunks(records, chunk_size, creator_id)
+    reading = asyncio.create_task(asyncio.to_thread(next, chunks, None))
+    while True:
+        chunk = await reading
+        if chunk is None:
+            break
+        # read and validate the next chunk while this one is inserted
+        reading = asyncio.create_task(asyncio.to_thread(next, chunks, None))
+        rows, errors = chunk
+        for line_no, message in errors:
+            report.error(line_no, message)
+        if dry_run:
+            report.imported += len(rows)
+        elif rows:
+            await flush(rows)
+    if vectorizing is not None:
+        await vectorizing
+
+    if recent:
+        await asyncio.to_thread(lambda: [compile_lesson_reference(i, content) for i, content in recent])
+    return report.as_dict()
+
+
+# --- export ---
+LESSON_EXPORT_COLUMNS = ("id", "title", "content", "reading_level", "creator_id", "created_at", "updated_at")
+
+
+def lesson_export_statement(filters=()):
+    columns = [getattr(Lesson, name) for name in LESSON_EXPORT_COLUMNS]
+    return select(*columns).where(*filters).order_by(Lesson.id)
+
+
+def session_export_statement(filters=()):
+    # oldest first: every filter the export route offers has a (…, created_at) index
+    return (select(*ReadingSession.__table__.columns).where(*filters)
+            .order_by(ReadingSession.created_at, ReadingSession.id))
+
+
+# --- CLI ---
+async def _main(argv):
+    from .db import init_db
+    from .pagination import stream_rows
+
+    parser = argparse.ArgumentParser(prog="python -m app.bulk")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_cmd = commands.add_parser("import", help="import lessons from an NDJSON or CSV file")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    import_cmd.add_argument("--creator-id", type=int)
+    import_cmd.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    import_cmd.add_argument("--dry-run", action="store_true", help="validate only")
+    export_cmd = commands.add_parser("export", help="stream lessons or sessions to a file or stdout")
+    export_cmd.add_argument("table", choices=("lessons", "sessions"))
+    export_cmd.add_argument("--format", choices=FORMATS, default="ndjson")
+    export_cmd.add_argument("--out", help="default: stdout")
+    args = parser.parse_args(argv)
+
+    await init_db()
+    try:
+        if args.command == "import":
+            format = args.format or detect_format(args.path)
+            if format is None:
+                print("Can't tell the format from the file name; pass --format")
+                return 2
+            with open(args.path, encoding="utf-8-sig", newline="") as lines:
+                report = await import_lessons(iter_records(lines, format), args.creator_id,
+                                              args.chunk_size, args.dry_run)
+            for error in report["errors"]:
+                print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+            verb = "Validated" if args.dry_run else "Imported"
+            print(f"{verb} {report['imported']} lessons, skipped {report['skipped']}, in {report['seconds']}s")
+            return 1 if report["skipped"] else 0
+
+        statement = lesson_export_statement() if args.table == "lessons" else session_export_statement()
+        out = open(args.out, "w", encoding="utf-8", newline="") if args.out else sys.stdout
+        try:
+            async for text in stream_rows(statement, args.format):
+                out.write(text)
+        finally:
+            if args.out:
+                out.close()
+        return 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,477 @@
+# backend/app/cache.py
+"""In-process TTL/LRU caching, and named caches that can be shared by workers.
+
+TTLCache is the plain per-process building block. Application caches are
+created with cache_namespace(), which returns one of two implementations
+of the same interface (get/set/pop/clear/generation/stats):
+
+- MemoryCache: a TTLCache per process. Every uvicorn worker has its own
+  copy, and a write in one worker doesn't reach the others.
+- SharedCache (CACHE_BACKEND=sqlite): a TTLCache per process in front of
+  one SQLite file (WAL, mmap reads) shared by every worker on the host.
+  Values are stored as marshal bytes: each namespace turns its values into
+  plain dicts/tuples/str/bytes first (encode/decode), so nothing executable
+  is ever read back. pop() and clear() append an invalidation message to a
+  log in the same file; before each read a worker checks for other workers'
+  messages (PRAGMA data_version makes the check nearly free when nothing
+  has changed) and drops the affected entries from its own copy.
+
+pop() and clear() also bump the namespace's generation. A reader that took
+generation() before a slow computation passes it to set(), which then does
+nothing if an invalidation happened in between, so pre-write data can't be
+stored after the write was announced.
+
+A shared store that is locked for longer than CACHE_BUSY_TIMEOUT, or
+unusable, costs a miss (counted as an error), never a failed request.
+"""
+import hashlib
+import logging
+import marshal
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    `on_evict(key)` is called (outside the lock) when an entry is dropped
+    because it expired or was least recently used; not for pop() or clear().
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                expired = entry is not None
+                if expired:
+                    del self._data[key]
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        if expired and self.on_evict:
+            self.on_evict(key)
+        return default
+
+    def set(self, key, value, ttl: float = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False)[0])
+        if self.on_evict:
+            for old_key in evicted:
+                self.on_evict(old_key)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# --- shared store ---
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entry (
+    namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS generation (namespace TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS invalidation (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT NOT NULL, key TEXT, origin TEXT NOT NULL, at REAL NOT NULL
+);
+"""
+PRUNE_EVERY = 500  # writes between sweeps of expired entries and old messages
+MESSAGE_RETENTION = 300.0  # seconds; a worker idle for longer drops its whole local copy
+
+
+def default_cache_path() -> str:
+    # one file per database, so a benchmark's cache never serves the dev database's rows
+    digest = hashlib.blake2b(settings.DATABASE_URL.encode(), digest_size=6).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f"lexilearn-cache-{digest}.sqlite")
+
+
+class SharedStore:
+    """The SQLite file behind every SharedCache of a process; one connection per thread."""
+
+    def __init__(self, path: str, mmap_bytes: int = settings.CACHE_MMAP_BYTES,
+                 busy_timeout: float = settings.CACHE_BUSY_TIMEOUT):
+        self.path = path
+        self.mmap_bytes = mmap_bytes
+        self.busy_timeout = busy_timeout
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_message = None
+        self._subscribers = {}
+        self._writes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # a cache may lose its last writes on a crash
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            with self._lock:
+                if self._last_message is None:
+                    # only messages sent after this process started concern it
+                    self._last_message = conn.execute("SELECT coalesce(max(id), 0) FROM invalidation").fetchone()[0]
+        return conn
+
+    def subscribe(self, namespace: str, on_message, maxsize: int):
+        """on_message(key) for another worker's pop(key), on_message(None) for its clear()."""
+        self._subscribers[namespace] = (on_message, maxsize)
+
+    def get(self, namespace: str, key: str):
+        """(value bytes, expires as a time.time()) or None."""
+        row = self._connect().execute(
+            "SELECT value, expires FROM entry WHERE namespace = ? AND key = ? AND expires > ?",
+            (namespace, key, time.time())).fetchone()
+        return row
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float, generation: int = None) -> bool:
+        conn = self._connect()
+        expires = time.time() + ttl
+        if generation is None:
+            conn.execute("INSERT OR REPLACE INTO entry VALUES (?, ?, ?, ?)", (namespace, key, value, expires))
+            stored = True
+        else:
+            # one statement, so the generation check and the write are atomic
+            stored = conn.execute(
+                "INSERT OR REPLACE INTO entry SELECT ?, ?, ?, ? "
+                "WHERE coalesce((SELECT value FROM generation WHERE namespace = ?), 0) = ?",
+                (namespace, key, value, expires, namespace, generation)).rowcount > 0
+        self._wrote(conn)
+        return stored
+
+    def generation(self, namespace: str) -> int:
+        row = self._connect().execute("SELECT value FROM generation WHERE namespace = ?", (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def invalidate(self, namespace: str, key: str = None):
+        """Drop one key (or the whole namespace), bump its generation and tell the other workers."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT INTO generation VALUES (?, 1) "
+                         "ON CONFLICT (namespace) DO UPDATE SET value = value + 1", (namespace,))
+            if key is None:
+                conn.execute("DELETE FROM entry WHERE namespace = ?", (namespace,))
+            else:
+                conn.execute("DELETE FROM entry WHERE namespace = ? AND key = ?", (namespace, key))
+            conn.execute("INSERT INTO invalidation (namespace, key, origin, at) VALUES (?, ?, ?, ?)",
+                         (namespace, key, self.origin, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._wrote(conn)
+
+    def poll(self):
+        """Apply other workers' invalidation messages; nearly free when the file hasn't changed."""
+        conn = self._connect()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._local.data_version:
+            return
+        self._local.data_version = version
+        with self._lock:
+            after = self._last_message
+            rows = conn.execute("SELECT id, namespace, key, origin FROM invalidation WHERE id > ? ORDER BY id",
+                                (after,)).fetchall()
+            if rows:
+                self._last_message = rows[-1][0]
+            oldest = conn.execute("SELECT min(id) FROM invalidation").fetchone()[0]
+        if oldest is not None and oldest > after + 1 and after:
+            # messages were pruned before we saw them: we can't tell what's stale
+            for on_message, _ in self._subscribers.values():
+                on_message(None)
+            return
+        for _, namespace, key, origin in rows:
+            subscriber = self._subscribers.get(namespace)
+            if subscriber is not None and origin != self.origin:
+                subscriber[0](key)
+
+    def _wrote(self, conn):
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune(conn)
+
+    def prune(self, conn=None):
+        """Delete expired entries, entries over a namespace's maxsize, and old messages."""
+        conn = conn or self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM entry WHERE expires <= ?", (now,))
+        conn.execute("DELETE FROM invalidation WHERE at < ?", (now - MESSAGE_RETENTION,))
+        for namespace, (_, maxsize) in list(self._subscribers.items()):
+            conn.execute("DELETE FROM entry WHERE namespace = ? AND key IN (SELECT key FROM entry "
+                         "WHERE namespace = ? ORDER BY expires LIMIT max((SELECT count(*) FROM entry "
+                         "WHERE namespace = ?) - ?, 0))", (namespace, namespace, namespace, maxsize))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_shared_store() -> SharedStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SharedStore(settings.CACHE_PATH or default_cache_path())
+    return _store
+
+
+# --- namespaces ---
+class Cache:
+    """What the application sees; see cache_namespace()."""
+    backend = "base"
+
+    def __init__(self, name: str, maxsize: int, ttl: float, on_evict=None, on_remove=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=on_evict)
+        self.on_remove = on_remove
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.stale_sets = 0
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+        self.errors = 0
+
+    def __len__(self):
+        return len(self.local)
+
+    def _removed(self, key):
+        if self.on_remove:
+            self.on_remove(key)
+
+    def stats(self):
+        hits = self.local_hits + self.shared_hits
+        total = hits + self.misses
+        return {
+            "namespace": self.name,
+            "backend": self.backend,
+            "size": len(self.local),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": hits,
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+            "sets": self.sets,
+            "stale_sets": self.stale_sets,
+            "invalidations_sent": self.invalidations_sent,
+            "invalidations_received": self.invalidations_received,
+            "errors": self.errors,
+        }
+
+
+class MemoryCache(Cache):
+    backend = "memory"
+
+    def __init__(self, name: str, maxsize: int, ttl: float, on_evict=None, on_remove=None):
+        super().__init__(name, maxsize, ttl, on_evict, on_remove)
+        self._generation = 0
+
+    def get(self, key, default=None):
+        value = self.local.get(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.local_hits += 1
+        return value
+
+    def set(self, key, value, ttl: float = None, generation: int = None) -> bool:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self.stale_sets += 1
+                return False
+            self.local.set(key, value, ttl=ttl)
+            self.sets += 1
+        return True
+
+    def pop(self, key):
+        with self._lock:
+            self._generation += 1
+            self.invalidations_sent += 1
+            value = self.local.pop(key)
+        self._removed(key)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations_sent += 1
+            self.local.clear()
+        self._removed(None)
+
+    def generation(self) -> int:
+        return self._generation
+
+
+class SharedCache(Cache):
+    backend = "sqlite"
+
+    def __init__(self, name: str, store: SharedStore, maxsize: int, ttl: float,
+                 encode=None, decode=None, on_evict=None, on_remove=None):
+        super().__init__(name, maxsize, ttl, on_evict, on_remove)
+        self.store = store
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+        store.subscribe(name, self._on_message, maxsize)
+
+    def _on_message(self, key):
+        self.invalidations_received += 1
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.pop(key)
+        self._removed(key)
+
+    def _failed(self, action: str):
+        self.errors += 1
+        logger.warning("shared cache %s: %s failed", self.name, action, exc_info=True)
+
+    def get(self, key, default=None):
+        key = str(key)
+        try:
+            self.store.poll()
+        except sqlite3.Error:
+            self._failed("poll")
+            self.local.clear()  # can't tell what other workers invalidated
+            self._removed(None)
+        value = self.local.get(key)
+        if value is not None:
+            self.local_hits += 1
+            return value
+        try:
+            row = self.store.get(self.name, key)
+        except sqlite3.Error:
+            self._failed("get")
+            row = None
+        if row is None:
+            self.misses += 1
+            return default
+        data, expires = row
+        value = self.decode(marshal.loads(data))
+        self.local.set(key, value, ttl=min(self.ttl, expires - time.time()))
+        self.shared_hits += 1
+        return value
+
+    def set(self, key, value, ttl: float = None, generation: int = None) -> bool:
+        key = str(key)
+        ttl = self.ttl if ttl is None else ttl
+        try:
+            stored = self.store.set(self.name, key, marshal.dumps(self.encode(value)), ttl, generation)
+        except sqlite3.Error:
+            self._failed("set")
+            return False
+        if not stored:
+            self.stale_sets += 1
+            return False
+        self.local.set(key, value, ttl=ttl)
+        self.sets += 1
+        return True
+
+    def pop(self, key):
+        key = str(key)
+        value = self.local.pop(key)
+        self._removed(key)
+        try:
+            self.store.invalidate(self.name, key)
+            self.invalidations_sent += 1
+        except sqlite3.Error:
+            self._failed("pop")
+        return value
+
+    def clear(self):
+        self.local.clear()
+        self._removed(None)
+        try:
+            self.store.invalidate(self.name)
+            self.invalidations_sent += 1
+        except sqlite3.Error:
+            self._failed("clear")
+
+    def generation(self) -> int:
+        try:
+            return self.store.generation(self.name)
+        except sqlite3.Error:
+            self._failed("generation")
+            return -1  # matches no stored generation, so the following set() is skipped
+
+
+namespaces = {}
+
+
+def cache_namespace(name: str, maxsize: int, ttl: float, shared: bool = True,
+                    encode=None, decode=None, on_evict=None, on_remove=None) -> Cache:
+    """A named cache on the configured backend.
+
+    shared=False keeps it in process whatever CACHE_BACKEND says, for data
+    that can't go stale (e.g. decoded tokens). encode/decode convert values
+    to and from marshal-able plain data for the shared store. on_evict(key)
+    fires when this process's copy drops an entry for size or age;
+    on_remove(key) on pop() and clear() (key None), including another
+    worker's, as seen by this process.
+    """
+    if shared and settings.CACHE_BACKEND == "sqlite":
+        cache = SharedCache(name, get_shared_store(), maxsize, ttl, encode, decode, on_evict, on_remove)
+    elif settings.CACHE_BACKEND in ("memory", "sqlite"):
+        cache = MemoryCache(name, maxsize, ttl, on_evict, on_remove)
+    else:
+        raise ValueError(f"unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}")
+    namespaces[name] = cache
+    return cache
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in namespaces.items()}
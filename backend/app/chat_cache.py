@@ -0,0 +1,259 @@
+# backend/app/chat_cache.py
+"""Response cache in front of the chatbot LLM.
+
+Messages are normalized (case, punctuation, whitespace) before keying, so
+"What does 'enormous' mean?" and "what does enormous mean" share an entry.
+With CHAT_CACHE_SIMILARITY > 0, short standalone questions (no conversation
+context) also match near-duplicates through a character-trigram Jaccard
+index, but a near match is only reused when both questions have the same
+content words: trigrams alone put "though" and "through" at 0.9, and a
+question about one word must never get the answer about another. It is off
+by default. Concurrent identical prompts share one upstream call (single
+flight).
+
+Replies live in the "chat_replies" cache namespace, so with
+CACHE_BACKEND=sqlite a reply generated by one worker is reused by all of
+them. The near-duplicate index and single flight stay per process: another
+worker's replies are found by exact key only.
+"""
+import asyncio
+import hashlib
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+
+from .cache import cache_namespace
+from .config import settings
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+STOPWORDS = frozenset(
+    "a an the is are was were be do does did what whats how why when which who "
+    "to of in on for and or it this that i me my you your can could should would please".split())
+
+
+def normalize_prompt(prompt: str) -> str:
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", prompt.lower())).strip()
+
+
+def prompt_key(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def trigrams(normalized: str) -> frozenset:
+    padded = f" {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def content_words(normalized: str) -> frozenset:
+    return frozenset(word for word in normalized.split() if word not in STOPWORDS)
+
+
+def _gram_order(gram: str) -> int:
+    return zlib.crc32(gram.encode("utf-8"))
+
+
+class LeaderAborted(Exception):
+    """The request computing a shared reply went away before finishing."""
+
+
+class NearDuplicateIndex:
+    """Trigram sets with prefix filtering for Jaccard >= threshold lookups.
+
+    Sets are ordered by a fixed global gram order; two sets with Jaccard >= t
+    must share a gram within the first len - ceil(t * len) + 1 grams of each,
+    so only those prefixes are indexed and probed. Candidates whose content
+    words differ from the probe's are never returned.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._grams = {}
+        self._words = {}
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    def _prefix(self, grams):
+        ordered = sorted(grams, key=_gram_order)
+        return ordered[:len(ordered) - math.ceil(self.threshold * len(ordered)) + 1]
+
+    def add(self, key, grams, words):
+        with self._lock:
+            if key in self._grams:
+                return
+            self._grams[key] = grams
+            self._words[key] = words
+            for gram in self._prefix(grams):
+                self._postings.setdefault(gram, set()).add(key)
+
+    def discard(self, key):
+        with self._lock:
+            grams = self._grams.pop(key, None)
+            if grams is None:
+                return
+            del self._words[key]
+            for gram in self._prefix(grams):
+                keys = self._postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[gram]
+
+    def clear(self):
+        with self._lock:
+            self._grams.clear()
+            self._words.clear()
+            self._postings.clear()
+
+    def most_similar(self, grams, words):
+        """(key, similarity) of the closest indexed set at or above the threshold
+        with the same content words."""
+        best, best_score = None, self.threshold
+        with self._lock:
+            candidates = Counter()
+            for gram in self._prefix(grams):
+                candidates.update(self._postings.get(gram, ()))
+            for key in candidates:
+                if self._words[key] != words:
+                    continue
+                other = self._grams[key]
+                shared = len(grams & other)
+                score = shared / (len(grams) + len(other) - shared)
+                if score >= best_score:
+                    best, best_score = key, score
+        return (best, best_score) if best is not None else (None, 0.0)
+
+    def __len__(self):
+        return len(self._grams)
+
+
+class ChatResponseCache:
+    def __init__(self, maxsize: int = settings.CHAT_CACHE_SIZE, ttl: float = settings.CHAT_CACHE_TTL,
+                 similarity: float = settings.CHAT_CACHE_SIMILARITY,
+                 near_dup_max_chars: int = settings.CHAT_CACHE_NEAR_DUP_MAX_CHARS):
+        self.near_dup_max_chars = near_dup_max_chars
+        self.index = NearDuplicateIndex(similarity) if similarity > 0 else None
+        self.replies = cache_namespace("chat_replies", maxsize, ttl, on_evict=self._on_evict,
+                                       on_remove=self._on_remove)
+        self._inflight = {}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _on_evict(self, key):
+        self.evictions += 1
+        if self.index is not None:
+            self.index.discard(key)
+
+    def _on_remove(self, key):
+        # pop()/clear(), here or (shared backend) in another worker; None = everything
+        if self.index is None:
+            return
+        if key is None:
+            self.index.clear()
+        else:
+            self.index.discard(key)
+
+    def _key(self, message, context):
+        normalized = normalize_prompt(message)
+        key = prompt_key(normalize_prompt(context) + "\n" + normalized if context else normalized)
+        near = None
+        if self.index is not None and not context and len(normalized) <= self.near_dup_max_chars:
+            near = (trigrams(normalized), content_words(normalized))
+        return key, near
+
+    def lookup(self, message: str, context: str = ""):
+        """(key, cached reply or None) for a raw message and its context."""
+        key, near = self._key(message, context)
+        reply = self.replies.get(key)
+        if reply is not None:
+            self.hits += 1
+            return key, reply
+        if near:
+            near_key, _ = self.index.most_similar(*near)
+            if near_key is not None:
+                reply = self.replies.get(near_key)
+                if reply is not None:
+                    self.near_hits += 1
+                    return key, reply
+        self.misses += 1
+        return key, None
+
+    def store(self, message: str, reply: str, context: str = ""):
+        key, near = self._key(message, context)
+        self.replies.set(key, reply)
+        if near:
+            self.index.add(key, *near)
+
+    def forget(self, message: str, context: str = ""):
+        self.replies.pop(self._key(message, context)[0])
+
+    def clear(self):
+        self.replies.clear()
+
+    async def stream(self, message: str, upstream, context: str = ""):
+        """Reply chunks, calling `upstream()` (returns an async iterator of
+        chunks) at most once for concurrent identical prompts."""
+        key, reply = self.lookup(message, context)
+        if reply is not None:
+            yield reply
+            return
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                reply = await asyncio.shield(pending)
+            except LeaderAborted:
+                pass  # leader's client disconnected; compute it ourselves
+            else:
+                yield reply
+                return
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        parts = []
+        try:
+            async for chunk in upstream():
+                parts.append(chunk)
+                yield chunk
+            reply = "".join(parts)
+            if reply:
+                self.store(message, reply, context)
+            future.set_result(reply)
+        except BaseException as e:
+            # GeneratorExit/CancelledError: our consumer went away mid-reply
+            future.set_exception(e if isinstance(e, Exception) else LeaderAborted())
+            future.exception()  # mark retrieved when nobody is waiting
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def generate(self, message: str, upstream, context: str = "") -> str:
+        return "".join([chunk async for chunk in self.stream(message, upstream, context)])
+
+    def stats(self):
+        total = self.hits + self.near_hits + self.misses
+        return {
+            "backend": self.replies.backend,
+            "shared_hits": self.replies.shared_hits,
+            "size": len(self.replies),
+            "maxsize": self.replies.maxsize,
+            "ttl": self.replies.ttl,
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.near_hits) / total, 3) if total else 0.0,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "evictions": self.evictions,
+            "near_dup_indexed": len(self.index) if self.index is not None else 0,
+        }
+
+
+chat_cache = ChatResponseCache()
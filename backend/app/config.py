@@ -6,6 +6,50 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
     DATABASE_URL: str = "sqlite:///./lexilearn.db"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    BCRYPT_ROUNDS: int = 12
+    HASH_WORKERS: int = 0  # 0 = one per CPU
+    HASH_MAX_QUEUE: int = 64
+    HASH_QUEUE_TIMEOUT: float = 5.0
+    HASH_EXECUTOR_ENABLED: bool = True
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL: float = 60.0
+    SCORING_WORKERS: int = 0  # 0 = one per CPU
+    BATCH_MAX_ITEMS: int = 1000
+    LLM_PROVIDER: str = "gemini"  # or "stub" for offline load tests
+    LLM_MODEL: str = "gemini-2.5-flash"
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_QUEUE_TIMEOUT: float = 5.0
+    LLM_TIMEOUT: float = 30.0
+    LLM_RATE_LIMIT: int = 10  # requests per user per LLM_RATE_WINDOW
+    LLM_RATE_WINDOW: float = 60.0
+    LLM_STUB_LATENCY: float = 0.5
+    LLM_STUB_CHUNK_DELAY: float = 0.05
+    CHAT_CACHE_SIZE: int = 2048
+    CHAT_CACHE_TTL: float = 6 * 60 * 60
+    CHAT_CACHE_SIMILARITY: float = 0.0  # trigram Jaccard for near-duplicates (same words only); 0 = exact only
+    CHAT_CACHE_NEAR_DUP_MAX_CHARS: int = 300
+    PERFORMANCE_MODEL_DIR: str = ""  # "" = app/model_artifacts next to the code
+    MODEL_RELOAD_INTERVAL: float = 30.0  # seconds between checks for new versions; 0 = off
+    JOB_WORKERS: int = 2  # in-process background job workers; 0 = don't run jobs in the API
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_BACKOFF_BASE: float = 1.0  # seconds; doubles per attempt
+    JOB_BACKOFF_MAX: float = 300.0
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_LEASE_SECONDS: float = 300.0  # a running job not finished by then is retried
+    JOB_RETENTION_SECONDS: float = 24 * 60 * 60  # done jobs are deleted after this
+    JOB_PURGE_INTERVAL: float = 60.0  # seconds between purges of old done jobs
+    PROFILING_ENABLED: bool = False  # honour the X-Profile request header
+    RESPONSE_CACHE_SIZE: int = 512  # serialized lesson responses per process
+    RESPONSE_CACHE_TTL: float = 30.0  # with the memory backend, bounds staleness in other workers
+    COMPRESS_MIN_BYTES: int = 1024  # smaller bodies are sent uncompressed
+    CACHE_BACKEND: str = "memory"  # or "sqlite": caches shared by all workers on this host
+    CACHE_PATH: str = ""  # "" = a file per DATABASE_URL in the temp directory
+    CACHE_MMAP_BYTES: int = 64 * 1024 * 1024
+    CACHE_BUSY_TIMEOUT: float = 0.5  # seconds to wait for another worker's write; then it's a miss
 
 settings = Settings()
 
@@ -1,12 +1,139 @@
-from sqlmodel import create_engine, Session, SQLModel
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .config import settings
+from .telemetry import record_query
+
+
+def async_database_url(url: str) -> str:
+    """Map a plain database URL onto its async driver."""
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+
+engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    echo=False,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+async_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
 
-engine = create_engine(settings.DATABASE_URL, echo=False, connect_args={"check_same_thread": False})
+async def init_db():
+    """Create or upgrade the schema; returns what had to be created (see migrations.upgrade)."""
+    from . import models
+    from .migrations import upgrade
+    async with engine.begin() as conn:
+        return await conn.run_sync(upgrade)
 
-def init_db():
-    from .models import User, Lesson, ReadingSession
-    SQLModel.metadata.create_all(engine)
 
-def get_session():
-    with Session(engine) as session:
+async def get_session():
+    async with async_session_factory() as session:
         yield session
+
+
+def dialect_insert(table):
+    """INSERT with on_conflict_do_update/do_nothing for the configured database."""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+# --- pool and query metrics ---
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class DBMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.query_time_ms = 0.0
+        self.max_query_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.peak_checked_out = 0
+
+    def observe_query(self, elapsed_ms: float):
+        with self._lock:
+            self.queries += 1
+            self.query_time_ms += elapsed_ms
+            self.max_query_ms = max(self.max_query_ms, elapsed_ms)
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def observe_checkout(self, checked_out: int):
+        with self._lock:
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def snapshot(self):
+        pool = engine.sync_engine.pool
+        capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        with self._lock:
+            buckets = {f"le_{bound}ms": n for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets)}
+            buckets["gt_1000ms"] = self.buckets[-1]
+            return {
+                "pool": {
+                    "status": pool.status(),
+                    "size": settings.DB_POOL_SIZE,
+                    "max_overflow": settings.DB_MAX_OVERFLOW,
+                    "checked_out": checked_out,
+                    "peak_checked_out": self.peak_checked_out,
+                    "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+                },
+                "queries": {
+                    "count": self.queries,
+                    "total_ms": round(self.query_time_ms, 3),
+                    "avg_ms": round(self.query_time_ms / self.queries, 3) if self.queries else 0.0,
+                    "max_ms": round(self.max_query_ms, 3),
+                    "latency_buckets": buckets,
+                },
+            }
+
+
+db_metrics = DBMetrics()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_metrics.observe_query(elapsed * 1000)
+    record_query(elapsed)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _on_query_error(context):
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+@event.listens_for(engine.sync_engine.pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        db_metrics.observe_checkout(pool.checkedout())
@@ -1,22 +1,77 @@
 # backend/app/dependencies.py
+import time
+
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 from sqlmodel import select
-from jose import JWTError, jwt
 
+from .cache import cache_namespace
 from .config import settings
 from .db import get_session
 from .models import User
+from .progress import user_out
+from .schemas import Principal, TokenData, UserOut
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), session=Depends(get_session)) -> User:
-    from .auth import decode_token
-    token_data = decode_token(token)
-    if not token_data.sub:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+# token -> decoded TokenData, and user id -> UserOut snapshot. A token's
+# claims never change, so decoded tokens stay per-process; user snapshots
+# follow CACHE_BACKEND and invalidate_user() drops them in every worker.
+token_cache = cache_namespace("auth_tokens", settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL, shared=False)
+user_cache = cache_namespace("users", settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL,
+                             encode=UserOut.model_dump, decode=lambda data: UserOut.model_construct(**data))
+
+
+def decode_cached_token(token: str) -> TokenData:
+    token_data = token_cache.get(token)
+    if token_data is None:
+        from .auth import decode_token
+        token_data = decode_token(token)
+        if not token_data.sub:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+        # never keep a token around past its own expiry
+        ttl = settings.AUTH_CACHE_TTL
+        if token_data.exp:
+            ttl = min(ttl, token_data.exp - time.time())
+        if ttl > 0:
+            token_cache.set(token, token_data, ttl=ttl)
+    return token_data
+
+
+def invalidate_user(user_id: int):
+    """Call after changing a user's profile, role or progress."""
+    user_cache.pop(int(user_id))
+
+
+async def get_user_snapshot(token: str = Depends(oauth2_scheme), session=Depends(get_session)) -> UserOut:
+    """The caller's profile, served from cache when possible."""
+    user_id = int(decode_cached_token(token).sub)
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        generation = user_cache.generation()
+        user = await session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        snapshot = await user_out(session, user)
+        user_cache.set(user_id, snapshot, generation=generation)
+    return snapshot
+
+
+async def get_current_principal(snapshot: UserOut = Depends(get_user_snapshot)) -> Principal:
+    """Just id and role, for routes that don't need the User row."""
+    return Principal(id=snapshot.id, role=snapshot.role)
+
+
+async def require_teacher(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if principal.role != "teacher":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only teachers can do this")
+    return principal
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), session=Depends(get_session)) -> User:
+    token_data = decode_cached_token(token)
     statement = select(User).where(User.id == int(token_data.sub))
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
@@ -0,0 +1,110 @@
+# backend/app/fluency.py
+"""Reading fluency from a timed transcript.
+
+Clients send either word timestamps ({"word", "start", "end"}) or, when the
+speech recognizer only reports finalized segments, chunk timestamps
+({"text", "start", "end"}); chunk words are spread evenly over their chunk.
+Times are seconds from the start of the reading. fluency_metrics() computes
+everything from the start/end arrays in one vectorized pass. Some
+recognizers omit end times; those ends are NaN and the pause statistics,
+which need them, are left out.
+"""
+import numpy as np
+
+# A gap between words of at least PAUSE_SECONDS counts as a pause; pauses are
+# bucketed as short (< 1s), medium (1-2s) and long (>= 2s).
+PAUSE_SECONDS = 0.3
+PAUSE_BUCKETS = (PAUSE_SECONDS, 1.0, 2.0)
+HOTSPOTS = 5
+
+
+def word_timings(words=None, chunks=None):
+    """(tokens, starts, ends) from word- or chunk-level timestamps; a missing end is NaN."""
+    if words:
+        tokens = [w.word for w in words]
+        starts = np.fromiter((w.start for w in words), dtype=float, count=len(words))
+        ends = np.fromiter((np.nan if w.end is None else w.end for w in words), dtype=float, count=len(words))
+        return tokens, starts, ends
+
+    tokens, bounds, sizes = [], [], []
+    for chunk in chunks or ():
+        chunk_tokens = chunk.text.split()
+        if chunk_tokens:
+            tokens.extend(chunk_tokens)
+            bounds.append((chunk.start, np.nan if chunk.end is None else chunk.end))
+            sizes.append(len(chunk_tokens))
+    if not tokens:
+        return [], np.empty(0), np.empty(0)
+    bounds, sizes = np.array(bounds, dtype=float), np.array(sizes)
+    # word k of an n-word chunk occupies the k-th nth of the chunk's span
+    first = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    slot = (np.arange(len(tokens)) - first) / np.repeat(sizes, sizes)
+    span = np.repeat(bounds[:, 1] - bounds[:, 0], sizes)
+    # without an end the words can't be spread, so they all start with the chunk (and have no end)
+    starts = np.repeat(bounds[:, 0], sizes) + np.nan_to_num(slot * span)
+    return tokens, starts, starts + span / np.repeat(sizes, sizes)
+
+
+def fluency_metrics(tokens, starts, ends, correct_words: int, duration: float = None):
+    """WPM, words correct per minute, pause distribution and hesitation hotspots.
+
+    `duration` (seconds) overrides the span of the timestamps, e.g. when the
+    client measured the whole recording including silence at either end.
+    Without every end time there are only WPM and WCPM: a gap can't be told
+    apart from the word being spoken.
+    """
+    n = len(tokens)
+    if not n:
+        return None
+    timed = not np.isnan(ends).any()
+    if duration is None:
+        last = ends.max() if timed else np.fmax(ends, starts).max()
+        duration = float(last - starts.min())
+    minutes = max(duration, 1.0) / 60
+    metrics = {
+        "duration_ms": int(round(duration * 1000)),
+        "wpm": int(round(n / minutes)),
+        "wcpm": int(round(correct_words / minutes)),
+    }
+    if not timed:
+        return metrics
+
+    # gap before word i+1; overlaps from recognizer jitter are not pauses
+    gaps = np.maximum(starts[1:] - ends[:-1], 0.0)
+    buckets = np.bincount(np.digitize(gaps, PAUSE_BUCKETS), minlength=len(PAUSE_BUCKETS) + 1)
+    pauses = gaps[gaps >= PAUSE_SECONDS]
+
+    # the words read after the longest pauses
+    top = np.argsort(gaps)[::-1][:HOTSPOTS]
+    top = top[gaps[top] >= 1.0]
+    hesitations = [{"index": int(i) + 1, "word": tokens[i + 1], "pause_ms": int(round(gaps[i] * 1000))}
+                   for i in top]
+
+    return {
+        **metrics,
+        "pauses_short": int(buckets[1]),
+        "pauses_medium": int(buckets[2]),
+        "pauses_long": int(buckets[3]),
+        "pause_ms": int(round(pauses.sum() * 1000)),
+        "hesitations": hesitations,
+    }
+
+
+def session_fluency(timing, spoken_text: str, correct_words: int):
+    """Fluency for a SessionTiming, or None when the client sent no timing.
+
+    A bare duration still gives WPM and WCPM, just no pause analysis.
+    """
+    if timing is None:
+        return None
+    tokens, starts, ends = word_timings(timing.words, timing.chunks)
+    if tokens:
+        return fluency_metrics(tokens, starts, ends, correct_words, timing.duration)
+    if timing.duration:
+        minutes = max(timing.duration, 1.0) / 60
+        return {
+            "duration_ms": int(round(timing.duration * 1000)),
+            "wpm": int(round(len(spoken_text.split()) / minutes)),
+            "wcpm": int(round(correct_words / minutes)),
+        }
+    return None
@@ -0,0 +1,186 @@
+# backend/app/http_cache.py
+"""Serialized-response cache with ETags, conditional GETs and compression.
+
+For read-heavy routes whose data changes rarely (lessons). A cached entry
+holds the JSON body, rendered once, with a content-hash ETag and
+Last-Modified. A request with a matching If-None-Match (or, where the
+route vouches for its Last-Modified, an If-Modified-Since not older than
+it) gets a bodyless 304. Bodies over COMPRESS_MIN_BYTES are sent gzip- or
+brotli-encoded (brotli when the `brotli` package is installed); each
+encoding is computed once per entry and kept alongside it.
+
+Entries live in a cache namespace (app.cache): per process by default, or
+shared by the workers on this host with CACHE_BACKEND=sqlite. Writers call
+invalidate() after committing, which reaches every worker with the shared
+backend; with per-process caches, RESPONSE_CACHE_TTL bounds how long other
+workers keep serving the old body. A read that started before an
+invalidation does not store its result, so a slow read can't put pre-write
+data back into the cache.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import urlencode
+from datetime import datetime, timezone
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from .cache import cache_namespace
+from .config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _encoders():
+    encoders = {"gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        encoders["br"] = lambda body: brotli.compress(body, quality=5)
+    return encoders
+
+
+ENCODERS = _encoders()
+PREFERENCE = ("br", "gzip")
+
+
+def http_date(value) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def accepted_encoding(header: str):
+    """The best encoding we support that the client accepts (q=0 means refused)."""
+    accepted = {}
+    for part in (header or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    for name in PREFERENCE:
+        if name in ENCODERS and accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "last_modified", "trust_modified", "_encoded")
+
+    def __init__(self, payload, last_modified=None, trust_modified=False):
+        # the same separators as JSONResponse, so cached and uncached bodies match
+        self.body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                               separators=(",", ":")).encode()
+        # weak: the same ETag covers the identity and compressed encodings
+        self.etag = 'W/"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+        self.last_modified = last_modified.replace(microsecond=0) if last_modified else None
+        self.trust_modified = trust_modified and self.last_modified is not None
+        self._encoded = {}
+
+    def dump(self):
+        """Plain data for the shared cache; compressed variants are redone per worker."""
+        modified = self.last_modified.isoformat() if self.last_modified else None
+        return self.body, self.etag, modified, self.trust_modified
+
+    @classmethod
+    def load(cls, data):
+        body, etag, modified, trust_modified = data
+        entry = cls.__new__(cls)
+        entry.body, entry.etag, entry.trust_modified = body, etag, trust_modified
+        entry.last_modified = datetime.fromisoformat(modified) if modified else None
+        entry._encoded = {}
+        return entry
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = ENCODERS[encoding](self.body)
+        return body
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+        since = request.headers.get("if-modified-since")
+        if since and self.trust_modified:
+            try:
+                return self.last_modified.replace(tzinfo=timezone.utc) <= parsedate_to_datetime(since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class ResponseCache:
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.entries = cache_namespace(f"http_{name}", maxsize, ttl,
+                                       encode=CachedResponse.dump, decode=CachedResponse.load)
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.bytes_saved_not_modified = 0
+        self.bytes_saved_compression = 0
+
+    def invalidate(self):
+        self.entries.clear()
+
+    async def respond(self, request: Request, build, trust_modified: bool = False) -> Response:
+        """Serve `build()`'s (payload, last_modified) from cache, or build and cache it.
+
+        trust_modified: Last-Modified changes on every change to the payload,
+        so If-Modified-Since can be honoured.
+        """
+        key = request.url.path + "?" + urlencode(sorted(request.query_params.multi_items()))
+        entry = self.entries.get(key)
+        if entry is None:
+            generation = self.entries.generation()
+            payload, last_modified = await build()
+            entry = CachedResponse(payload, last_modified, trust_modified)
+            self.entries.set(key, entry, generation=generation)
+        return self._response(request, entry)
+
+    def _response(self, request: Request, entry: CachedResponse) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if entry.last_modified:
+            headers["Last-Modified"] = http_date(entry.last_modified)
+        with self._lock:
+            self.responses += 1
+        if entry.not_modified(request):
+            with self._lock:
+                self.not_modified += 1
+                self.bytes_saved_not_modified += len(entry.body)
+            return Response(status_code=304, headers=headers)
+
+        body = entry.body
+        if len(body) >= settings.COMPRESS_MIN_BYTES:
+            encoding = accepted_encoding(request.headers.get("accept-encoding"))
+            if encoding:
+                body = entry.encoded(encoding)
+                headers["Content-Encoding"] = encoding
+        with self._lock:
+            self.bytes_sent += len(body)
+            self.bytes_saved_compression += len(entry.body) - len(body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self):
+        with self._lock:
+            counters = {
+                "responses": self.responses,
+                "not_modified": self.not_modified,
+                "bytes_sent": self.bytes_sent,
+                "bytes_saved_not_modified": self.bytes_saved_not_modified,
+                "bytes_saved_compression": self.bytes_saved_compression,
+            }
+        return {"name": self.name, **self.entries.stats(), **counters,
+                "encodings": [name for name in PREFERENCE if name in ENCODERS]}
+
+
+lesson_responses = ResponseCache("lessons", settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
@@ -0,0 +1,312 @@
+# backend/app/jobs.py
+"""In-process background jobs with a database outbox.
+
+enqueue() adds a Job row inside the caller's transaction, so a job exists
+exactly when the data it refers to was committed; no external broker is
+involved. JobQueue workers (asyncio tasks in the API process) claim due
+jobs, run their handler and mark them done in one transaction, so a
+handler's writes and the job's completion commit together. Failures are
+retried with exponential backoff until JOB_MAX_ATTEMPTS, then the job is
+left as "failed".
+
+Jobs are deduplicated by idempotency key. A job still "running" after
+JOB_LEASE_SECONDS (its worker died) is claimed again. Done jobs are deleted
+once they are JOB_RETENTION_SECONDS old, which also frees their keys: only
+enqueue with a key that won't be reused later (e.g. a new row's id). Failed
+jobs are kept for inspection.
+
+    python -m app.jobs status     # pending and running jobs
+    python -m app.jobs run        # drain due jobs without the API running
+    python -m app.jobs purge      # delete done jobs past the retention period
+"""
+import asyncio
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, update
+from sqlmodel import select
+
+from .config import settings
+from .db import async_session_factory, dialect_insert
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+LATENCY_SAMPLES = 1000
+PURGE_BATCH = 1000  # rows per DELETE, so a large backlog doesn't hold the write lock for long
+
+_handlers = {}
+
+
+def job_handler(kind: str):
+    """Register `async def handler(session, payload)` for a job kind.
+
+    The handler must not commit. It may return a callable to run after the
+    commit, e.g. to drop cache entries the job made stale.
+    """
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+async def enqueue(session, kind: str, payload: dict, key: str = None):
+    """Add a job in the caller's transaction; a repeated key is ignored."""
+    await enqueue_many(session, kind, [(payload, key)])
+
+
+async def enqueue_many(session, kind: str, jobs):
+    """Add (payload, key) jobs; key=None derives one from the payload."""
+    now = datetime.utcnow()
+    rows = [
+        {"kind": kind, "idempotency_key": key or f"{kind}:{json.dumps(payload, sort_keys=True)}", "payload": payload,
+         "status": PENDING, "attempts": 0, "run_at": now, "created_at": now}
+        for payload, key in jobs
+    ]
+    if rows:
+        statement = dialect_insert(Job.__table__).values(rows)
+        await session.exec(statement.on_conflict_do_nothing(index_elements=["idempotency_key"]))
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)  # jitter, so retries don't arrive together
+
+
+class JobQueue:
+    def __init__(self, workers: int = settings.JOB_WORKERS):
+        self.workers = workers
+        self._tasks = []
+        self._wakeup = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.purged = 0
+        self._purged_at = 0.0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)  # enqueue -> done, seconds
+        self._run_times = deque(maxlen=LATENCY_SAMPLES)
+
+    # --- lifecycle ---
+    def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    async def stop(self, timeout: float = 5.0):
+        """Let running jobs finish (up to `timeout`), then cancel the workers."""
+        self._stopping = True
+        self.notify()
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after committing new jobs."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, n: int):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                ran = await self.run_one()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("job worker %d", n)
+                ran = False
+            if not ran and n == 0 and time.monotonic() - self._purged_at >= settings.JOB_PURGE_INTERVAL:
+                self._purged_at = time.monotonic()
+                try:
+                    await self.purge()
+                except Exception:
+                    logger.exception("purging done jobs")
+            if not ran and not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    # --- claiming and running ---
+    async def _claim(self, session):
+        # two queries rather than one OR, so each is a range on one of the
+        # status indexes instead of a scan of every job ever recorded
+        now = datetime.utcnow()
+        expired = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        job = (await session.exec(
+            select(Job).where(Job.status == RUNNING, Job.started_at < expired).order_by(Job.started_at).limit(1)
+        )).first()
+        if job is None:
+            job = (await session.exec(
+                select(Job).where(Job.status == PENDING, Job.run_at <= now).order_by(Job.run_at).limit(1)
+            )).first()
+        if job is None:
+            return None
+        # only one claimer's UPDATE matches the row as it was read
+        claimed = await session.exec(
+            update(Job)
+            .where(Job.id == job.id, Job.status == job.status, Job.attempts == job.attempts)
+            .values(status=RUNNING, started_at=now, attempts=job.attempts + 1)
+        )
+        await session.commit()
+        if claimed.rowcount != 1:
+            return None
+        await session.refresh(job)
+        return job
+
+    async def run_one(self) -> bool:
+        """Claim and run one due job; False when there was none."""
+        async with async_session_factory() as session:
+            job = await self._claim(session)
+        if job is None:
+            return False
+
+        started = time.perf_counter()
+        async with async_session_factory() as session:
+            try:
+                handler = _handlers.get(job.kind)
+                if handler is None:
+                    raise LookupError(f"no handler for job kind {job.kind!r}")
+                after_commit = await handler(session, job.payload)
+                finished = await self._finish(session, job, DONE)
+                if finished:
+                    await session.commit()
+                else:
+                    await session.rollback()  # lease expired and another worker took over
+            except Exception as e:
+                await session.rollback()
+                await self._fail(session, job, e)
+                return True
+
+        if finished:
+            if after_commit is not None:
+                after_commit()
+            with self._lock:
+                self.completed += 1
+                self._run_times.append(time.perf_counter() - started)
+                self._latencies.append((datetime.utcnow() - job.created_at).total_seconds())
+        return True
+
+    async def _finish(self, session, job, status, **values) -> bool:
+        result = await session.exec(
+            update(Job)
+            .where(Job.id == job.id, Job.status == RUNNING, Job.attempts == job.attempts)
+            .values(status=status, finished_at=datetime.utcnow(), **values)
+        )
+        return result.rowcount == 1
+
+    async def _fail(self, session, job, error):
+        message = f"{type(error).__name__}: {error}"[:1000]
+        if job.attempts >= settings.JOB_MAX_ATTEMPTS:
+            logger.error("job %s (%s) failed after %d attempts: %s", job.id, job.kind, job.attempts, message)
+            await self._finish(session, job, FAILED, last_error=message)
+            counter = "failed"
+        else:
+            retry_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(job.attempts))
+            await session.exec(
+                update(Job)
+                .where(Job.id == job.id, Job.status == RUNNING, Job.attempts == job.attempts)
+                .values(status=PENDING, run_at=retry_at, last_error=message)
+            )
+            counter = "retried"
+        await session.commit()
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def drain(self, limit: int = None) -> int:
+        """Run due jobs until none are left (or `limit` ran); returns how many ran."""
+        ran = 0
+        while (limit is None or ran < limit) and await self.run_one():
+            ran += 1
+        return ran
+
+    async def purge(self, older_than: float = None) -> int:
+        """Delete done jobs that finished more than `older_than` seconds ago; returns how many."""
+        retention = settings.JOB_RETENTION_SECONDS if older_than is None else older_than
+        # started_at rather than finished_at, so ix_job_status_started_at serves it
+        cutoff = datetime.utcnow() - timedelta(seconds=retention)
+        deleted = 0
+        while True:
+            async with async_session_factory() as session:
+                batch = select(Job.id).where(Job.status == DONE, Job.started_at < cutoff).limit(PURGE_BATCH)
+                result = await session.exec(delete(Job).where(Job.id.in_(batch.scalar_subquery())))
+                await session.commit()
+            deleted += result.rowcount
+            if result.rowcount < PURGE_BATCH:
+                break
+        with self._lock:
+            self.purged += deleted
+        return deleted
+
+    # --- metrics ---
+    async def depth(self):
+        """Pending and running counts, and the oldest pending job's created_at."""
+        async with async_session_factory() as session:
+            rows = (await session.exec(
+                select(Job.status, func.count(), func.min(Job.created_at))
+                .where(Job.status.in_((PENDING, RUNNING))).group_by(Job.status)
+            )).all()
+        counts = {status: count for status, count, _ in rows}
+        oldest = next((oldest for status, _, oldest in rows if status == PENDING), None)
+        return counts, oldest
+
+    async def stats(self):
+        counts, oldest_pending = await self.depth()
+        with self._lock:
+            latencies = sorted(self._latencies)
+            run_times = sorted(self._run_times)
+            processed = {"completed": self.completed, "retried": self.retried, "failed": self.failed,
+                         "purged": self.purged}
+
+        def percentile(values, q):
+            return round(values[min(len(values) - 1, int(q * len(values)))], 4) if values else None
+
+        return {
+            "workers": len(self._tasks),
+            "depth": {status: counts.get(status, 0) for status in (PENDING, RUNNING)},
+            "oldest_pending_age_s": round((datetime.utcnow() - oldest_pending).total_seconds(), 3)
+            if oldest_pending else None,
+            "processed": processed,
+            "latency_s": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+                          "max": round(latencies[-1], 4) if latencies else None},
+            "run_time_s": {"p50": percentile(run_times, 0.5), "p95": percentile(run_times, 0.95)},
+        }
+
+
+job_queue = JobQueue()
+
+
+async def _main(argv):
+    from .db import engine, init_db
+    from . import session_analytics  # noqa: F401  (registers its handlers)
+    if argv[:1] not in (["status"], ["run"], ["purge"]):
+        print("usage: python -m app.jobs status|run|purge")
+        return 2
+    await init_db()
+    try:
+        if argv[0] == "run":
+            started = time.perf_counter()
+            ran = await job_queue.drain()
+            print(f"Ran {ran} jobs in {time.perf_counter() - started:.2f}s")
+        elif argv[0] == "purge":
+            print(f"Deleted {await job_queue.purge()} done jobs")
+        print(await job_queue.stats())
+    finally:
+        await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
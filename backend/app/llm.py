@@ -0,0 +1,211 @@
+# backend/app/llm.py
+"""Chatbot LLM access: pluggable providers behind a concurrency gate.
+
+Providers implement `stream(prompt)` as an async iterator of text chunks;
+`generate()` joins them. LLMGate bounds in-flight calls with a semaphore,
+rate-limits per user and enforces LLM_TIMEOUT, so a slow model reply never
+holds up the event loop or other users.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .config import settings
+from .telemetry import llm_first_chunk, record_llm
+
+
+class LLMBusy(Exception):
+    """All LLM_MAX_CONCURRENCY slots stayed taken for LLM_QUEUE_TIMEOUT."""
+
+
+class LLMRateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class LLMTimeout(Exception):
+    """The provider did not finish within LLM_TIMEOUT."""
+
+
+# --- providers ---
+class LLMProvider:
+    name = "base"
+
+    def stream(self, prompt: str):
+        """Async iterator of reply chunks."""
+        raise NotImplementedError
+
+    async def generate(self, prompt: str) -> str:
+        return "".join([chunk async for chunk in self.stream(prompt)])
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: str = settings.LLM_MODEL):
+        import google.generativeai as genai
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        self.model = genai.GenerativeModel(model_name)
+
+    async def stream(self, prompt: str):
+        # generate_content_async uses the grpc aio transport: no thread is
+        # blocked while Gemini is thinking.
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class StubProvider(LLMProvider):
+    """Offline stand-in that simulates model latency, for load tests."""
+    name = "stub"
+
+    def __init__(self, latency: float = settings.LLM_STUB_LATENCY,
+                 chunk_delay: float = settings.LLM_STUB_CHUNK_DELAY, chunks: int = 8):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+
+    async def stream(self, prompt: str):
+        await asyncio.sleep(self.latency)
+        words = (prompt.split() or ["..."])[-self.chunks:]
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            yield word + " "
+
+
+PROVIDERS = {"gemini": GeminiProvider, "stub": StubProvider}
+
+
+# --- per-user rate limiting ---
+class RateLimiter:
+    """Token bucket per key: `limit` requests per `window` seconds, bursts up to `limit`."""
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10000):
+        self.limit = limit
+        self.rate = limit / window
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key):
+        """Take one token for `key` or raise LLMRateLimited."""
+        if self.limit <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.limit, now))
+            tokens = min(self.limit, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                raise LLMRateLimited((1 - tokens) / self.rate)
+            self._buckets[key] = (tokens - 1, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+
+# --- concurrency gate ---
+class LLMGate:
+    def __init__(self, provider: LLMProvider, max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+                 queue_timeout: float = settings.LLM_QUEUE_TIMEOUT, timeout: float = settings.LLM_TIMEOUT):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.limiter = RateLimiter(settings.LLM_RATE_LIMIT, settings.LLM_RATE_WINDOW)
+        self._slots = {}
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = {"busy": 0, "rate_limited": 0, "timeout": 0}
+
+    def _get_slots(self, loop):
+        slots = self._slots.get(loop)
+        if slots is None:
+            self._slots.clear()
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+    def check_rate(self, key):
+        try:
+            self.limiter.check(key)
+        except LLMRateLimited:
+            self.rejected["rate_limited"] += 1
+            raise
+
+    async def stream(self, prompt: str):
+        """Provider chunks, holding a concurrency slot until the reply ends."""
+        slots = self._get_slots(asyncio.get_running_loop())
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected["busy"] += 1
+            raise LLMBusy()
+        self.in_flight += 1
+        deadline = time.monotonic() + self.timeout
+        chunks = self.provider.stream(prompt)
+        # time spent waiting on the provider, not on our consumer between chunks
+        upstream_seconds, first, outcome = 0.0, True, "cancelled"
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                started = time.perf_counter()
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(remaining, 0))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self.rejected["timeout"] += 1
+                    outcome = "timeout"
+                    raise LLMTimeout()
+                except Exception:
+                    outcome = "error"
+                    raise
+                finally:
+                    upstream_seconds += time.perf_counter() - started
+                if first:
+                    llm_first_chunk.observe(upstream_seconds, self.provider.name)
+                    first = False
+                yield chunk
+            self.completed += 1
+            outcome = "ok"
+        finally:
+            record_llm(upstream_seconds, self.provider.name, outcome)
+            await chunks.aclose()
+            self.in_flight -= 1
+            slots.release()
+
+    async def generate(self, prompt: str) -> str:
+        return "".join([chunk async for chunk in self.stream(prompt)])
+
+    def stats(self):
+        return {
+            "provider": self.provider.name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": dict(self.rejected),
+        }
+
+
+_gate = None
+
+
+def get_llm_gate() -> LLMGate:
+    global _gate
+    if _gate is None:
+        _gate = LLMGate(PROVIDERS[settings.LLM_PROVIDER]())
+    return _gate
+
+
+def set_llm_provider(provider: LLMProvider) -> LLMGate:
+    """Swap the provider (e.g. a StubProvider in load tests)."""
+    global _gate
+    _gate = LLMGate(provider)
+    return _gate
@@ -1,12 +1,40 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from .db import init_db
-from app.routers import auth_router, user_router, lesson_router, session_router , chatbot_router
+from fastapi.responses import PlainTextResponse
+from .db import engine, db_metrics
+from .scoring_pool import shutdown_scoring_pool
+from .performance_model import registry as model_registry, watch_for_new_models
+from .jobs import job_queue
+from .cache import cache_stats
+from .http_cache import lesson_responses
+from .startup import check_schema, warm_up
+from .telemetry import MetricsMiddleware, gauge_lines, profiles, render_metrics
+from . import session_analytics  # noqa: F401  (registers the analytics job handler)
+from .config import settings
+from app.routers import auth_router, user_router, lesson_router, session_router , chatbot_router, parent_router, health_router
 
-app = FastAPI(title="LexiLearn API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # the schema must be right before anything is served; models warm up
+    # in the background and /ready reports when they are done
+    await check_schema()
+    app.state.warm_up = asyncio.create_task(warm_up())
+    if settings.MODEL_RELOAD_INTERVAL > 0:
+        app.state.model_watcher = asyncio.create_task(watch_for_new_models())
+    if settings.JOB_WORKERS > 0:
+        job_queue.start()
+    yield
+    for task in (app.state.warm_up, getattr(app.state, "model_watcher", None)):
+        if task:
+            task.cancel()
+    await job_queue.stop()
+    shutdown_scoring_pool()
+    await engine.dispose()
 
-# Initialize the database
-init_db()
+app = FastAPI(title="LexiLearn API", lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",  # your Vite dev server
@@ -20,7 +48,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
+# outermost, so it also times CORS handling
+app.add_middleware(MetricsMiddleware)
 
 # ✅ Register routers (no /api prefix)
 app.include_router(auth_router.router)
@@ -28,7 +59,71 @@ app.include_router(user_router.router)
 app.include_router(lesson_router.router)
 app.include_router(session_router.router)
 app.include_router(chatbot_router.router)
+app.include_router(parent_router.router)
+app.include_router(health_router.router)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text format: request, DB, scoring and LLM timings plus pool and job gauges."""
+    db = db_metrics.snapshot()
+    extra = gauge_lines("db_pool_checked_out", "Connections currently checked out.",
+                        [({}, db["pool"]["checked_out"])])
+    extra += gauge_lines("db_queries_total", "Queries executed since start.",
+                         [({}, db["queries"]["count"])], kind="counter")
+    extra += gauge_lines("jobs_processed_total", "Background jobs by result since start.",
+                         [({"result": "completed"}, job_queue.completed), ({"result": "retried"}, job_queue.retried),
+                          ({"result": "failed"}, job_queue.failed), ({"result": "purged"}, job_queue.purged)],
+                         kind="counter")
+    caches = cache_stats().values()
+    extra += gauge_lines("cache_lookups_total", "Cache lookups by namespace and result.",
+                         [({"namespace": c["namespace"], "backend": c["backend"], "result": result}, c[key])
+                          for c in caches for result, key in (("local_hit", "local_hits"),
+                                                              ("shared_hit", "shared_hits"), ("miss", "misses"))],
+                         kind="counter")
+    extra += gauge_lines("cache_entries", "Entries held in this process, by namespace.",
+                         [({"namespace": c["namespace"]}, c["size"]) for c in caches])
+    extra += gauge_lines("cache_invalidations_total", "Invalidations sent by this process or received from others.",
+                         [({"namespace": c["namespace"], "direction": direction}, c[f"invalidations_{direction}"])
+                          for c in caches for direction in ("sent", "received")], kind="counter")
+    extra += gauge_lines("cache_stale_sets_total", "Writes skipped because the namespace was invalidated meanwhile.",
+                         [({"namespace": c["namespace"]}, c["stale_sets"]) for c in caches], kind="counter")
+    extra += gauge_lines("cache_errors_total", "Shared cache operations that failed and fell back to a miss.",
+                         [({"namespace": c["namespace"]}, c["errors"]) for c in caches], kind="counter")
+    cache = lesson_responses.stats()
+    extra += gauge_lines("http_response_cache_lookups_total", "Response cache lookups by result.",
+                         [({"cache": cache["name"], "result": "hit"}, cache["hits"]),
+                          ({"cache": cache["name"], "result": "miss"}, cache["misses"])], kind="counter")
+    extra += gauge_lines("http_response_cache_not_modified_total", "304 responses sent.",
+                         [({"cache": cache["name"]}, cache["not_modified"])], kind="counter")
+    extra += gauge_lines("http_response_cache_bytes_saved_total", "Body bytes not sent, by reason.",
+                         [({"cache": cache["name"], "reason": "not_modified"}, cache["bytes_saved_not_modified"]),
+                          ({"cache": cache["name"], "reason": "compression"}, cache["bytes_saved_compression"])],
+                         kind="counter")
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/profiles/{profile_id}", response_class=PlainTextResponse)
+def request_profile(profile_id: str):
+    report = profiles.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
+
+@app.get("/metrics/db")
+def database_metrics():
+    return db_metrics.snapshot()
+
+@app.get("/metrics/caches")
+def cache_metrics():
+    return cache_stats()
+
+@app.get("/metrics/http-cache")
+def http_cache_metrics():
+    return lesson_responses.stats()
+
+@app.get("/metrics/jobs")
+async def job_metrics():
+    return await job_queue.stats()
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
+@app.get("/models/performance")
+def performance_model_info():
+    return model_registry.info()
@@ -0,0 +1,98 @@
+# backend/app/migrations.py
+"""Bring an existing database up to the current models.
+
+create_all() only creates missing tables; it never touches tables that
+already exist, so columns and indexes added to a model later would be
+skipped on old databases. upgrade() runs create_all, adds missing nullable
+columns (filling existing rows from the expression in the column's
+info["initial"], if it has one), drops NOT NULL from columns the model
+has since made optional, creates any missing index and finally the lesson
+search index, which lives outside the SQLModel metadata (see app.search).
+"""
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+from .search import ensure_search_index
+
+
+def missing_columns(conn):
+    inspector = inspect(conn)
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(column for column in table.columns if column.name not in existing)
+    return missing
+
+
+def add_column(conn, column):
+    if not column.nullable and column.server_default is None:
+        raise RuntimeError(f"cannot add NOT NULL column {column.table.name}.{column.name} without a default")
+    table = conn.dialect.identifier_preparer.format_table(column.table)
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {CreateColumn(column).compile(dialect=conn.dialect)}")
+    if "initial" in column.info:
+        name = conn.dialect.identifier_preparer.quote(column.name)
+        conn.exec_driver_sql(f"UPDATE {table} SET {name} = {column.info['initial']}")
+
+
+def relaxed_columns(conn):
+    """Columns that are NOT NULL in the database but nullable in the model."""
+    inspector = inspect(conn)
+    relaxed = []
+    for table in SQLModel.metadata.sorted_tables:
+        required = {column["name"] for column in inspector.get_columns(table.name) if not column["nullable"]}
+        relaxed.extend(column for column in table.columns
+                       if column.nullable and not column.primary_key and column.name in required)
+    return relaxed
+
+
+def drop_not_null(conn, table, columns):
+    preparer = conn.dialect.identifier_preparer
+    if conn.dialect.name != "sqlite":
+        for column in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {preparer.format_table(table)} "
+                                 f"ALTER COLUMN {preparer.quote(column.name)} DROP NOT NULL")
+        return
+    # SQLite can't alter a column: rebuild the table from the model and copy the rows over
+    inspector = inspect(conn)
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    names = ", ".join(preparer.quote(column.name) for column in table.columns if column.name in existing)
+    old = preparer.quote(f"{table.name}_old")
+    for index in inspector.get_indexes(table.name):
+        conn.exec_driver_sql(f"DROP INDEX {preparer.quote(index['name'])}")
+    # legacy mode leaves other tables' foreign keys pointing at the name, not at the _old copy
+    conn.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+    conn.exec_driver_sql(f"ALTER TABLE {preparer.format_table(table)} RENAME TO {old}")
+    conn.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+    table.create(conn)
+    conn.exec_driver_sql(f"INSERT INTO {preparer.format_table(table)} ({names}) SELECT {names} FROM {old}")
+    conn.exec_driver_sql(f"DROP TABLE {old}")
+
+
+def missing_indexes(conn):
+    inspector = inspect(conn)
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def upgrade(conn):
+    """Synchronous; run it through AsyncConnection.run_sync."""
+    SQLModel.metadata.create_all(conn)
+    created = []
+    for column in missing_columns(conn):
+        add_column(conn, column)
+        created.append(f"{column.table.name}.{column.name}")
+    relaxed = {}
+    for column in relaxed_columns(conn):
+        relaxed.setdefault(column.table, []).append(column)
+    for table, columns in relaxed.items():
+        drop_not_null(conn, table, columns)
+        created.extend(f"{table.name}.{column.name} NULL" for column in columns)
+    for index in missing_indexes(conn):
+        index.create(conn)
+        created.append(index.name)
+    created.extend(ensure_search_index(conn))
+    return created
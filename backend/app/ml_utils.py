@@ -1,27 +1,294 @@
-# backend/app/ai_utils.py
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+# backend/app/ml_utils.py
+"""TF-IDF semantic similarity between transcripts and lessons.
 
-def calculate_accuracy(spoken_text: str, expected_text: str):
+One TfidfVectorizer is fitted over the whole lesson corpus and persisted
+with the L2-normalised lesson matrix (sparse CSR). Scoring a transcript is
+then one transform plus one sparse dot product; score_many/similarity_matrix
+do the same for whole batches.
+
+    python -m app.ml_utils fit     # refit over all lessons and persist
+
+Lessons created or edited after the fit are vectorised with the fitted
+vocabulary and IDF on the fly; refit from time to time to pick up new words.
+Their rows are appended into spare capacity at the end of the CSR arrays
+(grown by doubling), so a write costs its own rows, not a copy of the
+matrix. A replaced or removed lesson leaves its old row behind; once those
+stale rows pass COMPACT_MIN_STALE and a quarter of the index, the matrix
+is rebuilt without them.
+
+scipy, scikit-learn and joblib are imported when an index is fitted or
+loaded, so importing this module (and the routers that keep the index in
+step with lesson writes) costs nothing until scoring needs it.
+"""
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from math import log, sqrt
+from pathlib import Path
+
+import numpy as np
+
+from .performance_model import MODEL_DIR, atomic_dump
+
+INDEX_PATH = MODEL_DIR / "lesson_tfidf.joblib"
+COMPACT_MIN_STALE = 1000
+
+
+def _grown(array, capacity: int, used: int):
+    grown = np.empty(capacity, dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
+
+class LessonVectorIndex:
+    def __init__(self, vectorizer, matrix, lesson_ids):
+        import scipy.sparse as sp
+
+        self.vectorizer = vectorizer
+        matrix = sp.csr_matrix(matrix)
+        matrix.sort_indices()
+        self._lock = threading.Lock()
+        self._reset(matrix, {int(lesson_id): row for row, lesson_id in enumerate(lesson_ids)})
+        # for the single-transcript path, which skips sklearn's per-call overhead
+        self._analyze = vectorizer.build_analyzer()
+        self._vocabulary = vectorizer.vocabulary_
+        self._idf = vectorizer.idf_.tolist()
+
+    @classmethod
+    def fit(cls, lessons):
+        """Fit over (lesson_id, content) pairs."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        lesson_ids, contents = [], []
+        for lesson_id, content in lessons:
+            lesson_ids.append(lesson_id)
+            contents.append(content or "")
+        vectorizer = TfidfVectorizer(sublinear_tf=True, dtype=np.float32)
+        matrix = vectorizer.fit_transform(contents)  # rows are L2-normalised
+        return cls(vectorizer, matrix, lesson_ids)
+
+    # (matrix, row_of) are swapped together, so a reader never pairs a row
+    # number with the wrong matrix; both are replaced, never mutated
+    @property
+    def matrix(self):
+        return self._view[0]
+
+    @property
+    def row_of(self):
+        return self._view[1]
+
+    def _reset(self, matrix, row_of):
+        # the CSR arrays, of which self.matrix is a view of the first rows/nnz
+        self._data, self._indices, self._indptr = matrix.data, matrix.indices, matrix.indptr
+        self._view = (matrix, row_of)
+
+    @staticmethod
+    def _live(row_of):
+        """(lesson ids, their rows), in row order; stale rows are left out."""
+        ids = sorted(row_of, key=row_of.get)
+        return ids, [row_of[i] for i in ids]
+
+    def save(self, path: Path = INDEX_PATH):
+        matrix, row_of = self._view
+        ids, rows = self._live(row_of)
+        atomic_dump({"vectorizer": self.vectorizer, "matrix": matrix[rows], "lesson_ids": ids}, path)
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH):
+        import joblib
+
+        data = joblib.load(path)
+        return cls(data["vectorizer"], data["matrix"], data["lesson_ids"])
+
+    # --- keeping lessons current between fits ---
+    def upsert(self, lesson_id: int, content: str):
+        """(Re)vectorise one lesson with the fitted vocabulary."""
+        self.upsert_many([(lesson_id, content)])
+
+    def upsert_many(self, lessons):
+        lessons = list(lessons)
+        if not lessons:
+            return
+        vectors = self.vectorizer.transform([content or "" for _, content in lessons])
+        vectors.sort_indices()
+        with self._lock:
+            start = self.matrix.shape[0]
+            matrix = self._append(vectors)
+            row_of = dict(self.row_of)
+            for offset, (lesson_id, _) in enumerate(lessons):
+                row_of[int(lesson_id)] = start + offset
+            self._view = (matrix, row_of)
+            self._compact_if_stale()
+
+    def _append(self, vectors):
+        """The current matrix plus `vectors` as rows; only the new rows are copied."""
+        import scipy.sparse as sp
+
+        matrix = self.matrix
+        (rows, columns), nnz = matrix.shape, matrix.nnz
+        new_rows, new_nnz = rows + vectors.shape[0], nnz + vectors.nnz
+        # rows past the current view are free: readers only see [:nnz] of the old arrays
+        if new_nnz > len(self._data):
+            capacity = max(new_nnz, 2 * len(self._data))
+            self._data, self._indices = _grown(self._data, capacity, nnz), _grown(self._indices, capacity, nnz)
+        if new_rows + 1 > len(self._indptr):
+            self._indptr = _grown(self._indptr, max(new_rows + 1, 2 * len(self._indptr)), rows + 1)
+        self._data[nnz:new_nnz] = vectors.data
+        self._indices[nnz:new_nnz] = vectors.indices
+        self._indptr[rows + 1:new_rows + 1] = vectors.indptr[1:] + nnz
+        grown = sp.csr_matrix((self._data[:new_nnz], self._indices[:new_nnz], self._indptr[:new_rows + 1]),
+                              shape=(new_rows, columns), copy=False)
+        grown.has_sorted_indices = True
+        return grown
+
+    def _compact_if_stale(self):
+        matrix, row_of = self._view
+        stale = matrix.shape[0] - len(row_of)
+        if stale < max(COMPACT_MIN_STALE, len(row_of) // 4):
+            return
+        ids, rows = self._live(row_of)
+        compacted = matrix[rows]
+        compacted.sort_indices()
+        self._reset(compacted, {lesson_id: row for row, lesson_id in enumerate(ids)})
+
+    def discard(self, lesson_id: int):
+        with self._lock:
+            matrix, row_of = self._view
+            row_of = dict(row_of)
+            row_of.pop(int(lesson_id), None)
+            self._view = (matrix, row_of)
+            self._compact_if_stale()
+
+    # --- scoring ---
+    @staticmethod
+    def _rows(row_of, lesson_ids):
+        try:
+            return [row_of[int(lesson_id)] for lesson_id in lesson_ids]
+        except KeyError as e:
+            raise KeyError(f"lesson {e.args[0]} is not in the index") from None
+
+    def _vectorize_one(self, text: str):
+        # the same weights as vectorizer.transform (sublinear tf * idf, L2 norm)
+        vocabulary = self._vocabulary
+        counts = Counter(vocabulary[term] for term in self._analyze(text) if term in vocabulary)
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        columns = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        idf = self._idf
+        weights = np.fromiter(((1 + log(n)) * idf[j] for j, n in counts.items()), dtype=float, count=len(counts))
+        return columns, weights / np.sqrt(weights @ weights)
+
+    def score(self, transcript: str, lesson_id: int) -> float:
+        """Cosine similarity (0-1) of a transcript to one lesson."""
+        matrix, row_of = self._view
+        row = self._rows(row_of, [lesson_id])[0]
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        row_columns, row_weights = matrix.indices[start:end], matrix.data[start:end]
+        columns, weights = self._vectorize_one(transcript)
+        if not len(columns) or not len(row_columns):
+            return 0.0
+        positions = np.searchsorted(row_columns, columns).clip(max=len(row_columns) - 1)
+        found = row_columns[positions] == columns
+        return float(weights[found] @ row_weights[positions[found]])
+
+    def score_many(self, transcripts, lesson_ids) -> np.ndarray:
+        """Similarity of transcripts[i] to lesson_ids[i], for each i."""
+        matrix, row_of = self._view
+        lessons = matrix[self._rows(row_of, lesson_ids)]
+        spoken = self.vectorizer.transform(transcripts)
+        return np.asarray(spoken.multiply(lessons).sum(axis=1)).ravel()
+
+    def similarity_matrix(self, transcripts, lesson_ids=None) -> np.ndarray:
+        """Dense (len(transcripts), len(lessons)) similarities; all lessons by default.
+
+        Without lesson_ids the columns are the indexed lessons in row order.
+        """
+        matrix, row_of = self._view
+        rows = self._live(row_of)[1] if lesson_ids is None else self._rows(row_of, lesson_ids)
+        lessons = matrix[rows]
+        spoken = self.vectorizer.transform(transcripts)
+        return (spoken @ lessons.T).toarray()
+
+    def score_text(self, transcript: str, reference: str) -> float:
+        """Similarity to text that is not (yet) an indexed lesson."""
+        spoken, expected = self.vectorizer.transform([transcript, reference])
+        return float(spoken.multiply(expected).sum())
+
+    def __len__(self):
+        return len(self.row_of)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_lesson_index():
+    """The persisted index, loaded once; None until `fit` has been run."""
+    global _index
+    if _index is None and INDEX_PATH.exists():
+        with _index_lock:
+            if _index is None:
+                _index = LessonVectorIndex.load()
+    return _index
+
+
+def set_lesson_index(index):
+    global _index
+    _index = index
+
+
+def update_lesson_vector(lesson_id: int, content: str = None):
+    """Keep an already loaded index in step with lesson writes; content=None removes."""
+    index = _index
+    if index is None:
+        return
+    if content is None:
+        index.discard(lesson_id)
+    else:
+        index.upsert(lesson_id, content)
+
+
+def update_lesson_vectors(lessons):
+    """Batch form of update_lesson_vector for (lesson_id, content) pairs."""
+    index = _index
+    if index is not None:
+        index.upsert_many(lessons)
+
+
+def _tf_cosine(a: str, b: str) -> float:
+    # no fitted corpus yet: plain term-frequency cosine, not a two-document IDF
+    ca, cb = Counter(a.lower().split()), Counter(b.lower().split())
+    dot = sum(n * cb[w] for w, n in ca.items())
+    norm = sqrt(sum(n * n for n in ca.values())) * sqrt(sum(n * n for n in cb.values()))
+    return dot / norm if norm else 0.0
+
+
+def calculate_accuracy(spoken_text: str, expected_text: str, lesson_id: int = None):
     """
     Compare user's spoken text and lesson text using cosine similarity.
     Returns accuracy %, missing words, and simple recommendations.
     """
     # --- 1. Compute text similarity ---
-    vectorizer = TfidfVectorizer().fit([spoken_text, expected_text])
-    vectors = vectorizer.transform([spoken_text, expected_text])
-    similarity = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
+    index = get_lesson_index()
+    if index is None:
+        similarity = _tf_cosine(spoken_text, expected_text)
+    elif lesson_id is not None and int(lesson_id) in index.row_of:
+        similarity = index.score(spoken_text, lesson_id)
+    else:
+        similarity = index.score_text(spoken_text, expected_text)
     accuracy = round(similarity * 100, 2)
 
     # --- 2. Identify missing words (basic diff check) ---
     spoken_words = set(spoken_text.lower().split())
     expected_words = set(expected_text.lower().split())
     missing = list(expected_words - spoken_words)
-ent reading! Keep it up! 🎉"
-    elif accuracy > 6
+
     # --- 3. Simple recommendation based on score ---
     if accuracy > 85:
-        rec = "Excell0:
+        rec = "Excellent reading! Keep it up! 🎉"
+    elif accuracy > 60:
         rec = "Good effort! Try reading a bit more slowly and clearly. 👍"
     else:
         rec = "Keep practicing. Focus on pronunciation and pacing. 💪"
@@ -31,3 +298,42 @@ ent reading! Keep it up! 🎉"
         "errors": missing[:10],  # show only first 10 missing words
         "recommendations": rec,
     }
+
+
+# --- fitting over the lesson table ---
+async def fit_from_database(chunk_size: int = 5000):
+    from sqlmodel import select
+    from .db import async_session_factory
+    from .models import Lesson
+
+    lessons = []
+    async with async_session_factory() as session:
+        statement = select(Lesson.id, Lesson.content).order_by(Lesson.id)
+        result = await session.stream(statement.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            lessons.extend(tuple(row) for row in partition)
+    return LessonVectorIndex.fit(lessons)
+
+
+async def _main(argv):
+    from .db import engine, init_db
+    if argv[:1] != ["fit"]:
+        print("usage: python -m app.ml_utils fit")
+        return 2
+    await init_db()
+    started = time.perf_counter()
+    try:
+        index = await fit_from_database()
+    except ValueError as e:  # no lessons, or no words in any of them
+        print(f"Nothing to fit: {e}")
+        return 1
+    finally:
+        await engine.dispose()
+    index.save()
+    print(f"Fitted {len(index)} lessons, {len(index.vectorizer.vocabulary_)} terms "
+          f"in {time.perf_counter() - started:.2f}s -> {INDEX_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
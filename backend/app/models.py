@@ -1,6 +1,6 @@
-from typing import Optional, Dict, Any
-from datetime import datetime
-from sqlmodel import SQLModel, Field, Column, JSON, ForeignKey
+from typing import Optional, Dict, Any, List
+from datetime import datetime, date
+from sqlmodel import SQLModel, Field, Column, JSON, ForeignKey, Index
 
 
 class User(SQLModel, table=True):
@@ -9,25 +9,103 @@ class User(SQLModel, table=True):
     hashed_password: str
     full_name: Optional[str] = None
     role: str = Field(default="student", nullable=False)
+    # legacy whole-document progress; new writes go to UserProgress
     progress: Optional[Dict[str, Any]] = Field(default_factory=dict, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class UserProgress(SQLModel, table=True):
+    """One key of a user's progress dict (maintained by app.progress)."""
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    key: str = Field(primary_key=True)
+    value: Optional[Any] = Field(default=None, sa_type=JSON)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 class Lesson(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     content: str
-    reading_level: str = Field(default="basic")
-    creator_id: Optional[int] = Field(default=None, foreign_key="user.id")
+    reading_level: str = Field(default="basic", index=True)
+    creator_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = None
 
 
 class ReadingSession(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_readingsession_user_id_created_at", "user_id", "created_at"),
+        Index("ix_readingsession_lesson_id_created_at", "lesson_id", "created_at"),
+        Index("ix_readingsession_user_id_id", "user_id", "id"),  # a user's sessions, keyset-paginated
+        Index("ix_readingsession_created_at", "created_at"),  # exports and backfill, oldest first
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", nullable=False)
     lesson_id: int = Field(foreign_key="lesson.id", nullable=False)
     spoken_text: str
-    wpm: int
+    wpm: Optional[int] = None  # NULL when the client sent no timing
     accuracy: float
     errors: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
     recommendations: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # fluency (app.fluency); NULL when the client sent no timing
+    duration_ms: Optional[int] = None
+    wcpm: Optional[int] = None
+    pauses_short: Optional[int] = None
+    pauses_medium: Optional[int] = None
+    pauses_long: Optional[int] = None
+    pause_ms: Optional[int] = None
+    hesitations: Optional[List[Dict[str, Any]]] = Field(default=None, sa_type=JSON)
+
+
+class Job(SQLModel, table=True):
+    """Outbox row for app.jobs; inserted in the same transaction as the data it refers to."""
+    __table_args__ = (
+        Index("ix_job_status_run_at", "status", "run_at"),  # claiming due jobs
+        Index("ix_job_status_started_at", "status", "started_at"),  # expired leases, purging done jobs
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    idempotency_key: str = Field(unique=True, nullable=False)
+    payload: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    status: str = Field(default="pending", nullable=False)  # pending | running | done | failed
+    attempts: int = 0
+    last_error: Optional[str] = None
+    run_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ParentStudentLink(SQLModel, table=True):
+    parent_id: int = Field(foreign_key="user.id", primary_key=True)
+    student_id: int = Field(foreign_key="user.id", primary_key=True)
+
+
+# --- progress aggregates (maintained by app.aggregates) ---
+class ProgressStats(SQLModel):
+    session_count: int = 0
+    accuracy_sum: float = 0.0
+    # sessions with a measured WPM; rows from before untimed sessions were allowed start at session_count
+    wpm_count: int = Field(default=0, sa_column_kwargs={"server_default": "0", "info": {"initial": "session_count"}})
+    wpm_sum: float = 0.0
+    accuracy_min: Optional[float] = None
+    accuracy_max: Optional[float] = None
+    wpm_min: Optional[int] = None
+    wpm_max: Optional[int] = None
+    last_session_at: Optional[datetime] = None
+
+
+class StudentProgressSummary(ProgressStats, table=True):
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    recent: List[Dict[str, Any]] = Field(default_factory=list, sa_type=JSON)
+
+
+class LessonProgressSummary(ProgressStats, table=True):
+    lesson_id: int = Field(foreign_key="lesson.id", primary_key=True)
+    recent: List[Dict[str, Any]] = Field(default_factory=list, sa_type=JSON)
+
+
+class DailyProgress(ProgressStats, table=True):
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
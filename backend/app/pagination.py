@@ -0,0 +1,99 @@
+# backend/app/pagination.py
+"""Keyset pagination, column projection and NDJSON/CSV streaming for list routes."""
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+
+from .db import async_session_factory
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def parse_fields(model, fields, default):
+    """Turn `?fields=a,b` into column objects; the primary key is always included."""
+    names = default if not fields else [f.strip() for f in fields.split(",") if f.strip()]
+    columns = model.__table__.columns
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names = ["id"] + names
+    return [getattr(model, name) for name in names]
+
+
+def keyset_statement(model, columns, filters=(), cursor=None, limit=None):
+    statement = select(*columns).where(*filters).order_by(model.id)
+    if cursor is not None:
+        statement = statement.where(model.id > cursor)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
+
+async def fetch_page(session, model, columns, filters=(), cursor=None, limit=None):
+    """One page of rows as dicts plus the cursor for the next page (None at the end)."""
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    statement = keyset_statement(model, columns, filters, cursor, limit + 1)
+    rows = [dict(row._mapping) for row in (await session.exec(statement)).all()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["id"]
+    return rows, next_cursor
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+async def stream_rows(statement, format: str = "ndjson", chunk_size: int = 500):
+    """Yield `statement`'s rows as NDJSON or CSV text, one chunk per fetched partition.
+
+    Opens its own session: the request-scoped one is closed once the
+    endpoint returns, before the body has been streamed.
+    """
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.name for column in statement.selected_columns])
+        yield buffer.getvalue()
+    async with async_session_factory() as session:
+        result = await session.stream(statement.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            if format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_csv_value(value) for value in row] for row in partition)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(dict(row._mapping), default=_json_default) + "\n" for row in partition)
+
+
+def ndjson_response(statement, chunk_size: int = 500) -> StreamingResponse:
+    """Stream rows as newline-delimited JSON while they are fetched."""
+    return StreamingResponse(stream_rows(statement, "ndjson", chunk_size), media_type="application/x-ndjson")
+
+
+def export_response(statement, format: str, filename: str) -> StreamingResponse:
+    """Stream every row as an NDJSON or CSV download."""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(stream_rows(statement, format), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'})
@@ -1,34 +1,271 @@
 # backend/app/performance_model.py
-import numpy as np
-from sklearn.linear_model import LogisticRegression
-import joblib
+"""The reading performance classifier: training, a versioned registry and predictions.
+
+joblib and scikit-learn are imported where artifacts are loaded or trained,
+not at module import, so importing the API stays cheap; main's startup
+warm-up loads the model once before the process reports ready.
+"""
+import asyncio
+import logging
 import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Artifacts resolve against this package, not the process's working directory.
+BUNDLED_MODEL_PATH = Path(__file__).resolve().parent / "performance_model.pkl"
+MODEL_DIR = Path(settings.PERFORMANCE_MODEL_DIR or BUNDLED_MODEL_PATH.parent / "model_artifacts")
+ARTIFACT_PREFIX = "performance-"
+ARTIFACT_SUFFIX = ".joblib"
+
+# Labels: 2=Good, 1=Average, 0=Needs Practice
+LEVELS = {0: "Needs Practice 💪", 1: "Average 👍", 2: "Good Performance 🌟"}
+# Features: [WPM, Difficulty (1=Easy, 2=Medium, 3=Hard)]
+DIFFICULTY = {"basic": 1, "intermediate": 2, "advanced": 3}
+N_FEATURES = 2
+
+
+def difficulty_for(reading_level: str) -> int:
+    return DIFFICULTY.get(reading_level, 1)
+
 
 # --- train once (dummy data for mini project) ---
-def train_performance_model():
-    # Features: [WPM, Difficulty (1=Easy, 2=Medium, 3=Hard)]
+def train_performance_model(path: Path = BUNDLED_MODEL_PATH):
+    from sklearn.linear_model import LogisticRegression
+
     X = np.array([
         [80, 1], [90, 1], [100, 2],
         [60, 2], [45, 3], [30, 3],
         [110, 2], [75, 2], [50, 3]
     ])
-    # Labels: 2=Good, 1=Average, 0=Needs Practice
     y = np.array([2, 2, 2, 1, 0, 0, 2, 1, 0])
 
     model = LogisticRegression(max_iter=200)
     model.fit(X, y)
-    joblib.dump(model, "performance_model.pkl")
+    atomic_dump(model, path)
     print("✅ Model trained and saved!")
+    return model
+
+
+def atomic_dump(model, path: Path):
+    import joblib
+
+    # write next to the target and rename, so readers never see half a file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(model, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# --- registry ---
+class InvalidModel(Exception):
+    pass
+
+
+# coef/intercept/classes are set for linear models; `rows` and `labels` are
+# the same weights as plain Python lists for the single-prediction path.
+LoadedModel = namedtuple("LoadedModel", "model version path mtime loaded_at coef intercept classes rows labels")
+
+
+def artifact_path(version: str) -> Path:
+    return MODEL_DIR / f"{ARTIFACT_PREFIX}{version}{ARTIFACT_SUFFIX}"
+
+
+def new_version() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def latest_artifact() -> Path:
+    """Newest published version (versions sort by name), else the bundled model."""
+    if MODEL_DIR.is_dir():
+        versions = sorted(MODEL_DIR.glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}"))
+        if versions:
+            return versions[-1]
+    return BUNDLED_MODEL_PATH
+
+
+def _version_of(path: Path) -> str:
+    name = path.name
+    if name.startswith(ARTIFACT_PREFIX) and name.endswith(ARTIFACT_SUFFIX):
+        return name[len(ARTIFACT_PREFIX):-len(ARTIFACT_SUFFIX)]
+    return "bundled"
+
+
+def validate_model(model):
+    """Reject artifacts that could not serve predict_performance."""
+    if not hasattr(model, "predict"):
+        raise InvalidModel(f"{type(model).__name__} has no predict()")
+    if getattr(model, "n_features_in_", N_FEATURES) != N_FEATURES:
+        raise InvalidModel(f"expects {model.n_features_in_} features, not {N_FEATURES}")
+    unknown = set(np.asarray(getattr(model, "classes_", [])).tolist()) - set(LEVELS)
+    if unknown:
+        raise InvalidModel(f"unknown classes {sorted(unknown)}")
+    probe = np.array([[30.0, 3.0], [80.0, 2.0], [120.0, 1.0]])
+    predictions = model.predict(probe)
+    if len(predictions) != len(probe) or not set(np.asarray(predictions).tolist()) <= set(LEVELS):
+        raise InvalidModel("probe predictions are not performance levels")
+
+
+class ModelRegistry:
+    """Holds the current performance model in memory.
+
+    Readers take `self._current` once per call; swaps replace the whole
+    LoadedModel in one assignment, so a prediction never sees a mix of old
+    and new weights.
+
+    The first model is loaded once, under the lock, by whoever asks first
+    (startup's warm-up, normally). Code on the event loop awaits
+    current_async(), which waits for that load in a worker thread; current()
+    refuses to unpickle on the loop.
+    """
+
+    def __init__(self):
+        self._current = None
+        self._lock = threading.Lock()
+
+    def load(self, path: Path = None) -> LoadedModel:
+        """Load, validate and swap in `path` (default: latest artifact)."""
+        with self._lock:
+            return self._load(path)
+
+    def _load(self, path: Path = None) -> LoadedModel:
+        """load() without the lock; the caller holds it."""
+        import joblib
+
+        path = Path(path) if path else latest_artifact()
+        if not path.exists() and path == BUNDLED_MODEL_PATH:
+            train_performance_model(path)
+        mtime = path.stat().st_mtime
+        model = joblib.load(path)
+        validate_model(model)
+        coef = getattr(model, "coef_", None)
+        intercept = getattr(model, "intercept_", None)
+        classes = np.asarray(model.classes_)
+        rows = None
+        if coef is not None and intercept is not None:
+            coef, intercept = np.asarray(coef, dtype=float), np.asarray(intercept, dtype=float)
+            rows = [(w, d, b) for (w, d), b in zip(coef.tolist(), intercept.tolist())]
+        else:
+            coef = intercept = None
+        loaded = LoadedModel(model, _version_of(path), path, mtime, time.time(),
+                             coef, intercept, classes, rows, [int(c) for c in classes.tolist()])
+        self._current = loaded
+        logger.info("performance model %s loaded from %s", loaded.version, path)
+        return loaded
+
+    def current(self) -> LoadedModel:
+        """The current model, loading the first one if nothing has yet (not on the event loop)."""
+        loaded = self._current
+        if loaded is None:
+            if _on_event_loop():
+                raise RuntimeError("performance model not loaded yet; await registry.current_async() first")
+            with self._lock:
+                loaded = self._current
+                if loaded is None:  # not loaded by whoever held the lock before us
+                    loaded = self._load()
+        return loaded
+
+    async def current_async(self) -> LoadedModel:
+        """current() for the event loop: a first load (or waiting for one) happens in a worker thread."""
+        loaded = self._current
+        if loaded is None:
+            loaded = await asyncio.to_thread(self.current)
+        return loaded
+
+    def refresh(self) -> bool:
+        """Swap in a newer artifact if one was published; keep the old model if it is invalid."""
+        path = latest_artifact()
+        loaded = self._current
+        try:
+            if loaded and loaded.path == path and path.stat().st_mtime == loaded.mtime:
+                return False
+            self.load(path)
+            return True
+        except Exception:
+            logger.exception("not swapping in performance model %s", path)
+            return False
+
+    def publish(self, model, version: str = None) -> LoadedModel:
+        """Validate, write a new versioned artifact and make it current."""
+        validate_model(model)
+        path = artifact_path(version or new_version())
+        atomic_dump(model, path)
+        return self.load(path)
+
+    def info(self):
+        loaded = self._current
+        if loaded is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": loaded.version,
+            "path": str(loaded.path),
+            "estimator": type(loaded.model).__name__,
+            "loaded_at": loaded.loaded_at,
+        }
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+registry = ModelRegistry()
+
+
+async def watch_for_new_models(interval: float = settings.MODEL_RELOAD_INTERVAL):
+    """Background task: poll for newly published artifacts."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(registry.refresh)
 
 
 # --- make prediction ---
+def _predict_labels(loaded: LoadedModel, X: np.ndarray) -> np.ndarray:
+    if loaded.coef is None:
+        return np.asarray(loaded.model.predict(X))
+    # linear models: the decision function directly, without sklearn's
+    # per-call input validation
+    scores = X @ loaded.coef.T + loaded.intercept
+    if scores.shape[1] == 1:
+        return loaded.classes[(scores[:, 0] > 0).astype(int)]
+    return loaded.classes[scores.argmax(axis=1)]
+
+
 def predict_performance(wpm: float, difficulty: int):
-    # train if not exists
-    if not os.path.exists("performance_model.pkl"):
-        train_performance_model()
+    loaded = registry.current()
+    if loaded.rows is None:
+        pred = int(loaded.model.predict([[wpm, difficulty]])[0])
+    else:
+        scores = [w * wpm + d * difficulty + b for w, d, b in loaded.rows]
+        if len(scores) == 1:
+            pred = loaded.labels[scores[0] > 0]
+        else:
+            pred = loaded.labels[max(range(len(scores)), key=scores.__getitem__)]
+    return {"performance_level": LEVELS[pred]}
 
-    model = joblib.load("performance_model.pkl")
-    pred = model.predict([[wpm, difficulty]])[0]
 
-    levels = {0: "Needs Practice 💪", 1: "Average 👍", 2: "Good Performance 🌟"}
-    return {"performance_level": levels[pred]}
+def predict_many(wpm, difficulty):
+    """Levels for whole arrays of (wpm, difficulty) in one vectorized call."""
+    X = np.column_stack([np.asarray(wpm, dtype=float), np.asarray(difficulty, dtype=float)])
+    if not len(X):
+        return []
+    labels = _predict_labels(registry.current(), X)
+    return [{"performance_level": LEVELS[int(label)]} for label in labels]
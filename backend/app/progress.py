@@ -0,0 +1,94 @@
+# backend/app/progress.py
+"""Per-key user progress.
+
+Progress is stored as one UserProgress row per (user, key). An update
+upserts just the keys it carries, so concurrent writers (browser tabs, the
+session analytics job) never rewrite each other's keys and the cost of an
+update does not grow with the size of the document. load_progress()
+assembles the dict for UserOut from a single primary-key range scan.
+
+User.progress is the old whole-document column. It is still read, under
+the rows, until `python -m app.progress backfill` has moved it into rows.
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import null, update
+from sqlmodel import select
+
+from .db import async_session_factory, dialect_insert
+from .models import User, UserProgress
+from .schemas import UserOut
+
+
+async def merge_progress(session, user_id: int, patch: dict):
+    """Upsert the keys of `patch` in the caller's transaction."""
+    if not patch:
+        return
+    now = datetime.utcnow()
+    rows = [{"user_id": user_id, "key": str(key), "value": value, "updated_at": now} for key, value in patch.items()]
+    statement = dialect_insert(UserProgress.__table__).values(rows)
+    await session.exec(statement.on_conflict_do_update(
+        index_elements=["user_id", "key"],
+        set_={"value": statement.excluded.value, "updated_at": statement.excluded.updated_at},
+    ))
+
+
+async def load_progress(session, user_id: int, legacy: dict = None) -> dict:
+    """The progress dict: legacy User.progress keys overlaid by the per-key rows."""
+    rows = (await session.exec(
+        select(UserProgress.key, UserProgress.value).where(UserProgress.user_id == user_id)
+    )).all()
+    progress = dict(legacy or {})
+    progress.update(rows)
+    return progress
+
+
+async def user_out(session, user: User) -> UserOut:
+    return UserOut(id=user.id, email=user.email, full_name=user.full_name, role=user.role,
+                   progress=await load_progress(session, user.id, user.progress))
+
+
+# --- moving the legacy column into rows ---
+async def backfill(chunk_size: int = 1000):
+    moved = 0
+    async with async_session_factory() as session:
+        while True:
+            users = (await session.exec(
+                select(User.id, User.progress).where(User.progress.is_not(None)).limit(chunk_size)
+            )).all()
+            users = [(user_id, progress) for user_id, progress in users]
+            if not users:
+                break
+            for user_id, progress in users:
+                # rows written since take precedence over the legacy values
+                existing = set((await session.exec(
+                    select(UserProgress.key).where(UserProgress.user_id == user_id)
+                )).all())
+                await merge_progress(session, user_id,
+                                     {k: v for k, v in (progress or {}).items() if str(k) not in existing})
+                await session.exec(update(User).where(User.id == user_id).values(progress=null()))
+                moved += 1
+            await session.commit()
+    return moved
+
+
+async def _main(argv):
+    from .db import engine, init_db
+    if argv[:1] != ["backfill"]:
+        print("usage: python -m app.progress backfill")
+        return 2
+    await init_db()
+    started = time.perf_counter()
+    try:
+        moved = await backfill()
+    finally:
+        await engine.dispose()
+    print(f"Moved progress of {moved} users in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
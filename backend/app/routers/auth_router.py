@@ -8,24 +8,32 @@ from sqlalchemy.exc import IntegrityError
 from ..schemas import UserCreate, Token, UserOut
 from ..models import User
 from ..db import get_session
-from ..auth import get_password_hash, verify_password, create_access_token, decode_token
+from ..auth import hash_password, verify_and_update_password, create_access_token, PasswordHasherBusy
 from ..config import settings
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, get_user_snapshot
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+def hasher_busy():
+    return HTTPException(status_code=503, detail="Too many sign-ins right now, please retry",
+                         headers={"Retry-After": "1"})
+
 @router.post("/signup", response_model=UserOut)
-def signup(user_in: UserCreate, session=Depends(get_session)):
-    user = User(email=user_in.email, hashed_password=get_password_hash(user_in.password),
+async def signup(user_in: UserCreate, session=Depends(get_session)):
+    try:
+        hashed_password = await hash_password(user_in.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    user = User(email=user_in.email, hashed_password=hashed_password,
                 full_name=user_in.full_name, role=user_in.role, progress={})
     session.add(user)
     try:
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
     except IntegrityError:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Email already registered")
     return user
 
@@ -33,23 +41,24 @@ def signup(user_in: UserCreate, session=Depends(get_session)):
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session=Depends(get_session)):
     # OAuth2PasswordRequestForm uses fields: username, password
     statement = select(User).where(User.email == form_data.username)
-    user = session.exec(statement).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = (await session.exec(statement)).first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    try:
+        valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
     access_token = create_access_token(subject=str(user.id), role=user.role,
                                        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserOut)
-async def get_me(token: str = Depends(oauth2_scheme), session=Depends(get_session)):
-    payload = decode_token(token)
-    user_id = payload.get("sub")
-
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    user = session.get(User, int(user_id))
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    return user
\ No newline at end of file
+async def get_me(snapshot: UserOut = Depends(get_user_snapshot)):
+    return snapshot
\ No newline at end of file
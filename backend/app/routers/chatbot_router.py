@@ -1,30 +1,96 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
+import json
+import math
+from typing import Optional
 
-# Load environment variables from .env
-load_dotenv()
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
-# Configure the Gemini API key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+from app.chat_cache import chat_cache
+from app.dependencies import decode_cached_token
+from app.llm import get_llm_gate, LLMBusy, LLMRateLimited, LLMTimeout
 
 # Create the FastAPI router
 router = APIRouter(prefix="/chatbot", tags=["Chatbot"])
 
-# Initialize the Gemini model once
-model = genai.GenerativeModel("gemini-2.5-flash")
-
 # Define the request body
 class ChatRequest(BaseModel):
     message: str
+    context: Optional[str] = None  # earlier turns, "role: text" per line
+
+    def prompt(self) -> str:
+        return f"{self.context}\nuser: {self.message}" if self.context else self.message
+
+
+def client_key(request: Request):
+    """Rate-limit signed-in users by id, everyone else by address."""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        try:
+            return "user:" + decode_cached_token(auth[7:]).sub
+        except HTTPException:
+            pass
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+def check_rate(request: Request):
+    try:
+        get_llm_gate().check_rate(client_key(request))
+    except LLMRateLimited as e:
+        raise HTTPException(status_code=429, detail="Too many chatbot messages, slow down",
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+def sse(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
 
 # Define the route
 @router.post("/")
-async def chatbot_route(request: ChatRequest):
+async def chatbot_route(request: ChatRequest, http_request: Request):
+    check_rate(http_request)
     try:
-        response = model.generate_content(request.message)
-        return {"reply": response.text}
+        reply = await chat_cache.generate(request.message, lambda: get_llm_gate().stream(request.prompt()),
+                                          request.context)
+    except LLMBusy:
+        raise HTTPException(status_code=503, detail="Chatbot is busy, please retry", headers={"Retry-After": "1"})
+    except LLMTimeout:
+        raise HTTPException(status_code=504, detail="Chatbot took too long to answer")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {"reply": reply}
+
+
+# ---------- STREAMING (server-sent events) ----------
+@router.post("/stream")
+async def chatbot_stream(request: ChatRequest, http_request: Request):
+    """Partial replies as `data: {"delta": ...}` events, then `event: done`.
+
+    Failures after the stream has started arrive as `event: error`.
+    """
+    check_rate(http_request)
+
+    async def events():
+        try:
+            upstream = lambda: get_llm_gate().stream(request.prompt())
+            async for chunk in chat_cache.stream(request.message, upstream, request.context):
+                yield sse({"delta": chunk})
+        except LLMBusy:
+            yield sse({"status": 503, "detail": "Chatbot is busy, please retry"}, event="error")
+            return
+        except LLMTimeout:
+            yield sse({"status": 504, "detail": "Chatbot took too long to answer"}, event="error")
+            return
+        except Exception as e:
+            yield sse({"status": 500, "detail": str(e)}, event="error")
+            return
+        yield sse({}, event="done")
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/stats")
+def chatbot_stats():
+    return {**get_llm_gate().stats(), "cache": chat_cache.stats()}
@@ -1,7 +1,19 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.startup import readiness
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
     return {"status": "ok", "message": "LexiLearn backend is up and running 🚀"}
+
+@router.get("/ready")
+async def readiness_check():
+    """200 once the schema is checked and the models are warm, 503 until then.
+
+    Point load balancer readiness probes here and liveness probes at /health.
+    """
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
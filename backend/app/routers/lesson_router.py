@@ -67,55 +67,175 @@
 
 
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select
+import io
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, File, Form, Query, Request, UploadFile
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.db import get_session
-from app.models import Lesson
+from app.dependencies import require_teacher
+from app.models import Lesson, LessonProgressSummary
+from app.aggregates import summary_out
+from app.bulk import detect_format, import_lessons, iter_records, lesson_export_statement
+from app.pagination import parse_fields, fetch_page, keyset_statement, ndjson_response, export_response, MAX_PAGE_SIZE
+from app.schemas import LessonCreate, LessonUpdate
+from app.search import query_terms, search_lessons
+from app.http_cache import lesson_responses
+from app.ai_utils import compile_lesson_reference, invalidate_lesson_reference
+from app.ml_utils import update_lesson_vector
 
 router = APIRouter(prefix="/lessons", tags=["Lessons"])
 
 # ---------- CREATE LESSON ----------
 @router.post("/", status_code=201)
-def create_lesson(data: dict, session: Session = Depends(get_session)):
-    lesson = Lesson(**data)
+async def create_lesson(data: LessonCreate, session: AsyncSession = Depends(get_session)):
+    lesson = Lesson(**data.model_dump())
     session.add(lesson)
-    session.commit()
-    session.refresh(lesson)
+    await session.commit()
+    await session.refresh(lesson)
+    lesson_responses.invalidate()
+    compile_lesson_reference(lesson.id, lesson.content)
+    update_lesson_vector(lesson.id, lesson.content)
     return {"id": lesson.id, "message": "Lesson created successfully"}
 
 # ---------- GET ALL LESSONS ----------
 @router.get("/")
-def get_lessons(session: Session = Depends(get_session)):
-    lessons = session.exec(select(Lesson)).all()
-    return {"lessons": lessons}
+async def get_lessons(
+    request: Request,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    reading_level: Optional[str] = None,
+    creator_id: Optional[int] = None,
+    format: Literal["json", "ndjson"] = "json",
+    session: AsyncSession = Depends(get_session),
+):
+    """Keyset-paginated lessons; `fields=id,title,reading_level` skips the content column.
+
+    JSON pages are served from the response cache with an ETag.
+    """
+    columns = parse_fields(Lesson, fields, default=list(Lesson.__table__.columns.keys()))
+    filters = lesson_filters(reading_level, creator_id)
+    if format == "ndjson":
+        return ndjson_response(keyset_statement(Lesson, columns, filters, cursor, limit))
+
+    async def build():
+        lessons, next_cursor = await fetch_page(session, Lesson, columns, filters, cursor, limit)
+        modified = [last_modified(lesson) for lesson in lessons]
+        return {"lessons": lessons, "next_cursor": next_cursor}, max(filter(None, modified), default=None)
+
+    # a page's Last-Modified can't see deletions, so only its ETag is used for 304s
+    return await lesson_responses.respond(request, build)
+
+def lesson_filters(reading_level: Optional[str] = None, creator_id: Optional[int] = None):
+    filters = []
+    if reading_level is not None:
+        filters.append(Lesson.reading_level == reading_level)
+    if creator_id is not None:
+        filters.append(Lesson.creator_id == creator_id)
+    return filters
+
+def last_modified(lesson) -> Optional[datetime]:
+    """updated_at, else created_at, from a Lesson or a projected row dict."""
+    if isinstance(lesson, dict):
+        return lesson.get("updated_at") or lesson.get("created_at")
+    return lesson.updated_at or lesson.created_at
+
+# ---------- SEARCH LESSONS ----------
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    reading_level: Optional[str] = None,
+    creator_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    """Lessons matching every word of `q` in title or content, best match first.
+
+    Only the newest MAX_RANKED matches (app.search) are ranked and paged
+    through; `approximate` is true when more lessons than that matched, so
+    an older, better match may be missing.
+    """
+    if not query_terms(q):
+        raise HTTPException(status_code=400, detail="Search needs at least one word")
+    lessons, next_offset, approximate = await search_lessons(session, q, reading_level, creator_id, limit, offset)
+    return {"lessons": lessons, "next_offset": next_offset, "approximate": approximate}
+
+# ---------- BULK IMPORT ----------
+@router.post("/import")
+async def import_lesson_file(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = Form(None),
+    dry_run: bool = Form(False),
+    teacher=Depends(require_teacher),
+):
+    """Import an NDJSON or CSV file of lessons as the calling teacher.
+
+    Valid records are imported, invalid ones skipped and listed by line.
+    """
+    format = format or detect_format(file.filename, file.content_type)
+    if format is None:
+        raise HTTPException(status_code=400, detail="Upload a .ndjson or .csv file, or pass format")
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    return await import_lessons(iter_records(lines, format), creator_id=teacher.id, dry_run=dry_run)
+
+# ---------- EXPORT LESSONS ----------
+@router.get("/export")
+async def export_lessons(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    reading_level: Optional[str] = None,
+    creator_id: Optional[int] = None,
+):
+    """Every matching lesson, streamed as a download in the import format."""
+    statement = lesson_export_statement(lesson_filters(reading_level, creator_id))
+    return export_response(statement, format, "lessons")
 
 # ---------- GET LESSON BY ID ----------
 @router.get("/{lesson_id}")
-def get_lesson(lesson_id: int, session: Session = Depends(get_session)):
-    lesson = session.get(Lesson, lesson_id)
-    if not lesson:
-        raise HTTPException(status_code=404, detail="Lesson not found")
-    return {"lesson": lesson}
+async def get_lesson(lesson_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    async def build():
+        lesson = await session.get(Lesson, lesson_id)
+        if not lesson:
+            raise HTTPException(status_code=404, detail="Lesson not found")
+        return {"lesson": lesson}, last_modified(lesson)
+
+    return await lesson_responses.respond(request, build, trust_modified=True)
+
+# ---------- LESSON STATS ----------
+@router.get("/{lesson_id}/stats")
+async def get_lesson_stats(lesson_id: int, session: AsyncSession = Depends(get_session)):
+    summary = await session.get(LessonProgressSummary, lesson_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="No sessions for this lesson")
+    return {**summary_out(summary), "recent": summary.recent}
 
 # ---------- UPDATE LESSON ----------
 @router.put("/{lesson_id}")
-def update_lesson(lesson_id: int, data: dict, session: Session = Depends(get_session)):
-    lesson = session.get(Lesson, lesson_id)
+async def update_lesson(lesson_id: int, data: LessonUpdate, session: AsyncSession = Depends(get_session)):
+    lesson = await session.get(Lesson, lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    for key, value in data.items():
+    for key, value in data.model_dump(exclude_unset=True).items():
         setattr(lesson, key, value)
+    lesson.updated_at = datetime.utcnow()
     session.add(lesson)
-    session.commit()
-    session.refresh(lesson)
+    await session.commit()
+    await session.refresh(lesson)
+    lesson_responses.invalidate()
+    compile_lesson_reference(lesson.id, lesson.content)
+    update_lesson_vector(lesson.id, lesson.content)
     return {"message": "Lesson updated successfully"}
 
 # ---------- DELETE LESSON ----------
 @router.delete("/{lesson_id}")
-def delete_lesson(lesson_id: int, session: Session = Depends(get_session)):
-    lesson = session.get(Lesson, lesson_id)
+async def delete_lesson(lesson_id: int, session: AsyncSession = Depends(get_session)):
+    lesson = await session.get(Lesson, lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    session.delete(lesson)
-    session.commit()
+    await session.delete(lesson)
+    await session.commit()
+    lesson_responses.invalidate()
+    invalidate_lesson_reference(lesson_id)
+    update_lesson_vector(lesson_id)
     return {"message": "Lesson deleted successfully"}
@@ -1,28 +1,44 @@
-from fastapi import APIRouter, HTTPException
-from app.db import database
-from sqlalchemy import select
-from app import models
+from fastapi import APIRouter, HTTPException, Depends, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db import get_session
+from app.dependencies import get_current_principal
+from app.models import User, ParentStudentLink, StudentProgressSummary
+from app.aggregates import summary_out, get_daily_history
+from app.schemas import Principal
 
-router = APIRouter(prefix="/api/parents", tags=["Parents"])
+router = APIRouter(prefix="/parents", tags=["Parents"])
+
+def forbidden():
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to view this student")
 
 @router.get("/{parent_id}/students")
-async def get_linked_students(parent_id: int):
-    query = (
-        select(models.users.c.id, models.users.c.email, models.users.c.name)
-        .select_from(
-            models.users.join(models.parent_students, models.users.c.id == models.parent_students.c.student_id)
-        )
-        .where(models.parent_students.c.parent_id == parent_id)
+async def get_linked_students(parent_id: int, session: AsyncSession = Depends(get_session),
+                              principal: Principal = Depends(get_current_principal)):
+    """A parent's linked students; for that parent and for teachers."""
+    if principal.id != parent_id and principal.role != "teacher":
+        raise forbidden()
+    statement = (
+        select(User.id, User.email, User.full_name)
+        .join(ParentStudentLink, User.id == ParentStudentLink.student_id)
+        .where(ParentStudentLink.parent_id == parent_id)
     )
-    students = await database.fetch_all(query)
+    rows = (await session.exec(statement)).all()
+    students = [{"id": id, "email": email, "name": full_name} for id, email, full_name in rows]
     return {"students": students}
 
 @router.get("/{student_id}/progress")
-async def get_student_progress(student_id: int):
-    query = select(models.reading_sessions).where(models.reading_sessions.c.user_id == student_id)
-    sessions = await database.fetch_all(query)
-    if not sessions:
+async def get_student_progress(student_id: int, session: AsyncSession = Depends(get_session),
+                               principal: Principal = Depends(get_current_principal)):
+    """A student's progress; for the student, a linked parent and teachers."""
+    if principal.id != student_id and principal.role != "teacher":
+        if await session.get(ParentStudentLink, (principal.id, student_id)) is None:
+            raise forbidden()
+    summary = await session.get(StudentProgressSummary, student_id)
+    if not summary or not summary.session_count:
         raise HTTPException(status_code=404, detail="No progress found")
-    avg_accuracy = sum(s["accuracy"] for s in sessions) / len(sessions)
-    avg_wpm = sum(s["wpm"] for s in sessions) / len(sessions)
-    return {"sessions": sessions, "avg_accuracy": avg_accuracy, "avg_wpm": avg_wpm}
+    return {
+        **summary_out(summary),
+        "sessions": summary.recent,
+        "history": await get_daily_history(session, student_id),
+    }
@@ -67,30 +67,61 @@
 
 
 
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select
+import asyncio
+import time
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, WebSocket, WebSocketDisconnect
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime
-from app.db import get_session
+from app.db import get_session, async_session_factory
 from app.models import ReadingSession, Lesson
-from app.ai_utils import calculate_accuracy
+from pydantic import ValidationError
+from app.ai_utils import calculate_accuracy, get_lesson_reference, LiveAlignment, MATCH
+from app.config import settings
+from app.fluency import session_fluency
+from app.schemas import BatchSessionRequest, LiveMessage, SessionTiming, TimedChunk
+from app.scoring_pool import score_batch
+from app.jobs import job_queue
+from app.session_analytics import enqueue_session_analytics
+from app.telemetry import timed_scoring
+from app.pagination import parse_fields, fetch_page, keyset_statement, ndjson_response, export_response
+from app.bulk import session_export_statement
+from app.dependencies import get_user_snapshot, require_teacher
 
 
 router = APIRouter(prefix="/sessions", tags=["Reading Sessions"])
 
+def fluency_fields(timing, spoken_text: str, analysis: dict):
+    """(wpm, fluency columns, fluency metrics) for a scored transcript."""
+    fluency = session_fluency(timing, spoken_text, analysis["counts"].get(MATCH, 0))
+    if fluency is None:
+        # untimed (older clients): no WPM rather than a guess, which would skew predictions and averages
+        return None, {}, None
+    columns = {key: value for key, value in fluency.items() if key != "wpm"}
+    return fluency["wpm"], columns, fluency
+
 # ---------- START READING SESSION ----------
 @router.post("/", status_code=201)
-def start_reading_session(data: dict, session: Session = Depends(get_session)):
+async def start_reading_session(data: dict, session: AsyncSession = Depends(get_session)):
     required_fields = ["user_id", "lesson_id", "spoken_text"]
     if not all(field in data for field in required_fields):
         raise HTTPException(status_code=400, detail="Missing required fields")
 
-    lesson = session.get(Lesson, data["lesson_id"])
+    try:
+        timing = SessionTiming.model_validate(data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    lesson = await session.get(Lesson, data["lesson_id"])
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
 
     # AI similarity scoring
-    analysis = calculate_accuracy(data["spoken_text"], lesson.content)
-    wpm = len(data["spoken_text"].split()) // 2  # rough estimate
+    reference = get_lesson_reference(lesson.id, lesson.content)
+    with timed_scoring("inline"):
+        analysis = calculate_accuracy(data["spoken_text"], reference)
+    wpm, fluency_columns, fluency = fluency_fields(timing, data["spoken_text"], analysis)
 
     reading_session = ReadingSession(
         user_id=data["user_id"],
@@ -101,10 +132,14 @@ def start_reading_session(data: dict, session: Session = Depends(get_session)):
         errors=analysis["errors"],
         recommendations=analysis["recommendations"],
         created_at=datetime.utcnow(),
+        **fluency_columns,
     )
     session.add(reading_session)
-    session.commit()
-    session.refresh(reading_session)
+    await session.flush()
+    # prediction, recommendations and progress run in the job queue
+    await enqueue_session_analytics(session, [reading_session])
+    await session.commit()
+    job_queue.notify()
 
     return {
         "id": reading_session.id,
@@ -113,19 +148,266 @@ def start_reading_session(data: dict, session: Session = Depends(get_session)):
             "wpm": wpm,
             "accuracy": analysis["accuracy"],
             "errors": analysis["errors"],
+            "details": analysis["details"],
+            "counts": analysis["counts"],
+            "fluency": fluency,
         },
+        "analytics": "queued",
     }
 
+# ---------- BATCH READING SESSIONS ----------
+@router.post("/batch")
+async def start_reading_sessions_batch(payload: BatchSessionRequest, session: AsyncSession = Depends(get_session)):
+    items = payload.items
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_ITEMS} items per batch")
+
+    lesson_ids = {item.lesson_id for item in items}
+    lessons = (await session.exec(select(Lesson).where(Lesson.id.in_(lesson_ids)))).all()
+    references = {lesson.id: get_lesson_reference(lesson.id, lesson.content) for lesson in lessons}
+
+    results = [None] * len(items)
+    jobs, job_indexes = [], []
+    for index, item in enumerate(items):
+        reference = references.get(item.lesson_id)
+        if reference is None:
+            results[index] = {"index": index, "error": "Lesson not found"}
+            continue
+        jobs.append((reference, item.spoken_text))
+        job_indexes.append(index)
+
+    # Score in worker processes, then insert every row in one transaction
+    rows = []
+    now = datetime.utcnow()
+    for index, (analysis, error) in zip(job_indexes, await score_batch(jobs)):
+        if error:
+            results[index] = {"index": index, "error": error}
+            continue
+        item = items[index]
+        wpm, fluency_columns, _ = fluency_fields(item, item.spoken_text, analysis)
+        reading_session = ReadingSession(
+            user_id=item.user_id,
+            lesson_id=item.lesson_id,
+            spoken_text=item.spoken_text,
+            wpm=wpm,
+            accuracy=analysis["accuracy"],
+            errors=analysis["errors"],
+            recommendations=analysis["recommendations"],
+            created_at=now,
+            **fluency_columns,
+        )
+        rows.append((index, reading_session, analysis))
+
+    session.add_all([reading_session for _, reading_session, _ in rows])
+    await session.flush()
+    await enqueue_session_analytics(session, [reading_session for _, reading_session, _ in rows])
+    for index, reading_session, analysis in rows:
+        results[index] = {
+            "index": index,
+            "id": reading_session.id,
+            "metrics": {
+                "wpm": reading_session.wpm,
+                "wcpm": reading_session.wcpm,
+                "accuracy": analysis["accuracy"],
+                "errors": analysis["errors"],
+            },
+        }
+    await session.commit()
+    job_queue.notify()
+
+    return {
+        "created": len(rows),
+        "failed": len(items) - len(rows),
+        "results": results,
+    }
+
+# ---------- LIVE READING (WebSocket) ----------
+def live_wpm(words: int, elapsed_seconds: float) -> int:
+    return round(words / max(elapsed_seconds / 60, 1 / 60))
+
+async def save_live_session(user_id: int, lesson_id: int, live: LiveAlignment, wpm: Optional[int], analysis: dict,
+                            fluency_columns: dict):
+    async with async_session_factory() as session:
+        reading_session = ReadingSession(
+            user_id=user_id,
+            lesson_id=lesson_id,
+            spoken_text=" ".join(live.spoken_words),
+            wpm=wpm,
+            accuracy=analysis["accuracy"],
+            errors=analysis["errors"],
+            recommendations=analysis["recommendations"],
+            created_at=datetime.utcnow(),
+            **fluency_columns,
+        )
+        session.add(reading_session)
+        await session.flush()
+        await enqueue_session_analytics(session, [reading_session])
+        await session.commit()
+    job_queue.notify()
+    return reading_session
+
+async def live_user(websocket: WebSocket, token: Optional[str]):
+    """The caller's snapshot, authenticated like the HTTP routes; None after closing the socket.
+
+    Browsers can't set headers on a WebSocket, so the token may come as ?token=.
+    """
+    header = websocket.headers.get("authorization", "")
+    token = token or (header[7:] if header.lower().startswith("bearer ") else None)
+    try:
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        async with async_session_factory() as session:
+            return await get_user_snapshot(token, session)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=4401)
+        return None
+
+async def receive_live_message(websocket: WebSocket) -> LiveMessage:
+    """The next valid client frame; invalid ones are answered with an error frame and skipped."""
+    while True:
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000))
+        if frame.get("text") is None:
+            await websocket.send_json({"type": "error", "detail": "Send JSON text frames"})
+            continue
+        try:
+            return LiveMessage.model_validate_json(frame["text"])
+        except ValidationError as e:
+            await websocket.send_json({"type": "error", "detail": e.errors(include_url=False, include_input=False)})
+
+@router.websocket("/live")
+async def live_reading_session(websocket: WebSocket, lesson_id: int, user_id: Optional[int] = None,
+                               token: Optional[str] = None):
+    """Score a reading while it happens.
+
+    Authenticate with ?token= (or an Authorization header); user_id, if
+    given, must be the token's user. Client sends {"type": "chunk", "text":
+    ..., "t": ms since start} for each final speech-recognition segment
+    (optionally "start": ms when the segment was first heard, for pause
+    analysis) and {"type": "end"} when done. Each chunk is answered with
+    {"type": "feedback"} for just its words, an invalid frame with {"type":
+    "error"}; the session is saved once, on "end" or disconnect, and "end"
+    is answered with {"type": "result"}.
+    """
+    await websocket.accept()
+    user = await live_user(websocket, token)
+    if user is None:
+        return
+    if user_id is not None and user_id != user.id:
+        await websocket.send_json({"type": "error", "detail": "user_id doesn't match the token"})
+        await websocket.close(code=4403)
+        return
+
+    async with async_session_factory() as session:
+        lesson = await session.get(Lesson, lesson_id)
+    if not lesson:
+        await websocket.send_json({"type": "error", "detail": "Lesson not found"})
+        await websocket.close(code=4404)
+        return
+
+    live = LiveAlignment(get_lesson_reference(lesson.id, lesson.content))
+    started = time.monotonic()
+    elapsed = 0.0
+    await websocket.send_json({"type": "ready", "lesson_id": lesson.id, "words": live.reference.tokens})
+
+    chunks = []
+    ended = False
+    try:
+        while True:
+            message = await receive_live_message(websocket)
+            if message.type == "end":
+                ended = True
+                break
+            text = message.text or ""
+            with timed_scoring("live"):
+                ops = live.feed(text)
+            chunk_start = message.start / 1000 if message.start is not None else elapsed
+            elapsed = message.t / 1000 if message.t is not None else time.monotonic() - started
+            chunks.append(TimedChunk(text=text, start=min(chunk_start, elapsed), end=elapsed))
+            await websocket.send_json({
+                "type": "feedback",
+                "ops": [{"kind": op.kind, "ref_index": op.ref_index, "expected": op.expected, "spoken": op.spoken}
+                        for op in ops],
+                "position": live.position,
+                "words_read": len(live.spoken_words),
+                "wpm": live_wpm(len(live.spoken_words), elapsed),
+                "accuracy": live.progress_accuracy(),
+            })
+    except WebSocketDisconnect:
+        pass
+
+    if not live.spoken_words:
+        if ended:
+            await websocket.send_json({"type": "error", "detail": "Nothing was read"})
+            await websocket.close()
+        return
+
+    analysis = live.result()
+    spoken_text = " ".join(live.spoken_words)
+    timing = SessionTiming(chunks=chunks, duration=elapsed)
+    wpm, fluency_columns, fluency = fluency_fields(timing, spoken_text, analysis)
+    # shielded: a dropped connection may cancel this handler, not the save
+    reading_session = await asyncio.shield(
+        save_live_session(user.id, lesson.id, live, wpm, analysis, fluency_columns))
+
+    if ended:
+        await websocket.send_json({
+            "type": "result",
+            "id": reading_session.id,
+            "metrics": {
+                "wpm": wpm,
+                "accuracy": analysis["accuracy"],
+                "errors": analysis["errors"],
+                "counts": analysis["counts"],
+                "recommendations": analysis["recommendations"],
+                "fluency": fluency,
+            },
+        })
+        await websocket.close()
+
 # ---------- GET USER SESSIONS ----------
 @router.get("/user/{user_id}")
-def get_user_sessions(user_id: int, session: Session = Depends(get_session)):
-    sessions = session.exec(select(ReadingSession).where(ReadingSession.user_id == user_id)).all()
-    return {"sessions": sessions}
+async def get_user_sessions(
+    user_id: int,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    session: AsyncSession = Depends(get_session),
+):
+    """Keyset-paginated sessions; pass `fields` without spoken_text for list views."""
+    columns = parse_fields(ReadingSession, fields, default=list(ReadingSession.__table__.columns.keys()))
+    filters = [ReadingSession.user_id == user_id]
+    if format == "ndjson":
+        return ndjson_response(keyset_statement(ReadingSession, columns, filters, cursor, limit))
+    sessions, next_cursor = await fetch_page(session, ReadingSession, columns, filters, cursor, limit)
+    return {"sessions": sessions, "next_cursor": next_cursor}
+
+# ---------- EXPORT SESSIONS ----------
+@router.get("/export")
+async def export_sessions(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user_id: Optional[int] = None,
+    lesson_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    teacher=Depends(require_teacher),
+):
+    """Every matching session, oldest first, streamed as a download; teachers only."""
+    filters = []
+    if user_id is not None:
+        filters.append(ReadingSession.user_id == user_id)
+    if lesson_id is not None:
+        filters.append(ReadingSession.lesson_id == lesson_id)
+    if since is not None:
+        filters.append(ReadingSession.created_at >= since)
+    return export_response(session_export_statement(filters), format, "sessions")
 
 # ---------- GET SESSION BY ID ----------
 @router.get("/{session_id}")
-def get_session(session_id: int, session: Session = Depends(get_session)):
-    sess = session.get(ReadingSession, session_id)
+async def get_session(session_id: int, session: AsyncSession = Depends(get_session)):
+    sess = await session.get(ReadingSession, session_id)
     if not sess:
         raise HTTPException(status_code=404, detail="Session not found")
     return {"session": sess}
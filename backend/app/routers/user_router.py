@@ -1,22 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from ..schemas import UserOut, ProgressUpdate
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, get_user_snapshot, invalidate_user
 from ..db import get_session
+from ..progress import merge_progress, user_out
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/me", response_model=UserOut)
-def read_me(current_user=Depends(get_current_user)):
-    return current_user
+async def read_me(snapshot: UserOut = Depends(get_user_snapshot)):
+    return snapshot
 
 @router.post("/progress", response_model=UserOut)
-def update_progress(payload: ProgressUpdate, current_user=Depends(get_current_user), session=Depends(get_session)):
-    # Merge progress dictionaries (client sends partial updates)
+async def update_progress(payload: ProgressUpdate, current_user=Depends(get_current_user), session=Depends(get_session)):
+    # Client sends partial updates; only the keys it sent are written
     user = current_user
-    existing = user.progress or {}
-    existing.update(payload.progress)
-    user.progress = existing
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-    return user
+    await merge_progress(session, user.id, payload.progress)
+    await session.commit()
+    invalidate_user(user.id)
+    return await user_out(session, user)
@@ -1,5 +1,5 @@
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, EmailStr
+from typing import Optional, Dict, Any, List, Literal
+from pydantic import BaseModel, EmailStr, Field
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -14,6 +14,11 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     sub: Optional[str] = None
     role: Optional[str] = None
+    exp: Optional[int] = None
+
+class Principal(BaseModel):
+    id: int
+    role: str
 
 class UserOut(BaseModel):
     id: int
@@ -22,5 +27,49 @@ class UserOut(BaseModel):
     role: str
     progress: Optional[Dict[str, Any]] = {}
 
+ReadingLevel = Literal["basic", "intermediate", "advanced"]
+
+class LessonCreate(BaseModel):
+    title: str = Field(min_length=1, max_length=200)
+    content: str = Field(min_length=1, max_length=100_000)
+    reading_level: ReadingLevel = "basic"
+    creator_id: Optional[int] = None
+
+class LessonUpdate(BaseModel):
+    title: Optional[str] = Field(None, min_length=1, max_length=200)
+    content: Optional[str] = Field(None, min_length=1, max_length=100_000)
+    reading_level: Optional[ReadingLevel] = None
+    creator_id: Optional[int] = None
+
 class ProgressUpdate(BaseModel):
     progress: Dict[str, Any]
+
+class TimedWord(BaseModel):
+    word: str
+    start: float  # seconds from the start of the reading
+    end: Optional[float] = None
+
+class TimedChunk(BaseModel):
+    text: str
+    start: float
+    end: Optional[float] = None
+
+class SessionTiming(BaseModel):
+    words: Optional[List[TimedWord]] = None
+    chunks: Optional[List[TimedChunk]] = None
+    duration: Optional[float] = None  # seconds; defaults to the timestamps' span
+
+class SessionCreate(SessionTiming):
+    user_id: int
+    lesson_id: int
+    spoken_text: str
+
+class BatchSessionRequest(BaseModel):
+    items: List[SessionCreate]
+
+class LiveMessage(BaseModel):
+    """A client frame on /sessions/live."""
+    type: Literal["chunk", "end"]
+    text: Optional[str] = None
+    t: Optional[float] = Field(None, ge=0)  # ms since the reading started
+    start: Optional[float] = Field(None, ge=0)  # ms when the chunk was first heard
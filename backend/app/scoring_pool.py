@@ -0,0 +1,73 @@
+# backend/app/scoring_pool.py
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .ai_utils import calculate_accuracy
+from .config import settings
+from .telemetry import timed_scoring
+
+_pool = None
+_workers = 0
+
+
+def get_scoring_pool() -> ProcessPoolExecutor:
+    """Process pool shared by batch scoring; created on first use."""
+    global _pool, _workers
+    if _pool is None:
+        _workers = settings.SCORING_WORKERS or os.cpu_count() or 1
+        # spawn, not fork: the API process runs threads (uvicorn, SQLAlchemy pool)
+        _pool = ProcessPoolExecutor(max_workers=_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_scoring_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _score_chunk(reference, texts):
+    """Runs in a worker: score many transcripts against one compiled reference."""
+    results = []
+    for text in texts:
+        try:
+            results.append((calculate_accuracy(text, reference), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+async def score_batch(jobs):
+    """Score (reference, spoken_text) pairs in the process pool.
+
+    Jobs are grouped by lesson and split into roughly one chunk per worker,
+    so each reference is pickled once per chunk instead of once per transcript.
+    Returns (analysis, error) tuples in the same order as `jobs`.
+    """
+    if not jobs:
+        return []
+    pool = get_scoring_pool()
+    loop = asyncio.get_running_loop()
+
+    by_reference = {}
+    for index, (reference, text) in enumerate(jobs):
+        by_reference.setdefault(id(reference), (reference, []))[1].append((index, text))
+
+    chunk_size = max(1, -(-len(jobs) // _workers))
+    futures = []
+    for reference, items in by_reference.values():
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            future = loop.run_in_executor(pool, _score_chunk, reference, [text for _, text in chunk])
+            futures.append(([index for index, _ in chunk], future))
+
+    results = [None] * len(jobs)
+    with timed_scoring("pool"):
+        chunk_results = await asyncio.gather(*(future for _, future in futures))
+    for (indexes, _), chunk_result in zip(futures, chunk_results):
+        for index, result in zip(indexes, chunk_result):
+            results[index] = result
+    return results
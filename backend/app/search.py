@@ -0,0 +1,245 @@
+# backend/app/search.py
+"""Full-text lesson search over title and content.
+
+The inverted index lives in the database, so every writer (the lesson
+routes, bulk imports, a manual UPDATE) keeps it current in the same
+transaction:
+
+- SQLite: an external-content FTS5 table, lesson_fts, kept in sync with
+  lesson by insert/update/delete triggers. It stores only the index; text
+  for snippets is read back from lesson. Filters are checked exactly
+  against lesson's b-tree indexes before the ranking cap below, so the cap
+  only counts lessons the page can return. creator_id is also matched in
+  the index (with zero rank weight), where it narrows a match a lot;
+  reading_level isn't, as a three-valued phrase narrows too little to pay
+  for the extra work bm25 does per phrase. Prefix indexes for 2-4
+  characters keep type-ahead queries from expanding into a merge of every
+  matching term.
+- PostgreSQL: a GIN index over a weighted tsvector expression of title and
+  content, maintained by Postgres; filters use the ordinary b-tree indexes.
+
+Every word of the query must match and the last one also matches as a
+prefix, so results update while a teacher is still typing. Stopwords are
+dropped unless the query has nothing else.
+
+Ranking (bm25 / ts_rank_cd, title matches weighted above content) is
+computed for at most MAX_RANKED matches, the newest ones. A query matching
+fewer lessons is ranked exactly; one matching more is an approximation.
+An older lesson outside the newest MAX_RANKED is never returned, even if
+it would rank first. search_lessons reports which case applies.
+Exact ranking over every match costs 20 ms for a word in 10% of 100k
+lessons and over 200 ms for one in all of them, against a budget of 10 ms
+(benchmarks/bench_search.py checks the p95).
+
+    python -m app.search rebuild    # re-index every lesson
+"""
+import asyncio
+import re
+import sys
+import time
+
+from sqlalchemy import bindparam, text
+
+from .db import engine
+
+MAX_TERMS = 8
+MAX_RANKED = 500
+TITLE_WEIGHT = 10.0  # a title match counts as much as ten content matches
+SNIPPET_WORDS = 16
+FILTER_COLUMNS = ("reading_level", "creator_id")
+INDEX_MATCHED_FILTERS = ("creator_id",)  # selective enough to narrow the FTS match
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has he in is it its of on or she that the their them they this to was "
+    "were will with".split()
+)
+
+
+def query_terms(q: str):
+    words = re.findall(r"\w+", (q or "").lower())
+    terms = [word for word in words if word not in STOPWORDS] or words
+    return terms[:MAX_TERMS]
+
+
+def _filter_sql(filters, prefix=""):
+    return "".join(f" AND {prefix}{column} = :{column}" for column in filters)
+
+
+class SQLiteLessonSearch:
+    name = "sqlite-fts5"
+    COLUMNS = ("title", "content") + FILTER_COLUMNS
+
+    def ensure_index(self, conn):
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lesson_fts'"
+        ).first()
+        if exists:
+            return []
+        columns = ", ".join(self.COLUMNS)
+        new = ", ".join(f"new.{column}" for column in self.COLUMNS)
+        old = ", ".join(f"old.{column}" for column in self.COLUMNS)
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE lesson_fts USING fts5({columns}, "
+            "content='lesson', content_rowid='id', tokenize='porter unicode61', prefix='2 3 4')"
+        )
+        conn.exec_driver_sql(
+            "CREATE TRIGGER lesson_fts_insert AFTER INSERT ON lesson BEGIN "
+            f"INSERT INTO lesson_fts(rowid, {columns}) VALUES (new.id, {new}); END"
+        )
+        conn.exec_driver_sql(
+            "CREATE TRIGGER lesson_fts_delete AFTER DELETE ON lesson BEGIN "
+            f"INSERT INTO lesson_fts(lesson_fts, rowid, {columns}) VALUES ('delete', old.id, {old}); END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER lesson_fts_update AFTER UPDATE OF {columns} ON lesson BEGIN "
+            f"INSERT INTO lesson_fts(lesson_fts, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO lesson_fts(rowid, {columns}) VALUES (new.id, {new}); END"
+        )
+        # the default `rank`: bm25 with per-column weights, filter columns not scored
+        conn.exec_driver_sql(
+            f"INSERT INTO lesson_fts(lesson_fts, rank) VALUES ('rank', 'bm25({TITLE_WEIGHT}, 1.0, 0.0, 0.0)')"
+        )
+        self.rebuild(conn)  # index lessons that predate the table
+        return ["lesson_fts"]
+
+    def rebuild(self, conn):
+        conn.exec_driver_sql("INSERT INTO lesson_fts(lesson_fts) VALUES ('rebuild')")
+
+    @staticmethod
+    def _phrase(value) -> str:
+        return '"' + str(value).replace('"', '""') + '"'
+
+    def match_expression(self, terms, filters=None):
+        phrases = [self._phrase(term) for term in terms]
+        phrases[-1] += "*"
+        expression = " ".join(phrases)
+        for column, value in (filters or {}).items():
+            if re.search(r"\w", str(value)):
+                expression = f"({expression}) AND {column} : {self._phrase(value)}"
+        return expression
+
+    def statement(self, filters):
+        # innermost: the newest MAX_RANKED matches that pass the filters, ranked lazily while walking
+        # rowids backwards; filters are checked exactly (the covering lesson indexes) before the LIMIT
+        join = " JOIN lesson ON lesson.id = lesson_fts.rowid" if filters else ""
+        return text(
+            "SELECT lesson.id, lesson.title, lesson.reading_level, lesson.creator_id, lesson.created_at, "
+            "-top.rank AS score, top.ranked FROM ("
+            "SELECT c.id, c.rank, count(*) OVER () AS ranked FROM ("
+            f"SELECT lesson_fts.rowid AS id, lesson_fts.rank FROM lesson_fts{join} "
+            f"WHERE lesson_fts MATCH :query{_filter_sql(filters, 'lesson.')} "
+            "ORDER BY lesson_fts.rowid DESC LIMIT :candidates) AS c "
+            "ORDER BY c.rank LIMIT :limit OFFSET :offset) AS top "
+            "JOIN lesson ON lesson.id = top.id ORDER BY top.rank"
+        )
+
+    async def search(self, session, terms, filters, limit, offset):
+        matched = {column: value for column, value in filters.items() if column in INDEX_MATCHED_FILTERS}
+        params = {"query": self.match_expression(terms, matched), "candidates": MAX_RANKED,
+                  "limit": limit, "offset": offset, **filters}
+        rows = [dict(row._mapping) for row in (await session.exec(self.statement(filters), params=params)).all()]
+        if rows:
+            # snippet() needs the MATCH cursor. One pass over the page's rowid range: the
+            # unary + keeps the IN list out of FTS5, which would redo the match per id
+            ids = [row["id"] for row in rows]
+            snippets = dict((await session.exec(
+                text(f"SELECT rowid, snippet(lesson_fts, 1, '[', ']', '…', {SNIPPET_WORDS}) FROM lesson_fts "
+                     "WHERE lesson_fts MATCH :query AND rowid BETWEEN :low AND :high AND +rowid IN :ids"
+                     ).bindparams(bindparam("ids", expanding=True)),
+                params={"query": self.match_expression(terms), "low": min(ids), "high": max(ids), "ids": ids},
+            )).all())
+            for row in rows:
+                row["snippet"] = snippets.get(row["id"], "")
+        return rows
+
+
+class PostgresLessonSearch:
+    name = "postgres-tsvector"
+    # must match the indexed expression exactly for the planner to use the index
+    DOCUMENT = ("(setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(content, '')), 'B'))")
+
+    def ensure_index(self, conn):
+        exists = conn.exec_driver_sql("SELECT 1 FROM pg_indexes WHERE indexname = 'ix_lesson_search'").first()
+        if exists:
+            return []
+        conn.exec_driver_sql(f"CREATE INDEX ix_lesson_search ON lesson USING GIN ({self.DOCUMENT})")
+        return ["ix_lesson_search"]
+
+    def rebuild(self, conn):
+        conn.exec_driver_sql("REINDEX INDEX ix_lesson_search")
+
+    def match_expression(self, terms, filters=None):
+        return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+    def statement(self, filters):
+        # ts_headline is only evaluated for the rows that survive the LIMIT
+        return text(
+            "SELECT lesson.id, title, reading_level, creator_id, created_at, top.score, top.ranked, "
+            "ts_headline('english', content, to_tsquery('english', :query), "
+            f"'StartSel=[, StopSel=], MaxWords={SNIPPET_WORDS}, MinWords=5') AS snippet FROM ("
+            f"SELECT c.id, ts_rank_cd({self.DOCUMENT}, to_tsquery('english', :query)) AS score, "
+            "count(*) OVER () AS ranked FROM ("
+            f"SELECT id FROM lesson WHERE {self.DOCUMENT} @@ to_tsquery('english', :query){_filter_sql(filters)} "
+            "ORDER BY id DESC LIMIT :candidates) AS c JOIN lesson ON lesson.id = c.id "
+            "ORDER BY score DESC, c.id DESC LIMIT :limit OFFSET :offset) AS top "
+            "JOIN lesson ON lesson.id = top.id ORDER BY top.score DESC, top.id DESC"
+        )
+
+    async def search(self, session, terms, filters, limit, offset):
+        params = {"query": self.match_expression(terms), "candidates": MAX_RANKED,
+                  "limit": limit, "offset": offset, **filters}
+        return [dict(row._mapping) for row in (await session.exec(self.statement(filters), params=params)).all()]
+
+
+def get_backend(dialect_name: str = None):
+    if (dialect_name or engine.dialect.name) == "postgresql":
+        return PostgresLessonSearch()
+    return SQLiteLessonSearch()
+
+
+def ensure_search_index(conn):
+    """Create the index if it is missing. Synchronous, called from migrations.upgrade."""
+    return get_backend(conn.dialect.name).ensure_index(conn)
+
+
+async def search_lessons(session, q: str, reading_level=None, creator_id=None, limit: int = 20, offset: int = 0):
+    """(page of ranked matches, offset of the next page or None, approximate).
+
+    approximate is True when more lessons matched than the MAX_RANKED
+    newest that were ranked (see the module docstring).
+    """
+    terms = query_terms(q)
+    if not terms:
+        return [], None, False
+    filters = {column: value for column, value in zip(FILTER_COLUMNS, (reading_level, creator_id))
+               if value is not None}
+    rows = await get_backend().search(session, terms, filters, limit + 1, offset)
+    approximate = bool(rows) and rows[0]["ranked"] >= MAX_RANKED
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+    for row in rows:
+        del row["ranked"]
+        row["score"] = round(float(row["score"]), 4)
+    return rows, next_offset, approximate
+
+
+async def _main(argv):
+    from .db import init_db
+    if argv[:1] != ["rebuild"]:
+        print("usage: python -m app.search rebuild")
+        return 2
+    await init_db()
+    started = time.perf_counter()
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: get_backend(sync_conn.dialect.name).rebuild(sync_conn))
+    finally:
+        await engine.dispose()
+    print(f"Rebuilt the lesson search index in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,82 @@
+# backend/app/session_analytics.py
+"""Derived analytics for a saved reading session, run as a background job.
+
+The session endpoints only score and store the raw session, then enqueue
+SESSION_ANALYTICS; the job predicts the performance level (timed sessions only), replaces the
+placeholder recommendations, folds the session into the progress
+summaries and updates the user's "reading" progress key.
+"""
+from .aggregates import record_session
+from .dependencies import invalidate_user
+from .jobs import enqueue_many, job_handler
+from .models import Lesson, ReadingSession, StudentProgressSummary
+from .performance_model import LEVELS, difficulty_for, predict_performance, registry
+from .progress import merge_progress
+
+SESSION_ANALYTICS = "session.analytics"
+
+
+async def enqueue_session_analytics(session, reading_sessions):
+    """Queue analytics for flushed sessions, in the caller's transaction."""
+    await enqueue_many(session, SESSION_ANALYTICS, [
+        ({"session_id": rs.id}, f"{SESSION_ANALYTICS}:{rs.id}") for rs in reading_sessions
+    ])
+
+
+def recommendations_for(reading_session, performance_level: str = None):
+    """The tip follows accuracy; the level (from WPM) only changes its advice on pace.
+
+    performance_level is None for untimed sessions, which get no pace advice.
+    """
+    accuracy = reading_session.accuracy
+    slow = performance_level == LEVELS[0]
+    if accuracy > 85:
+        tip = ("Accurate reading! Now try reading a little faster. 👍" if slow
+               else "Excellent reading! Keep it up! 🎉")
+    elif accuracy > 60:
+        tip = ("Good effort! Practice the words you missed until you can read them smoothly. 👍" if slow
+               else "Good effort! Try reading a bit more slowly and clearly. 👍")
+    else:
+        tip = "Keep practicing. Focus on pronunciation and pacing. 💪"
+    recommendations = {"tip": tip, "focus_words": list(reading_session.errors or [])[:5]}
+    if performance_level is not None:
+        recommendations["performance_level"] = performance_level
+    if reading_session.pauses_long:
+        words = [h["word"] for h in reading_session.hesitations or []]
+        recommendations["pacing"] = ("Practice the words you stopped at"
+                                     + (f" ({', '.join(words)})" if words else "")
+                                     + " until you can read them without pausing.")
+    return recommendations
+
+
+@job_handler(SESSION_ANALYTICS)
+async def analyze_session(session, payload):
+    reading_session = await session.get(ReadingSession, payload["session_id"])
+    if reading_session is None:
+        return None  # deleted before the job ran
+
+    lesson = await session.get(Lesson, reading_session.lesson_id)
+    difficulty = difficulty_for(lesson.reading_level if lesson else "basic")
+    # untimed sessions have no WPM to predict from
+    level = None
+    if reading_session.wpm is not None:
+        await registry.current_async()  # a job can run before startup's warm-up has loaded the model
+        level = predict_performance(reading_session.wpm, difficulty)["performance_level"]
+    reading_session.recommendations = recommendations_for(reading_session, level)
+    session.add(reading_session)
+
+    await record_session(session, reading_session)
+    summary = await session.get(StudentProgressSummary, reading_session.user_id)
+
+    reading = {
+        "sessions": summary.session_count,
+        "avg_accuracy": round(summary.accuracy_sum / summary.session_count, 2),
+        "avg_wpm": round(summary.wpm_sum / summary.wpm_count, 1) if summary.wpm_count else None,
+        "last_session_id": reading_session.id,
+        "last_lesson_id": reading_session.lesson_id,
+        "last_session_at": reading_session.created_at.isoformat(),
+    }
+    if level is not None:
+        reading["performance_level"] = level
+    await merge_progress(session, reading_session.user_id, {"reading": reading})
+    return lambda: invalidate_user(reading_session.user_id)
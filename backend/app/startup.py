@@ -0,0 +1,126 @@
+# backend/app/startup.py
+"""Process startup: schema check, warm-up and readiness.
+
+main's lifespan awaits check_schema() before the app serves anything, then
+runs warm_up() in the background: the heavy libraries (scikit-learn, scipy,
+joblib, the Gemini client) are only imported there, once, instead of at
+import time or on some user's first request. /health answers as soon as the
+process is up; /ready answers 503 until every required step has finished.
+
+A failed optional step (the lesson index, the chatbot client) is reported
+but doesn't hold readiness back: those features load on first use instead.
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Outcome and duration of each startup step, for /ready."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.ready_after = None
+        self.steps = {}
+        self.required = set()
+
+    def expect(self, name: str, required: bool = True):
+        self.steps[name] = {"status": "pending"}
+        if required:
+            self.required.add(name)
+
+    def finish(self, name: str, status: str, started: float, error: str = None):
+        step = {"status": status, "ms": round((time.monotonic() - started) * 1000, 1)}
+        if error:
+            step["error"] = error
+        self.steps[name] = step
+        if self.ready and self.ready_after is None:
+            self.ready_after = time.monotonic() - self.started
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.steps) and all(self.steps[name]["status"] == "ok" for name in self.required)
+
+    def snapshot(self):
+        return {
+            "ready": self.ready,
+            "ready_after_s": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "steps": self.steps,
+        }
+
+
+readiness = Readiness()
+
+
+async def _run(name: str, step):
+    """Run one step; returns False if it raised."""
+    started = time.monotonic()
+    try:
+        result = await step()
+    except Exception as e:
+        logger.exception("startup step %s failed", name)
+        readiness.finish(name, "failed", started, f"{type(e).__name__}: {e}")
+        return False
+    readiness.finish(name, "skipped" if result is False else "ok", started)
+    return True
+
+
+# --- steps ---
+async def _schema():
+    from .db import init_db
+    created = await init_db()
+    if created:
+        logger.info("schema upgraded: %s", ", ".join(created))
+
+
+async def _performance_model():
+    from .performance_model import registry
+    # current(), not load(): an analytics job that got here first already loaded it
+    await registry.current_async()
+
+
+async def _lesson_index():
+    from .ml_utils import get_lesson_index
+    # False (skipped) until `python -m app.ml_utils fit` has been run
+    return await asyncio.to_thread(get_lesson_index) is not None
+
+
+async def _chatbot():
+    from .llm import get_llm_gate
+    await asyncio.to_thread(get_llm_gate)
+
+
+WARM_UP_STEPS = (
+    ("performance_model", _performance_model, True),
+    ("lesson_index", _lesson_index, False),
+    ("chatbot", _chatbot, False),
+)
+
+
+async def check_schema():
+    """Create or upgrade the schema; raises, failing startup, if that's impossible."""
+    readiness.reset()
+    readiness.expect("schema")
+    for name, _, required in WARM_UP_STEPS:
+        readiness.expect(name, required)
+    started = time.monotonic()
+    try:
+        await _schema()
+    except Exception as e:
+        readiness.finish("schema", "failed", started, f"{type(e).__name__}: {e}")
+        raise
+    readiness.finish("schema", "ok", started)
+
+
+async def warm_up():
+    """Load models and clients once, one step after another, off the event loop."""
+    for name, step, _ in WARM_UP_STEPS:
+        await _run(name, step)
+    if readiness.ready:
+        logger.info("ready after %.2fs", readiness.ready_after)
@@ -0,0 +1,273 @@
+# backend/app/telemetry.py
+"""Request-level timings and a Prometheus text endpoint.
+
+MetricsMiddleware times every request by route template and status, and
+starts a RequestStats for it. Code on the request's path adds to that
+object: the engine hooks in app.db (query count and time), timed_scoring()
+around transcript scoring, record_llm() in the LLM gate. Per-request
+totals go into histograms, so an endpoint whose query count keeps climbing
+(an N+1 pattern) shows up in http_request_db_queries.
+
+With PROFILING_ENABLED set, a request carrying `X-Profile: 1` is run under
+cProfile (pyinstrument when installed) up to its response headers; the
+response gets a Server-Timing header and an X-Profile-Id whose report is
+served at /metrics/profiles/{id}. One request is profiled at a time, and
+the profile includes whatever else the event loop ran meanwhile.
+"""
+import contextvars
+import cProfile
+import io
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+MAX_PROFILES = 50
+
+
+# --- metric types ---
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names, self.buckets = name, help, tuple(labels), buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                names, vals = self.label_names + ("le",), label_values + (repr(float(bound)),)
+                lines.append(f"{self.name}_bucket{_labels(names, vals)} {cumulative}")
+            names, vals = self.label_names + ("le",), label_values + ("+Inf",)
+            lines.append(f"{self.name}_bucket{_labels(names, vals)} {values[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, label_values)} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, label_values)} {values[-1]}")
+        return lines
+
+
+def gauge_lines(name, help, samples, kind="gauge"):
+    """Render `samples` ((label dict, value) pairs) as a gauge or counter."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {value}")
+    return lines
+
+
+request_latency = Histogram("http_request_duration_seconds", "Request latency by route template.",
+                            ("method", "route", "status"))
+request_db_time = Histogram("http_request_db_seconds", "Database time spent per request.", ("route",))
+request_db_queries = Histogram("http_request_db_queries", "Queries executed per request.", ("route",),
+                               buckets=QUERY_COUNT_BUCKETS)
+scoring_time = Histogram("scoring_duration_seconds", "Transcript scoring time.", ("mode",))
+llm_time = Histogram("llm_request_duration_seconds", "Upstream LLM time per reply.", ("provider", "outcome"))
+llm_first_chunk = Histogram("llm_first_chunk_seconds", "Time to the first streamed LLM chunk.", ("provider",))
+
+
+# --- per-request accounting ---
+class RequestStats:
+    __slots__ = ("db_seconds", "db_queries", "scoring_seconds", "llm_seconds")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.scoring_seconds = 0.0
+        self.llm_seconds = 0.0
+
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    return _current.get()
+
+
+def record_query(seconds: float):
+    """Called from the engine's cursor hooks."""
+    stats = _current.get()
+    if stats is not None:
+        stats.db_seconds += seconds
+        stats.db_queries += 1
+
+
+def record_scoring(seconds: float, mode: str):
+    scoring_time.observe(seconds, mode)
+    stats = _current.get()
+    if stats is not None:
+        stats.scoring_seconds += seconds
+
+
+def record_llm(seconds: float, provider: str, outcome: str):
+    llm_time.observe(seconds, provider, outcome)
+    stats = _current.get()
+    if stats is not None:
+        stats.llm_seconds += seconds
+
+
+@contextmanager
+def timed_scoring(mode: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_scoring(time.perf_counter() - started, mode)
+
+
+# --- profiling ---
+class ProfileStore:
+    """The last MAX_PROFILES reports, by id."""
+
+    def __init__(self, maxsize: int = MAX_PROFILES):
+        self.maxsize = maxsize
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, report: str) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._reports[profile_id] = report
+            while len(self._reports) > self.maxsize:
+                self._reports.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self._reports.get(profile_id)
+
+
+profiles = ProfileStore()
+_profiling = threading.Lock()
+
+
+class _Profiler:
+    """pyinstrument if installed (async-aware), else cProfile."""
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+            self._profiler, self._kind = Profiler(async_mode="enabled"), "pyinstrument"
+        except ImportError:
+            self._profiler, self._kind = cProfile.Profile(), "cprofile"
+
+    def start(self):
+        if self._kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> str:
+        if self._kind == "pyinstrument":
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True)
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        return out.getvalue()
+
+
+def server_timing(stats: RequestStats, total: float) -> str:
+    return (f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.db_queries} queries", '
+            f"scoring;dur={stats.scoring_seconds * 1000:.2f}, llm;dur={stats.llm_seconds * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}")
+
+
+# --- middleware ---
+class MetricsMiddleware:
+    """Plain ASGI middleware, so streamed responses are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route_of(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"  # 404s: don't make a series per unknown path
+        if self._routes is None:
+            self._routes = {getattr(r, "endpoint", None): r.path for r in scope["app"].routes}
+        return self._routes.get(endpoint, getattr(endpoint, "__name__", "unknown"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        profiler = None
+        if settings.PROFILING_ENABLED and (dict(scope["headers"]).get(b"x-profile") or b"") not in (b"", b"0"):
+            if _profiling.acquire(blocking=False):
+                profiler = _Profiler()
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profiler is not None:
+                    elapsed = time.perf_counter() - started
+                    report = stop_profiler()
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(stats, elapsed).encode()))
+                    headers.append((b"x-profile-id", profiles.add(report).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        def stop_profiler():
+            nonlocal profiler
+            report, profiler = profiler.stop(), None
+            _profiling.release()
+            return report
+
+        try:
+            if profiler is not None:
+                profiler.start()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:  # failed before sending headers
+                stop_profiler()
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            route = self._route_of(scope)
+            request_latency.observe(elapsed, scope["method"], route, status)
+            request_db_time.observe(stats.db_seconds, route)
+            request_db_queries.observe(stats.db_queries, route)
+
+
+def render_metrics(extra_lines=()) -> str:
+    lines = []
+    for histogram in (request_latency, request_db_time, request_db_queries, scoring_time, llm_time, llm_first_chunk):
+        lines.extend(histogram.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
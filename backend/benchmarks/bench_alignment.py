@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_alignment.py
+"""Compare the alignment scorer with the old difflib path.
+
+Run from backend/:  python -m benchmarks.bench_alignment
+"""
+import difflib
+import random
+import time
+
+from app.ai_utils import LessonReference, calculate_accuracy
+
+WORDS = (
+    "the a cat dog sat ran on under mat tree little big red blue happy sad "
+    "went saw jumped over house garden sun moon night day friend school book "
+    "read write play water fish bird sky green small tall quick slow"
+).split()
+
+
+def legacy_calculate_accuracy(spoken_text: str, reference_text: str):
+    """The scorer as it was before the alignment engine (difflib + list scan)."""
+    spoken_words = spoken_text.lower().split()
+    ref_words = reference_text.lower().split()
+    matcher = difflib.SequenceMatcher(None, spoken_words, ref_words)
+    accuracy = round(matcher.ratio() * 100, 2)
+    errors = [word for word in ref_words if word not in spoken_words]
+    return {"accuracy": accuracy, "errors": errors[:5]}
+
+
+# Zipf-like vocabulary so long passages look like real text: a few very
+# common words and a long tail that appears once or twice.
+VOCAB = WORDS + [f"{w}{k}" for k in range(60) for w in WORDS]
+WEIGHTS = [1.0 / (rank + 1) for rank in range(len(VOCAB))]
+
+
+def make_reading(n_words: int, error_rate: float = 0.08, seed: int = 7):
+    rng = random.Random(seed)
+    reference = rng.choices(VOCAB, weights=WEIGHTS, k=n_words)
+    spoken = []
+    for word in reference:
+        roll = rng.random()
+        if roll < error_rate / 3:
+            continue  # omission
+        elif roll < 2 * error_rate / 3:
+            spoken.append(rng.choice(WORDS))  # substitution
+        elif roll < error_rate:
+            spoken.extend([word, word])  # repetition
+        else:
+            spoken.append(word)
+    return " ".join(reference), " ".join(spoken)
+
+
+def best_of(fn, repeat: int = 5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def run(sizes=(100, 500, 1000, 2500, 5000)):
+    results = []
+    for n in sizes:
+        reference_text, spoken_text = make_reading(n)
+        reference = LessonReference(1, reference_text)
+        legacy_ms = best_of(lambda: legacy_calculate_accuracy(spoken_text, reference_text))
+        aligned_ms = best_of(lambda: calculate_accuracy(spoken_text, reference))
+        results.append({
+            "words": n,
+            "legacy_ms": round(legacy_ms, 3),
+            "alignment_ms": round(aligned_ms, 3),
+            "legacy_accuracy": legacy_calculate_accuracy(spoken_text, reference_text)["accuracy"],
+            "alignment_accuracy": calculate_accuracy(spoken_text, reference)["accuracy"],
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'words':>6} {'difflib ms':>11} {'align ms':>9} {'difflib %':>10} {'align %':>8}")
+    for row in run():
+        print(f"{row['words']:>6} {row['legacy_ms']:>11.2f} {row['alignment_ms']:>9.2f} "
+              f"{row['legacy_accuracy']:>10} {row['alignment_accuracy']:>8}")
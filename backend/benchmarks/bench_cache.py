@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_cache.py
+"""Cache namespace operations on the memory and sqlite backends.
+
+Per backend: a local hit, a miss, set(), pop(), and for sqlite a shared hit
+(another worker's entry, read from the store and decoded) with a
+UserOut-sized value and a 100 KB lesson-page body.
+
+Then two spawned worker processes share one store: one fills an entry and
+the other reads it, and after the first pops it, the second's next get()
+must miss. Time until the pop is seen is reported.
+
+Run from backend/:  python -m benchmarks.bench_cache
+"""
+from benchmarks.common import save_results, summarize_us, use_temp_database
+
+use_temp_database("cache.db")
+
+import multiprocessing
+import os
+import tempfile
+import time
+
+ITERATIONS = 5000
+USER = {"id": 42, "email": "reader42@example.com", "full_name": "Reader 42", "role": "student",
+        "progress": {str(i): {"accuracy": 91.5, "wpm": 88, "completed": True} for i in range(20)}}
+PAGE = ("x" * 100_000).encode()
+
+
+def timed(fn, iterations=ITERATIONS):
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return summarize_us(samples)
+
+
+def bench_backend(backend: str, store_path: str):
+    from app.cache import MemoryCache, SharedCache, SharedStore
+
+    results = {}
+    # pages: about as many as RESPONSE_CACHE_SIZE holds
+    for label, value, count in (("user", USER, ITERATIONS), ("page", PAGE, 500)):
+        if backend == "memory":
+            cache = MemoryCache(f"bench_{label}", count * 2, 60)
+        else:
+            cache = SharedCache(f"bench_{label}", SharedStore(store_path), count * 2, 60)
+        row = {
+            "set": timed(lambda i: cache.set(i, value), count),
+            "local_hit": timed(lambda i: cache.get(i), count),
+            "miss": timed(lambda i: cache.get(-1 - i), count),
+        }
+        if backend == "sqlite":
+            cache.local.clear()
+            row["shared_hit"] = timed(lambda i: cache.get(i), count)
+        row["pop"] = timed(lambda i: cache.pop(i), count)
+        results[label] = row
+    return results
+
+
+def worker(role: str, store_path: str, events, queue):
+    """One 'uvicorn worker': 'writer' fills and later pops, 'reader' watches."""
+    from app.cache import SharedCache, SharedStore
+
+    cache = SharedCache("users", SharedStore(store_path), 100, 60)
+    if role == "writer":
+        cache.set(42, USER)
+        events["filled"].set()
+        events["read"].wait()
+        cache.pop(42)
+        queue.put(("popped", time.time()))
+        return
+    events["filled"].wait()
+    queue.put(("shared_read", cache.get(42) == USER))
+    queue.put(("local_read", cache.get(42) == USER and cache.local_hits == 1))
+    events["read"].set()
+    while cache.get(42) is not None:
+        pass
+    queue.put(("saw_pop", time.time()))
+    queue.put(("invalidations_received", cache.invalidations_received))
+
+
+def bench_cross_worker(store_path: str):
+    context = multiprocessing.get_context("spawn")
+    events = {"filled": context.Event(), "read": context.Event()}
+    queue = context.Queue()
+    processes = [context.Process(target=worker, args=(role, store_path, events, queue))
+                 for role in ("reader", "writer")]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+    messages = dict(queue.get(timeout=5) for _ in range(5))
+    return {
+        "shared_read_ok": messages["shared_read"],
+        "local_read_ok": messages["local_read"],
+        "invalidations_received": messages["invalidations_received"],
+        "invalidation_seen_after_us": round((messages["saw_pop"] - messages["popped"]) * 1e6, 1),
+    }
+
+
+def main():
+    store_path = os.path.join(tempfile.mkdtemp(prefix="lexilearn-cache-"), "cache.sqlite")
+    results = {backend: bench_backend(backend, store_path) for backend in ("memory", "sqlite")}
+    results["cross_worker"] = bench_cross_worker(os.path.join(os.path.dirname(store_path), "workers.sqlite"))
+
+    print(f"{'backend/value/op':<28} {'p50 us':>9} {'p99 us':>9}")
+    for backend in ("memory", "sqlite"):
+        for label, ops in results[backend].items():
+            for op, row in ops.items():
+                print(f"{backend + ' ' + label + ' ' + op:<28} {row['p50_us']:>9} {row['p99_us']:>9}")
+    cross = results["cross_worker"]
+    print(f"cross-worker: shared read ok={cross['shared_read_ok']}, local read ok={cross['local_read_ok']}, "
+          f"pop seen by the other worker after {cross['invalidation_seen_after_us']} us")
+    print(f"saved {save_results('cache', results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_chatbot.py
+"""Chatbot proxy under load, against the offline stub provider.
+
+Streams CONCURRENCY chat replies at once through /chatbot/stream while a
+probe keeps hitting /health, and reports time to first chunk, full reply
+time, rejections and probe latency. No network or API key needed.
+
+Run from backend/:  python -m benchmarks.bench_chatbot
+"""
+import os
+
+from benchmarks.common import free_port, use_temp_database, summarize_ms
+
+use_temp_database()
+os.environ.setdefault("LLM_RATE_LIMIT", "0")  # every request comes from one address here
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "32")
+
+import asyncio
+import json
+import time
+
+import httpx
+import uvicorn
+
+from app.llm import StubProvider, set_llm_provider
+from app.main import app
+
+CONCURRENCY = 100
+LATENCY = 0.5
+CHUNK_DELAY = 0.02
+
+
+async def run(client):
+    first_chunk, full_reply, probe_times = [], [], []
+    errors = {}
+    done = asyncio.Event()
+
+    async def chat(i):
+        start = time.perf_counter()
+        first = None
+        async with client.stream("POST", "/chatbot/stream", json={"message": f"tell me a story number {i}"}) as r:
+            async for line in r.aiter_lines():
+                if line.startswith("event: error"):
+                    errors["error"] = errors.get("error", 0) + 1
+                elif line.startswith("data: ") and "delta" in json.loads(line[6:]) and first is None:
+                    first = time.perf_counter() - start
+        if first is not None:
+            first_chunk.append(first)
+            full_reply.append(time.perf_counter() - start)
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            probe_times.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(chat(i) for i in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return {
+        "requests": CONCURRENCY,
+        "elapsed_s": round(elapsed, 2),
+        "first_chunk": summarize_ms(first_chunk),
+        "full_reply": summarize_ms(full_reply),
+        "errors": errors,
+        "health_probe": summarize_ms(probe_times),
+    }
+
+
+async def main():
+    gate = set_llm_provider(StubProvider(latency=LATENCY, chunk_delay=CHUNK_DELAY))
+    # A real server: ASGITransport buffers whole responses, which would hide streaming.
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    limits = httpx.Limits(max_connections=CONCURRENCY + 10)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+            result = await run(client)
+    finally:
+        server.should_exit = True
+        await serve_task
+    result["gate"] = gate.stats()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_import.py
+"""Bulk lesson import and export throughput.
+
+Writes LESSONS lessons (plus a few invalid lines) to an NDJSON file, imports
+it through app.bulk with a fitted lesson index loaded, then streams every
+lesson back out as NDJSON and CSV. The growth in peak RSS over the import
+is reported to show memory stays bounded: records are read, validated and
+inserted a chunk at a time, and only the lesson index grows with the data.
+
+Run from backend/:  python -m benchmarks.bench_import [--lessons 50000]
+"""
+from benchmarks.common import save_results, use_temp_database
+
+DB_PATH = use_temp_database("import.db")
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import resource
+
+from app import ml_utils
+from app.bulk import import_lessons, iter_records, lesson_export_statement, session_export_statement
+from app.db import engine, init_db
+from app.pagination import stream_rows
+from benchmarks.bench_alignment import VOCAB, WEIGHTS
+
+INVALID_EVERY = 1000
+
+
+def write_lessons(path: str, count: int):
+    rng = random.Random(23)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            if i % INVALID_EVERY == INVALID_EVERY - 1:
+                f.write('{"title": "missing content"}\n')
+                continue
+            words = rng.choices(VOCAB, weights=WEIGHTS, k=rng.randint(60, 250))
+            f.write(json.dumps({"title": f"Lesson {i}", "content": " ".join(words),
+                                "reading_level": rng.choice(["basic", "intermediate", "advanced"])}) + "\n")
+
+
+async def export(statement, format):
+    started, size = time.perf_counter(), 0
+    async for text in stream_rows(statement, format):
+        size += len(text)
+    return {"seconds": round(time.perf_counter() - started, 3), "bytes": size}
+
+
+async def main(count: int, chunk_size: int):
+    path = os.path.join(tempfile.mkdtemp(prefix="lexilearn-import-"), "lessons.ndjson")
+    write_lessons(path, count)
+    await init_db()
+    rng = random.Random(1)
+    ml_utils.set_lesson_index(ml_utils.LessonVectorIndex.fit(
+        (i, " ".join(rng.choices(VOCAB, weights=WEIGHTS, k=150))) for i in range(-200, 0)))
+
+    results = {"lessons": count, "chunk_size": chunk_size, "file_bytes": os.path.getsize(path)}
+    try:
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with open(path, encoding="utf-8", newline="") as lines:
+            report = await import_lessons(iter_records(lines, "ndjson"), chunk_size=chunk_size)
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before  # KiB on Linux
+        results["import"] = {
+            "imported": report["imported"],
+            "skipped": report["skipped"],
+            "seconds": report["seconds"],
+            "lessons_per_s": round(report["imported"] / report["seconds"]),
+            "peak_rss_growth_mb": round(rss_growth / 1024, 1),
+        }
+        results["export"] = {format: await export(lesson_export_statement(), format) for format in ("ndjson", "csv")}
+        results["export"]["sessions_ndjson"] = await export(session_export_statement(), "ndjson")
+    finally:
+        await engine.dispose()
+
+    imported = results["import"]
+    print(f"imported {imported['imported']} lessons ({imported['skipped']} invalid skipped) in {imported['seconds']}s "
+          f"= {imported['lessons_per_s']}/s, peak RSS +{imported['peak_rss_growth_mb']} MB "
+          f"for a {results['file_bytes'] / 2**20:.1f} MB file")
+    for format in ("ndjson", "csv"):
+        row = results["export"][format]
+        print(f"export {format}: {row['bytes'] / 2**20:.1f} MB in {row['seconds']}s")
+    print(f"saved {save_results('import', results)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lessons", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.lessons, args.chunk_size))
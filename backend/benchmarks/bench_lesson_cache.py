@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_lesson_cache.py
+"""Lesson reads through the response cache, in process over ASGI.
+
+For a page of lessons and a single lesson: a cold read (cache invalidated
+before every request, so DB + serialization each time), a warm read
+(cached body, gzip-encoded), and a revalidation that ends in a 304.
+Bytes on the wire are reported next to the uncompressed body size.
+
+Run from backend/:  python -m benchmarks.bench_lesson_cache
+"""
+from benchmarks.common import save_results, summarize_ms, use_temp_database
+
+use_temp_database("lesson_cache.db")
+
+import asyncio
+import random
+import time
+
+import httpx
+from sqlalchemy import insert
+
+from app.db import engine, init_db
+from app.http_cache import lesson_responses
+from app.main import app
+from app.models import Lesson
+from benchmarks.bench_alignment import VOCAB, WEIGHTS
+
+LESSONS = 500
+ITERATIONS = 300
+
+
+async def seed():
+    rng = random.Random(5)
+    async with engine.begin() as conn:
+        await conn.execute(insert(Lesson), [
+            {"title": f"Lesson {i}", "content": " ".join(rng.choices(VOCAB, weights=WEIGHTS, k=rng.randint(80, 300))),
+             "reading_level": rng.choice(["basic", "intermediate", "advanced"])}
+            for i in range(LESSONS)
+        ])
+
+
+async def measure(client, url, mode):
+    samples, wire, body = [], 0, 0
+    headers = {"Accept-Encoding": "gzip"}
+    etag = (await client.get(url, headers=headers)).headers["etag"]
+    if mode == "not_modified":
+        headers["If-None-Match"] = etag
+    for _ in range(ITERATIONS):
+        if mode == "cold":
+            lesson_responses.invalidate()
+        started = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        samples.append(time.perf_counter() - started)
+        wire = int(response.headers.get("content-length", 0))
+        body = len(response.content)
+    return {"wire_bytes": wire, "body_bytes": body, **summarize_ms(samples)}
+
+
+async def main():
+    await init_db()
+    await seed()
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, url in (("lesson_page", "/lessons/?limit=100"), ("lesson", "/lessons/42")):
+                results[name] = {mode: await measure(client, url, mode) for mode in ("cold", "warm", "not_modified")}
+    finally:
+        await engine.dispose()
+
+    print(f"{'request':<28} {'p50 ms':>8} {'p95 ms':>8} {'wire B':>8} {'body B':>8}")
+    for name, modes in results.items():
+        for mode, row in modes.items():
+            print(f"{name + ' ' + mode:<28} {row['p50_ms']:>8} {row['p95_ms']:>8} "
+                  f"{row['wire_bytes']:>8} {row['body_bytes']:>8}")
+    results["cache"] = lesson_responses.stats()
+    print(f"hit ratio {results['cache']['hit_ratio']}, "
+          f"saved {results['cache']['bytes_saved_compression']} B by compression, "
+          f"{results['cache']['bytes_saved_not_modified']} B by 304s")
+    print(f"saved {save_results('lesson_cache', results)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+# backend/benchmarks/bench_live.py
+"""Per-chunk cost of live (incremental) alignment against passage length.
+
+Streams a reading with errors into LiveAlignment in speech-recognition-sized
+chunks. Cost per chunk should stay flat as the passage grows, while
+re-scoring the whole transcript after every chunk grows with it.
+
+Run from backend/:  python -m benchmarks.bench_live
+"""
+import time
+
+from app.ai_utils import LessonReference, LiveAlignment, calculate_accuracy
+from benchmarks.bench_alignment import make_reading
+
+CHUNK_WORDS = 6
+
+
+def chunks_of(text: str, size: int = CHUNK_WORDS):
+    words = text.split()
+    return [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+
+def main():
+    print(f"{'words':>7} {'chunks':>7} {'live us/chunk':>14} {'rescore us/chunk':>17} "
+          f"{'live acc':>9} {'batch acc':>10}")
+    for n_words in (100, 1000, 5000, 20000):
+        reference_text, spoken_text = make_reading(n_words)
+        reference = LessonReference(1, reference_text)
+        chunks = chunks_of(spoken_text)
+
+        live = LiveAlignment(reference)
+        started = time.perf_counter()
+        for chunk in chunks:
+            live.feed(chunk)
+        live_us = (time.perf_counter() - started) / len(chunks) * 1e6
+        live_accuracy = live.result()["accuracy"]
+
+        # the naive alternative: score everything heard so far after each chunk
+        sample = range(1, len(chunks) + 1, max(1, len(chunks) // 20))
+        started = time.perf_counter()
+        for upto in sample:
+            calculate_accuracy(" ".join(chunks[:upto]), reference)
+        rescore_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+        batch_accuracy = calculate_accuracy(spoken_text, reference)["accuracy"]
+        print(f"{n_words:>7} {len(chunks):>7} {live_us:>14.0f} {rescore_us:>17.0f} "
+              f"{live_accuracy:>9.2f} {batch_accuracy:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# backend/benchmarks/bench_load.py
+"""End-to-end load test against a real uvicorn server.
+
+Seeds a throwaway SQLite database with USERS students, LESSONS passages and
+SESSIONS past reading sessions (plus their progress summaries), starts the
+API in a subprocess and drives it from VUS virtual users for DURATION
+seconds. Each virtual user signs in once, then loops over a weighted mix:
+
+    signup 5% | login 10% | lesson list 35% | session submit 30% | progress 20%
+
+where progress is /parents/{id}/progress or /users/me, half and half.
+
+Throughput and p50/p95/p99 per action (after a warm-up) go to stdout and
+benchmarks/results/load-<commit>.json.
+
+Run from backend/:  python -m benchmarks.bench_load [--vus N] [--duration S] [--server-workers N]
+"""
+import os
+
+from benchmarks.common import free_port, save_results, summarize_ms, use_temp_database
+
+db_path = use_temp_database("load.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "10")  # override with 12 to match production
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from app.aggregates import backfill
+from app.auth import get_password_hash
+from app.db import engine, init_db
+from benchmarks.bench_alignment import VOCAB, WEIGHTS
+
+USERS = 500
+LESSONS = 300
+SESSIONS = 20_000
+PASSWORD = "reading-is-fun"
+LEVELS = ["basic", "intermediate", "advanced"]
+MIX = {"signup": 5, "login": 10, "lesson_list": 35, "session_submit": 30, "progress": 20}
+WARMUP = 3.0
+
+
+# --- seeding ---
+def email(i: int) -> str:
+    return f"student{i}@bench-school.org"
+
+
+def passage(rng: random.Random) -> str:
+    words = rng.choices(VOCAB, weights=WEIGHTS, k=rng.randint(40, 250))
+    return " ".join(words).capitalize() + "."
+
+
+def spoken_version(content: str, rng: random.Random) -> str:
+    words = content.rstrip(".").lower().split()
+    return " ".join(w for w in words if rng.random() > 0.08)
+
+
+async def seed():
+    await init_db()
+    await engine.dispose()
+    rng = random.Random(7)
+    hashed = get_password_hash(PASSWORD)  # one bcrypt hash shared by every seeded user
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO user (id, email, hashed_password, role, progress, created_at) "
+        "VALUES (?, ?, ?, 'student', '{}', '2025-01-01 00:00:00')",
+        [(i, email(i), hashed) for i in range(1, USERS + 1)],
+    )
+    lessons = [(i, f"Lesson {i}", passage(rng), LEVELS[i % 3]) for i in range(1, LESSONS + 1)]
+    conn.executemany(
+        "INSERT INTO lesson (id, title, content, reading_level, created_at) "
+        "VALUES (?, ?, ?, ?, '2025-01-01 00:00:00')", lessons,
+    )
+    conn.executemany(
+        "INSERT INTO readingsession (user_id, lesson_id, spoken_text, wpm, accuracy, errors, recommendations, "
+        "created_at) VALUES (?, ?, '', ?, ?, '[]', '{}', ?)",
+        [(rng.randint(1, USERS), rng.randint(1, LESSONS), rng.randint(30, 160), round(rng.uniform(40, 100), 2),
+          f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00") for _ in range(SESSIONS)],
+    )
+    conn.commit()
+    conn.close()
+    await backfill()
+    await engine.dispose()
+    return {lesson_id: content for lesson_id, _, content, _ in lessons}
+
+
+# --- server ---
+def start_server(port: int, workers: int):
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--workers", str(workers)]
+    return subprocess.Popen(command, cwd=Path(__file__).resolve().parent.parent, env=os.environ.copy())
+
+
+async def wait_until_up(client, process, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+# --- load ---
+async def virtual_user(client, vu: int, lessons: dict, deadline: float, record):
+    rng = random.Random(1000 + vu)
+    user_id = vu % USERS + 1
+    actions, weights = list(MIX), list(MIX.values())
+    lesson_ids = list(lessons)
+
+    async def login(user):
+        return await client.post("/auth/login", data={"username": email(user), "password": PASSWORD})
+
+    token = (await login(user_id)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    signups = 0
+    while time.monotonic() < deadline:
+        action = rng.choices(actions, weights)[0]
+        started = time.perf_counter()
+        if action == "signup":
+            signups += 1
+            r = await client.post("/auth/signup", json={
+                "email": f"new-{vu}-{signups}@bench-school.org", "password": PASSWORD, "role": "student"})
+        elif action == "login":
+            r = await login(rng.randint(1, USERS))
+        elif action == "lesson_list":
+            level = rng.choice([None, *LEVELS])
+            params = {"limit": 20, "fields": "id,title,reading_level", **({"reading_level": level} if level else {})}
+            r = await client.get("/lessons/", params=params)
+        elif action == "session_submit":
+            lesson_id = rng.choice(lesson_ids)
+            spoken = spoken_version(lessons[lesson_id], rng)
+            r = await client.post("/sessions/", json={
+                "user_id": user_id, "lesson_id": lesson_id, "spoken_text": spoken,
+                "duration": round(len(spoken.split()) / rng.uniform(1.0, 2.5), 2)})
+        elif rng.random() < 0.5:
+            r = await client.get(f"/parents/{user_id}/progress", headers=headers)
+        else:
+            r = await client.get("/users/me", headers=headers)
+        record(action, time.perf_counter() - started, r.status_code)
+
+
+async def run_load(port: int, vus: int, duration: float, lessons: dict):
+    samples = {action: [] for action in MIX}
+    errors = {}
+    measure_from = time.monotonic() + WARMUP
+
+    def record(action, seconds, status):
+        if time.monotonic() < measure_from:
+            return
+        if status >= 400:
+            errors[f"{action}:{status}"] = errors.get(f"{action}:{status}", 0) + 1
+        samples[action].append(seconds)
+
+    limits = httpx.Limits(max_connections=vus + 10, max_keepalive_connections=vus + 10)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+        deadline = time.monotonic() + WARMUP + duration
+        await asyncio.gather(*(virtual_user(client, vu, lessons, deadline, record) for vu in range(vus)))
+        elapsed = time.monotonic() - measure_from
+
+    all_samples = [s for action_samples in samples.values() for s in action_samples]
+    return {
+        "total": {"requests_per_s": round(len(all_samples) / elapsed, 1), **summarize_ms(all_samples)},
+        "actions": {action: {"requests_per_s": round(len(s) / elapsed, 1), **summarize_ms(s)}
+                    for action, s in samples.items()},
+        "errors": errors,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_load")
+    parser.add_argument("--vus", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds, after warm-up")
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--out", help="results file (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    seed_started = time.perf_counter()
+    lessons = await seed()
+    print(f"seeded {USERS} users, {LESSONS} lessons, {SESSIONS} sessions in {time.perf_counter() - seed_started:.1f}s")
+
+    port = free_port()
+    server = start_server(port, args.server_workers)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            await wait_until_up(client, server)
+        results = await run_load(port, args.vus, args.duration, lessons)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    results["config"] = {"vus": args.vus, "duration_s": args.duration, "server_workers": args.server_workers,
+                         "bcrypt_rounds": int(os.environ["BCRYPT_ROUNDS"]), "users": USERS, "lessons": LESSONS,
+                         "seeded_sessions": SESSIONS}
+    print(f"{'action':<16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in [*results["actions"].items(), ("total", results["total"])]:
+        print(f"{name:<16} {row['requests_per_s']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+    if results["errors"]:
+        print(f"errors: {results['errors']}")
+    print(f"saved {save_results('load', results, args.out)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
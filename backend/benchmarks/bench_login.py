@@ -0,0 +1,87 @@
+# backend/benchmarks/bench_login.py
+"""Login latency with bcrypt on the event loop vs. on the hashing executor.
+
+Fires CONCURRENCY logins at once (a class signing in together) while a probe
+keeps hitting /health, all against one in-process event loop.
+
+Run from backend/:  python -m benchmarks.bench_login
+"""
+import os
+
+from benchmarks.common import use_temp_database, summarize_ms
+
+use_temp_database()
+# Cost factor under test; override with BCRYPT_ROUNDS=12 to match production.
+os.environ.setdefault("BCRYPT_ROUNDS", "10")
+
+import asyncio
+import time
+
+import httpx
+
+from app.config import settings
+from app.main import app
+
+USERS = 20
+CONCURRENCY = 50
+
+
+async def seed(client):
+    for i in range(USERS):
+        r = await client.post("/auth/signup", json={
+            "email": f"student{i}@bench-school.org", "password": "reading-is-fun", "role": "student",
+        })
+        r.raise_for_status()
+
+
+async def run_round(client):
+    login_times, probe_times = [], []
+    done = asyncio.Event()
+
+    async def login(i):
+        start = time.perf_counter()
+        r = await client.post("/auth/login", data={
+            "username": f"student{i % USERS}@bench-school.org", "password": "reading-is-fun",
+        })
+        r.raise_for_status()
+        login_times.append(time.perf_counter() - start)
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            probe_times.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return {
+        "logins_per_s": round(CONCURRENCY / elapsed, 1),
+        "login": summarize_ms(login_times),
+        "health_probe": summarize_ms(probe_times),
+    }
+
+
+async def main():
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await seed(client)
+            for mode, enabled in (("inline", False), ("executor", True)):
+                settings.HASH_EXECUTOR_ENABLED = enabled
+                results[mode] = await run_round(client)
+    return results
+
+
+if __name__ == "__main__":
+    results = asyncio.run(main())
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS}, {CONCURRENCY} concurrent logins")
+    for mode, row in results.items():
+        print(f"{mode:>9}: {row['logins_per_s']:>7} logins/s  "
+              f"login p50={row['login']['p50_ms']}ms p99={row['login']['p99_ms']}ms  "
+              f"/health p99={row['health_probe']['p99_ms']}ms")
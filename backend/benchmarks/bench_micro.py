@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_micro.py
+"""Microbenchmarks for the per-request hot paths.
+
+- ai_utils.calculate_accuracy over passage sizes, against raw lesson text
+  and a precompiled LessonReference
+- auth.decode_token, and the cached decode used by the dependencies
+- performance_model.predict_performance
+
+Every call is timed on its own, so the percentiles show jitter as well as
+the mean. Results go to benchmarks/results/micro-<commit>.json.
+
+Run from backend/:  python -m benchmarks.bench_micro [--quick] [--out FILE]
+"""
+from benchmarks.common import use_temp_database, save_results, summarize_us
+
+use_temp_database()
+
+import argparse
+import gc
+import time
+from datetime import timedelta
+
+from app.ai_utils import LessonReference, calculate_accuracy
+from app.auth import create_access_token, decode_token
+from app.dependencies import decode_cached_token
+from app.performance_model import predict_performance, registry
+from benchmarks.bench_alignment import make_reading
+
+PASSAGE_WORDS = (50, 200, 1000, 5000)
+
+
+def measure(fn, iterations: int, warmup: int = 20):
+    for _ in range(min(warmup, iterations)):
+        fn()
+    samples = []
+    gc.disable()  # keep collector pauses out of single-call timings
+    try:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+    finally:
+        gc.enable()
+    return {"ops_per_s": round(iterations / elapsed, 1), **summarize_us(samples)}
+
+
+def bench_scoring(scale: float):
+    results = {}
+    for words in PASSAGE_WORDS:
+        reference_text, spoken_text = make_reading(words)
+        reference = LessonReference(1, reference_text)
+        iterations = max(5, int(scale * 200_000 / words))
+        results[f"{words}_words"] = {
+            "raw_text": measure(lambda: calculate_accuracy(spoken_text, reference_text), iterations),
+            "compiled_reference": measure(lambda: calculate_accuracy(spoken_text, reference), iterations),
+        }
+    return results
+
+
+def bench_tokens(scale: float):
+    token = create_access_token(subject="42", role="student", expires_delta=timedelta(hours=1))
+    iterations = int(scale * 20_000)
+    return {
+        "decode_token": measure(lambda: decode_token(token), iterations),
+        "decode_cached_token": measure(lambda: decode_cached_token(token), iterations),
+    }
+
+
+def bench_prediction(scale: float):
+    registry.load()
+    iterations = int(scale * 100_000)
+    return {"predict_performance": measure(lambda: predict_performance(85, 2), iterations)}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_micro")
+    parser.add_argument("--quick", action="store_true", help="a tenth of the iterations")
+    parser.add_argument("--out", help="results file (default benchmarks/results/micro-<commit>.json)")
+    args = parser.parse_args()
+    scale = 0.1 if args.quick else 1.0
+
+    results = {"calculate_accuracy": bench_scoring(scale), **bench_tokens(scale), **bench_prediction(scale)}
+
+    print(f"{'benchmark':<48} {'ops/s':>10} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    rows = [(f"calculate_accuracy {size} {kind}", row)
+            for size, kinds in results["calculate_accuracy"].items() for kind, row in kinds.items()]
+    rows += [(name, row) for name, row in results.items() if name != "calculate_accuracy"]
+    for name, row in rows:
+        print(f"{name:<48} {row['ops_per_s']:>10} {row['p50_us']:>9} {row['p95_us']:>9} {row['p99_us']:>9}")
+    print(f"saved {save_results('micro', results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# backend/benchmarks/bench_search.py
+"""Lesson search latency over a large corpus.
+
+Seeds LESSONS lessons (Zipf-distributed vocabulary, so some words are in
+nearly every lesson and most are rare) through the normal insert path, so
+the FTS triggers build the index, then times app.search.search_lessons for
+several query shapes: a rare word, a common word, two words, a prefix
+still being typed, each with and without a reading-level filter. A LIKE
+scan over title and content, which is what search would cost without the
+index, is timed for comparison.
+
+Exits non-zero if any query's p95 is over the budget (P95_BUDGET_MS by
+default). Each result also records whether its ranking was approximate
+(more matches than app.search.MAX_RANKED).
+
+Run from backend/:  python -m benchmarks.bench_search [--lessons N] [--budget-ms MS] [--out FILE]
+"""
+from benchmarks.common import save_results, summarize_ms, use_temp_database
+
+db_path = use_temp_database("search.db")
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+
+from app.db import async_session_factory, engine, init_db
+from app.search import search_lessons
+from benchmarks.bench_alignment import VOCAB, WEIGHTS
+
+LESSONS = 100_000
+ITERATIONS = 200
+P95_BUDGET_MS = 10.0
+LEVELS = ["basic", "intermediate", "advanced"]
+TOPICS = ["fox", "ocean", "rocket", "garden", "volcano", "castle", "dinosaur", "rainbow", "robot", "jungle"]
+
+
+def seed(lessons: int):
+    rng = random.Random(11)
+
+    def rows():
+        for i in range(1, lessons + 1):
+            topic = rng.choice(TOPICS)
+            words = rng.choices(VOCAB, weights=WEIGHTS, k=rng.randint(60, 200))
+            words[rng.randrange(len(words))] = topic
+            yield (i, f"The {topic} {rng.choice(VOCAB)} {i}", " ".join(words), rng.choice(LEVELS),
+                   rng.randint(1, 50))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = OFF")  # creator ids don't need real users here
+    started = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO lesson (id, title, content, reading_level, creator_id, created_at) "
+        "VALUES (?, ?, ?, ?, ?, '2025-01-01 00:00:00')", rows(),
+    )
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    conn.execute("ANALYZE")
+    conn.close()
+    return elapsed
+
+
+def queries():
+    common, mid, rare = VOCAB[0], VOCAB[40], VOCAB[-1]
+    return {
+        "rare_word": {"q": rare},
+        "topic_word": {"q": "volcano"},
+        "common_word": {"q": common},
+        "two_words": {"q": f"dinosaur {mid}"},
+        "prefix": {"q": "rainb"},
+        "topic_word_by_level": {"q": "volcano", "reading_level": "advanced"},
+        "common_word_by_level": {"q": common, "reading_level": "basic"},
+        "topic_word_by_creator": {"q": "robot", "creator_id": 7},
+        "no_match": {"q": "zzzzyzzy"},
+    }
+
+
+async def time_query(params: dict, iterations: int):
+    samples, count, approximate = [], 0, False
+    async with async_session_factory() as session:
+        for _ in range(5):
+            await search_lessons(session, **params)
+        for _ in range(iterations):
+            started = time.perf_counter()
+            rows, _, approximate = await search_lessons(session, limit=20, **params)
+            samples.append(time.perf_counter() - started)
+            count = len(rows)
+    return {"results": count, "approximate": approximate, **summarize_ms(samples)}
+
+
+def time_like_scan(term: str, iterations: int = 5):
+    conn = sqlite3.connect(db_path)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        conn.execute("SELECT id FROM lesson WHERE title LIKE ? OR content LIKE ? LIMIT 20 OFFSET 100000",
+                     (f"%{term}%", f"%{term}%")).fetchall()
+        samples.append(time.perf_counter() - started)
+    conn.close()
+    return summarize_ms(samples)
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_search")
+    parser.add_argument("--lessons", type=int, default=LESSONS)
+    parser.add_argument("--budget-ms", type=float, default=P95_BUDGET_MS, help="p95 budget per query")
+    parser.add_argument("--out", help="results file (default benchmarks/results/search-<commit>.json)")
+    args = parser.parse_args()
+
+    await init_db()
+    await engine.dispose()
+    seed_seconds = seed(args.lessons)
+    print(f"indexed {args.lessons} lessons in {seed_seconds:.1f}s ({args.lessons / seed_seconds:.0f}/s)")
+
+    results = {"lessons": args.lessons, "insert_with_index_per_s": round(args.lessons / seed_seconds, 1),
+               "p95_budget_ms": args.budget_ms, "queries": {}}
+    print(f"{'query':<24} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  ranking")
+    try:
+        for name, params in queries().items():
+            row = results["queries"][name] = await time_query(params, ITERATIONS)
+            ranking = "approximate" if row["approximate"] else "exact"
+            print(f"{name:<24} {row['results']:>5} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}  {ranking}")
+    finally:
+        await engine.dispose()
+    # the OFFSET forces the scan to read every row, as an unindexed ranked search would
+    results["like_scan"] = time_like_scan("volcano")
+    print(f"{'LIKE scan (no index)':<24} {'':>5} {results['like_scan']['p50_ms']:>8}")
+    print(f"saved {save_results('search', results, args.out)}")
+
+    over = [name for name, row in results["queries"].items() if row["p95_ms"] > args.budget_ms]
+    if over:
+        print(f"p95 over {args.budget_ms} ms: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
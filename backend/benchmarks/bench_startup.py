@@ -0,0 +1,132 @@
+# backend/benchmarks/bench_startup.py
+"""Cold-start cost of the API process.
+
+Import profile: `python -X importtime -c "import app.main"` in fresh
+interpreters, RUNS times; the median total is reported with the slowest
+top-level packages and app modules of the median run. Importing app.main
+must not pull in any of LAZY_MODULES (they load during warm-up, see
+app.startup); if one shows up the run says so and exits with status 1.
+
+Cold start: a uvicorn subprocess is started RUNS times and /health and
+/ready polled until they answer 200, giving time-to-live and time-to-ready.
+
+Run from backend/:  python -m benchmarks.bench_startup [--runs N]
+"""
+from benchmarks.common import free_port, save_results, use_temp_database
+
+use_temp_database("startup.db")
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("sklearn", "scipy", "joblib", "google.generativeai")
+TOP = 10
+
+
+# --- import profile ---
+def parse_importtime(stderr: str):
+    """[(module, self_us, cumulative_us)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_import():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def summarize_import(rows):
+    packages = {}
+    for module, self_us, _ in rows:
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    app_modules = sorted(((m, c) for m, _, c in rows if m.startswith("app.")), key=lambda r: -r[1])
+    return {
+        "import_ms": round(next(c for m, _, c in rows if m == "app.main") / 1000, 1),
+        "modules": len(rows),
+        "packages_ms": {p: round(us / 1000, 1) for p, us in sorted(packages.items(), key=lambda r: -r[1])[:TOP]},
+        "app_modules_ms": {m: round(us / 1000, 1) for m, us in app_modules[:TOP]},
+        "lazy_modules_imported": [lazy for lazy in LAZY_MODULES
+                                  if any(m == lazy or m.startswith(lazy + ".") for m, _, _ in rows)],
+    }
+
+
+# --- cold start ---
+def cold_start():
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning"]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=os.environ.copy())
+    timings = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            deadline = started + 60
+            while "ready_ms" not in timings:
+                if process.poll() is not None:
+                    raise RuntimeError(f"server exited with {process.returncode}")
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"not ready after 60s: {timings}")
+                for path, key in (("/health", "health_ms"), ("/ready", "ready_ms")):
+                    if key in timings:
+                        continue
+                    try:
+                        if client.get(path).status_code == 200:
+                            timings[key] = round((time.perf_counter() - started) * 1000, 1)
+                    except httpx.TransportError:
+                        break
+                time.sleep(0.02)
+            timings["steps"] = client.get("/ready").json()["steps"]
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return timings
+
+
+def main(runs: int):
+    profiles = [summarize_import(profile_import()) for _ in range(runs)]
+    median = sorted(profiles, key=lambda p: p["import_ms"])[len(profiles) // 2]
+    starts = [cold_start() for _ in range(runs)]
+    results = {
+        "import": {**median, "import_ms": statistics.median(p["import_ms"] for p in profiles)},
+        "cold_start": {
+            "health_ms": statistics.median(s["health_ms"] for s in starts),
+            "ready_ms": statistics.median(s["ready_ms"] for s in starts),
+            "steps": starts[len(starts) // 2]["steps"],
+        },
+    }
+
+    imported = results["import"]
+    print(f"import app.main: {imported['import_ms']} ms median of {runs}, {imported['modules']} modules")
+    print("  slowest packages (self ms): " + ", ".join(f"{p} {ms}" for p, ms in imported["packages_ms"].items()))
+    print("  slowest app modules (cumulative ms): "
+          + ", ".join(f"{m} {ms}" for m, ms in imported["app_modules_ms"].items()))
+    start = results["cold_start"]
+    print(f"cold start: /health after {start['health_ms']} ms, /ready after {start['ready_ms']} ms")
+    for name, step in start["steps"].items():
+        print(f"  {name}: {step['status']} {step.get('ms', '')} ms")
+    print(f"saved {save_results('startup', results)}")
+    if imported["lazy_modules_imported"]:
+        print(f"REGRESSION: importing app.main now imports {', '.join(imported['lazy_modules_imported'])}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    sys.exit(main(parser.parse_args().runs))
@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_training.py
+"""Time and memory of the performance model retraining job.
+
+Seeds SESSIONS synthetic reading sessions (accuracy loosely driven by wpm
+and lesson level) into a temporary SQLite database, then runs the training
+pipeline without publishing. Peak RSS should stay flat as SESSIONS grows.
+
+Run from backend/:  python -m benchmarks.bench_training [sessions]
+"""
+from benchmarks.common import use_temp_database
+
+db_path = use_temp_database("training.db")
+
+import asyncio
+import json
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from app.db import engine, init_db
+from app.performance_training import train
+
+SESSIONS = 1_000_000
+LESSONS = 300
+SEED_CHUNK = 100_000
+LEVELS = ["basic", "intermediate", "advanced"]
+
+
+def seed(sessions: int):
+    rng = np.random.default_rng(7)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO user (id, email, hashed_password, role, progress, created_at) "
+                 "VALUES (1, 'bench@bench-school.org', 'x', 'student', '{}', '2025-01-01 00:00:00')")
+    conn.executemany(
+        "INSERT INTO lesson (id, title, content, reading_level, created_at) VALUES (?, ?, '', ?, '2025-01-01 00:00:00')",
+        [(i, f"Lesson {i}", LEVELS[i % 3]) for i in range(1, LESSONS + 1)],
+    )
+    for start in range(0, sessions, SEED_CHUNK):
+        n = min(SEED_CHUNK, sessions - start)
+        lesson_ids = rng.integers(1, LESSONS + 1, n)
+        difficulty = lesson_ids % 3 + 1
+        wpm = rng.normal(80, 25, n).clip(5, 200).round()
+        accuracy = (40 + 0.5 * wpm - 8 * difficulty + rng.normal(0, 10, n)).clip(0, 100)
+        conn.executemany(
+            "INSERT INTO readingsession (user_id, lesson_id, spoken_text, wpm, accuracy, errors, recommendations, "
+            "created_at) VALUES (1, ?, '', ?, ?, '[]', '{}', '2025-01-01 00:00:00')",
+            zip(lesson_ids.tolist(), wpm.astype(int).tolist(), accuracy.tolist()),
+        )
+    conn.commit()
+    conn.close()
+
+
+async def main(sessions: int):
+    await init_db()
+    started = time.perf_counter()
+    seed(sessions)
+    seed_s = time.perf_counter() - started
+    try:
+        model, report = await train()
+    finally:
+        await engine.dispose()
+    report["seed_s"] = round(seed_s, 2)
+    report["coef"] = model.coef_.round(4).tolist() if model is not None else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else SESSIONS))
@@ -0,0 +1,87 @@
+# backend/benchmarks/common.py
+"""Helpers shared by the benchmark scripts."""
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def use_temp_database(name: str = "bench.db") -> str:
+    """Point the app at a throwaway SQLite file. Call before importing app.*"""
+    path = os.path.join(tempfile.mkdtemp(prefix="lexilearn-bench-"), name)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    return path
+
+
+def percentile(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def summarize_ms(samples):
+    """p50/p95/p99/max of a list of durations in seconds, reported in ms."""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+def summarize_us(samples):
+    """The same percentiles in microseconds, for calls well under a millisecond."""
+    return {
+        "count": len(samples),
+        "p50_us": round(percentile(samples, 50) * 1e6, 2),
+        "p95_us": round(percentile(samples, 95) * 1e6, 2),
+        "p99_us": round(percentile(samples, 99) * 1e6, 2),
+        "max_us": round(max(samples) * 1e6, 2) if samples else 0.0,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(name: str, results: dict, path: str = None) -> Path:
+    """Write results with the commit and machine they came from.
+
+    Defaults to benchmarks/results/<name>-<commit>.json; compare two runs
+    with `python -m benchmarks.compare old.json new.json`.
+    """
+    commit = git_commit()
+    document = {
+        "benchmark": name,
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    path = Path(path) if path else RESULTS_DIR / f"{name}-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2))
+    return path
@@ -0,0 +1,76 @@
+# backend/benchmarks/compare.py
+"""Compare two saved benchmark runs.
+
+    python -m benchmarks.compare results/micro-abc1234.json results/micro-def5678.json
+
+Every numeric result whose key ends in _ms or _us (lower is better) or
+_per_s (higher is better) is printed with its change; changes worse than
+--threshold percent are marked REGRESSION and make the exit status 1, so
+the command can gate a CI step.
+"""
+import argparse
+import json
+import sys
+
+LOWER_IS_BETTER = ("_ms", "_us")
+HIGHER_IS_BETTER = ("_per_s",)
+
+
+def flatten(tree, prefix=""):
+    for key, value in tree.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def direction(path: str):
+    if path.endswith(LOWER_IS_BETTER):
+        return -1
+    if path.endswith(HIGHER_IS_BETTER):
+        return 1
+    return 0
+
+
+def compare(old: dict, new: dict, threshold: float):
+    old_values = dict(flatten(old["results"]))
+    rows = []
+    for path, value in flatten(new["results"]):
+        sign = direction(path)
+        if not sign or path not in old_values:
+            continue
+        before = old_values[path]
+        change = (value - before) / before * 100 if before else 0.0
+        regression = -sign * change > threshold
+        rows.append((path, before, value, change, regression))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if old.get("benchmark") != new.get("benchmark"):
+        print(f"warning: comparing {old.get('benchmark')} with {new.get('benchmark')}")
+    print(f"{old.get('commit')} ({old.get('timestamp')}) -> {new.get('commit')} ({new.get('timestamp')})")
+
+    rows = compare(old, new, args.threshold)
+    width = max((len(path) for path, *_ in rows), default=10)
+    for path, before, after, change, regression in rows:
+        flag = "  REGRESSION" if regression else ""
+        print(f"{path:<{width}} {before:>12} {after:>12} {change:>+8.1f}%{flag}")
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{len(rows)} compared, {regressions} regressed by more than {args.threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
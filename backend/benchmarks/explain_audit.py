@@ -0,0 +1,233 @@
+# backend/benchmarks/explain_audit.py
+"""EXPLAIN every query the app issues against a seeded SQLite database.
+
+The statements aren't written out here: each step calls a real route (or
+the job queue) and every SELECT/UPDATE/DELETE it sends to the database is
+captured and explained with its actual parameters, so a new or changed
+query in a router is audited without touching this file.
+
+A plan fails the audit if it scans a whole table or sorts in a temp
+B-tree. The few steps that must do one (an unfiltered export reads every
+row; search ranks its matches) name the plan step they expect and why;
+anything else in their plans still fails. Exits non-zero on any failure,
+so it can run in CI next to the benchmarks.
+
+Run from backend/:  python -m benchmarks.explain_audit
+"""
+from benchmarks.common import use_temp_database
+
+use_temp_database("audit.db")
+
+import os
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import event, insert, text
+from sqlmodel import SQLModel
+
+from app.aggregates import backfill
+from app.auth import create_access_token
+from app.db import engine, init_db
+from app.jobs import job_queue
+from app.main import app
+from app.models import User, Lesson, ReadingSession, ParentStudentLink, Job
+
+USERS = 500
+LESSONS = 2000
+SESSIONS = 20000
+DONE_JOBS = 20000
+
+STUDENT, TEACHER, PARENT = 7, 50, 1
+WORDS = ["cat", "sat", "mat", "dog", "ran", "sun", "hat", "big", "red", "fox"]
+PROFILE = {"words": [{"word": "the", "start": 0.0, "end": 0.3}, {"word": "cat", "start": 0.4, "end": 0.8},
+                     {"word": "sat", "start": 0.9, "end": 1.2}]}
+
+
+async def seed():
+    rng = random.Random(3)
+    start = datetime(2025, 1, 1)
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {"id": i, "email": f"user{i}@bench-school.org", "hashed_password": "x",
+             "role": "teacher" if i % 25 == 0 else "student", "progress": {}, "created_at": start}
+            for i in range(1, USERS + 1)
+        ])
+        await conn.execute(insert(Lesson), [
+            {"id": i, "title": f"Lesson {i}", "content": " ".join(rng.choices(WORDS, k=120)),
+             "reading_level": rng.choice(["basic", "intermediate", "advanced"]),
+             "creator_id": rng.randrange(25, USERS + 1, 25), "created_at": start}
+            for i in range(1, LESSONS + 1)
+        ])
+        await conn.execute(insert(ReadingSession), [
+            {"user_id": rng.randint(1, USERS), "lesson_id": rng.randint(1, LESSONS),
+             "spoken_text": "the cat sat", "wpm": rng.randint(20, 120), "accuracy": rng.random() * 100,
+             "errors": [], "recommendations": {}, "created_at": start + timedelta(minutes=i)}
+            for i in range(SESSIONS)
+        ])
+        await conn.execute(insert(ParentStudentLink), [
+            {"parent_id": i, "student_id": i + 1} for i in range(1, USERS, 2)
+        ])
+        await conn.execute(insert(Job), [
+            {"kind": "audit.done", "idempotency_key": f"audit:{i}", "payload": {}, "status": "done", "attempts": 1,
+             "run_at": start, "created_at": start, "started_at": start, "finished_at": start}
+            for i in range(DONE_JOBS)
+        ])
+    await backfill()
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+def token(user_id: int, role: str):
+    return {"Authorization": f"Bearer {create_access_token(str(user_id), role)}"}
+
+
+def request(method, path, allow=None, **kwargs):
+    async def step(client):
+        response = await client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path}: {response.status_code} {response.text[:200]}")
+    step.allow = allow
+    return step
+
+
+def call(fn, allow=None):
+    async def step(client):
+        await fn()
+    step.allow = allow
+    return step
+
+
+def steps():
+    """(name, step) in order; a step's `allow` is (plan fragment, why) or None."""
+    student, teacher, parent = token(STUDENT, "student"), token(TEACHER, "teacher"), token(PARENT, "student")
+    session = {"user_id": STUDENT, "lesson_id": 42, "spoken_text": "the cat sat on the mat"}
+    return [
+        ("auth.signup", request("POST", "/auth/signup", json={
+            "email": "audit@bench-school.org", "password": "audit-pw", "role": "student"})),
+        ("auth.login", request("POST", "/auth/login", data={
+            "username": "audit@bench-school.org", "password": "audit-pw"})),
+        # before anything fills the user cache for STUDENT
+        ("users.me", request("GET", "/users/me", headers=student)),
+        ("auth.me", request("GET", "/auth/me", headers=student)),
+        ("users.progress", request("POST", "/users/progress", headers=student, json={"progress": {"7": "done"}})),
+        # walks the primary key and stops at the LIMIT
+        ("lessons.list first page", request("GET", "/lessons/", allow=("SCAN lesson", "primary key order, LIMIT"))),
+        ("lessons.list next page", request("GET", "/lessons/", params={"cursor": 500})),
+        ("lessons.list by level", request("GET", "/lessons/", params={"reading_level": "basic"})),
+        ("lessons.list by creator", request("GET", "/lessons/", params={"creator_id": 50, "cursor": 100})),
+        ("lessons.list ndjson", request("GET", "/lessons/", params={"format": "ndjson", "cursor": 1000,
+                                                                    "fields": "id,title"})),
+        ("lessons.search", request("GET", "/lessons/search", params={"q": "cat sat"},
+                                   allow=("USE TEMP B-TREE FOR ORDER BY", "ranks at most MAX_RANKED matches"))),
+        ("lessons.search by level", request("GET", "/lessons/search", params={"q": "dog", "reading_level": "basic"},
+                                            allow=("USE TEMP B-TREE FOR ORDER BY", "ranks at most MAX_RANKED matches"))),
+        ("lessons.get", request("GET", "/lessons/42")),
+        ("lessons.stats", request("GET", "/lessons/42/stats")),
+        ("lessons.update", request("PUT", "/lessons/43", json={"title": "Lesson 43, revised"})),
+        ("lessons.export", request("GET", "/lessons/export", allow=("SCAN lesson", "exports every row"))),
+        ("lessons.export by level", request("GET", "/lessons/export", params={"reading_level": "advanced"})),
+        ("sessions.create", request("POST", "/sessions/", json={**session, **PROFILE})),
+        ("sessions.batch", request("POST", "/sessions/batch", json={"items": [session, {**session, "lesson_id": 7}]})),
+        ("jobs.claim and run", call(job_queue.run_one)),
+        ("jobs.depth", call(job_queue.depth)),
+        ("jobs.purge", call(lambda: job_queue.purge(older_than=0))),
+        ("sessions.by user first page", request("GET", f"/sessions/user/{STUDENT}")),
+        ("sessions.by user next page", request("GET", f"/sessions/user/{STUDENT}", params={"cursor": 1000})),
+        ("sessions.get", request("GET", "/sessions/42")),
+        ("sessions.export", request("GET", "/sessions/export", headers=teacher,
+                                    allow=("SCAN readingsession USING INDEX", "exports every row"))),
+        ("sessions.export by user", request("GET", "/sessions/export", headers=teacher,
+                                            params={"user_id": STUDENT, "since": "2025-01-03T00:00:00"})),
+        ("sessions.export by lesson", request("GET", "/sessions/export", headers=teacher, params={"lesson_id": 42})),
+        ("sessions.export since", request("GET", "/sessions/export", headers=teacher,
+                                          params={"since": "2025-01-10T00:00:00"})),
+        ("parents.students", request("GET", f"/parents/{PARENT}/students", headers=parent)),
+        # a linked parent, so the link lookup is audited too
+        ("parents.progress", request("GET", f"/parents/{PARENT + 1}/progress", headers=parent)),
+    ]
+
+
+def is_full_scan(detail: str) -> bool:
+    # "SCAN lesson" reads the whole table, "SCAN x USING (COVERING) INDEX" the whole index;
+    # scans of subquery results ("SCAN c") and FTS MATCH lookups ("SCAN lesson_fts VIRTUAL
+    # TABLE INDEX 0:M...") are bounded by the query itself
+    words = detail.split()
+    if words[0] != "SCAN" or "VIRTUAL TABLE" in detail and ":M" in detail:
+        return False
+    return words[1] in SQLModel.metadata.tables or words[1].endswith("_fts")
+
+
+def is_problem(detail: str) -> bool:
+    return is_full_scan(detail) or "TEMP B-TREE" in detail
+
+
+def capture():
+    """Start recording the statements the engine executes; returns the list they go to."""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if not executemany and verb in ("SELECT", "WITH", "UPDATE", "DELETE") and "EXPLAIN" not in statement:
+            captured.append((statement, tuple(parameters or ())))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    return captured, lambda: event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def explain(statements):
+    plans = []
+    async with engine.connect() as conn:
+        for statement, params in dict.fromkeys(statements):
+            plan = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params)).all()
+            plans.append((statement, [row[-1] for row in plan]))
+    return plans
+
+
+async def audit():
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://audit") as client:
+        for name, step in steps():
+            captured, stop = capture()
+            try:
+                await step(client)
+            finally:
+                stop()
+            if not captured:
+                print(f"{'-':>9}  {name}: no queries")
+                continue
+            for statement, details in await explain(captured):
+                problems = [d for d in details if is_problem(d)]
+                allowed = [d for d in problems if step.allow and d.startswith(step.allow[0])]
+                if len(allowed) < len(problems):
+                    status = "FAIL"
+                    failures.append(name)
+                else:
+                    status = f"allowed ({step.allow[1]})" if allowed else "ok"
+                summary = " ".join(statement.split())[:110]
+                print(f"{status:>9}  {name}: {' | '.join(details)}\n{'':>11}{summary}")
+    return list(dict.fromkeys(failures))
+
+
+async def main():
+    await init_db()
+    await seed()
+    try:
+        failures = await audit()
+    finally:
+        await engine.dispose()
+    if failures:
+        print(f"\n{len(failures)} steps scan a table or sort in a temp B-tree: {', '.join(failures)}")
+        return 1
+    print("\nNo table scans or temp B-tree sorts.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
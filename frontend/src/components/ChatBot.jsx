@@ -39,15 +39,15 @@ export default function Chatbot() {
         setError(null);
 
         try {
+            // Sent separately so the server can cache replies to standalone questions
             const context = getChatContext();
-            const fullPrompt = `${context}\nuser: ${text}`;
 
-            const resp = await fetch("http://127.0.0.1:8000/chatbot", {
+            const resp = await fetch("http://127.0.0.1:8000/chatbot/stream", {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
                 },
-                body: JSON.stringify({ message: fullPrompt }),
+                body: JSON.stringify({ message: text, context: context || null }),
             });
 
             if (!resp.ok) {
@@ -55,14 +55,35 @@ export default function Chatbot() {
                 throw new Error(errText || `HTTP ${resp.status}`);
             }
 
-            const data = await resp.json();
-            const botMsg = {
-                id: Date.now() + "-bot",
-                role: "bot",
-                text: data.reply ?? data.message ?? "(no reply)",
-            };
-
-            setMessages((m) => [...m, botMsg]);
+            // Server-sent events: append each partial reply to one bot message as it arrives
+            const botId = Date.now() + "-bot";
+            setMessages((m) => [...m, { id: botId, role: "bot", text: "" }]);
+            const appendToBot = (delta) =>
+                setMessages((m) => m.map((msg) => (msg.id === botId ? { ...msg, text: msg.text + delta } : msg)));
+
+            const reader = resp.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            let gotText = false;
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split("\n\n");
+                buffer = events.pop();
+                for (const raw of events) {
+                    const lines = raw.split("\n");
+                    const event = (lines.find((l) => l.startsWith("event: ")) || "event: message").slice(7);
+                    const dataLine = lines.find((l) => l.startsWith("data: "));
+                    const data = dataLine ? JSON.parse(dataLine.slice(6)) : {};
+                    if (event === "error") throw new Error(data.detail || "Chatbot error");
+                    if (data.delta) {
+                        gotText = true;
+                        appendToBot(data.delta);
+                    }
+                }
+            }
+            if (!gotText) appendToBot("(no reply)");
         } catch (err) {
             console.error("Chatbot error:", err);
             setError(err.message || "An error occurred");
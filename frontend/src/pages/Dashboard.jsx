@@ -44,8 +44,10 @@ export default function Dashboard() {
 
     const fetchSessions = async () => {
       try {
-        const res = await API.get(`/sessions/user/${userId}`);
-        setSessions(res.data.sessions || []);
+        const allSessions = await API.getAll(`/sessions/user/${userId}`, "sessions", {
+          params: { fields: "lesson_id,accuracy,wpm,created_at" },
+        });
+        setSessions(allSessions);
       } catch (err) {
         console.error("Error fetching sessions:", err);
       } finally {
@@ -61,9 +63,11 @@ export default function Dashboard() {
   const avgAccuracy = sessions.length
     ? (sessions.reduce((acc, s) => acc + s.accuracy, 0) / sessions.length).toFixed(1)
     : 0;
-  const avgWPM = sessions.length
-    ? (sessions.reduce((acc, s) => acc + s.wpm, 0) / sessions.length).toFixed(1)
-    : 0;
+  // untimed sessions have no WPM
+  const timed = sessions.filter((s) => s.wpm != null);
+  const avgWPM = timed.length
+    ? (timed.reduce((acc, s) => acc + s.wpm, 0) / timed.length).toFixed(1)
+    : "—";
 
   return (
     <div className="min-h-screen bg-gradient-to-b from-blue-50 via-white to-blue-100 p-6">
@@ -27,8 +27,7 @@ export default function Lessons() {
   useEffect(() => {
     const fetchLessonsAndProgress = async () => {
       try {
-        const res = await API.get("/lessons/");
-        const allLessons = res.data.lessons || [];
+        const allLessons = await API.getAll("/lessons/", "lessons");
         setLessons(allLessons);
 
         // 🎯 Detect new lesson unlock
@@ -45,8 +44,10 @@ export default function Lessons() {
         const payload = decodeJWT(token);
         const userId = payload?.sub || payload?.user_id || payload?.id;
 
-        const sessionRes = await API.get(`/sessions/user/${userId}`);
-        const completedIds = (sessionRes.data.sessions || []).map(
+        const userSessions = await API.getAll(`/sessions/user/${userId}`, "sessions", {
+          params: { fields: "lesson_id" },
+        });
+        const completedIds = userSessions.map(
           (s) => s.lesson_id || s.lessonId
         );
         setCompletedLessons(completedIds);
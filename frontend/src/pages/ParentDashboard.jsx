@@ -15,10 +15,10 @@ export default function ParentDashboard() {
   const [selectedStudent, setSelectedStudent] = useState(null);
   const [progress, setProgress] = useState(null);
 
-  const parentId = 1; // later: use JWT token decoding for actual ID
-
   useEffect(() => {
-    API.get(`/parents/${parentId}/students`)
+    // the routes only answer the signed-in parent, so ask for their own students
+    API.get("/users/me")
+      .then((res) => API.get(`/parents/${res.data.id}/students`))
       .then((res) => setStudents(res.data.students))
       .catch(() => alert("No students linked yet"));
   }, []);
@@ -64,7 +64,7 @@ export default function ParentDashboard() {
             Progress Overview
           </h4>
           <p>Average Accuracy: {progress.avg_accuracy.toFixed(1)}%</p>
-          <p>Average WPM: {progress.avg_wpm.toFixed(1)}</p>
+          <p>Average WPM: {progress.avg_wpm != null ? progress.avg_wpm.toFixed(1) : "—"}</p>
 
           <div className="mt-6">
             <h5 className="font-semibold text-gray-700 mb-2">Session Trend</h5>
@@ -13,11 +13,16 @@ export default function ReadingPractice() {
   const [highlights, setHighlights] = useState([]);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
+  const [live, setLive] = useState(null);
 
   const recognitionRef = useRef(null);
   const startTimeRef = useRef(null);
   const stopTimeRef = useRef(null);
   const debounceRef = useRef(null);
+  const socketRef = useRef(null);
+  // Timed final segments ({text, start, end} in seconds) for fluency metrics
+  const chunksRef = useRef([]);
+  const segmentStartRef = useRef(null);
 
   // --- Utility Helpers ---
   const normalize = (w) =>
@@ -98,6 +103,54 @@ export default function ReadingPractice() {
     return { accuracy, wpm };
   };
 
+  // --- Live scoring over a WebSocket ---
+  const OP_COLORS = { match: "green", substitution: "orange", omission: "red" };
+
+  const liveOpen = () => socketRef.current?.readyState === WebSocket.OPEN;
+
+  const openLiveSession = (userId) => {
+    // browsers can't set an Authorization header on a WebSocket, so the token goes in the URL
+    const token = encodeURIComponent(localStorage.getItem("lexi_token") || "");
+    const socket = API.socket(`/sessions/live?user_id=${userId}&lesson_id=${lessonId}&token=${token}`);
+    socket.onmessage = (event) => {
+      const msg = JSON.parse(event.data);
+      if (msg.type === "ready") {
+        setHighlights(msg.words.map((word) => ({ word, color: "gray" })));
+      } else if (msg.type === "feedback") {
+        setHighlights((prev) => {
+          const next = [...prev];
+          msg.ops.forEach((op) => {
+            const color = OP_COLORS[op.kind];
+            if (color && op.ref_index != null && next[op.ref_index]) {
+              next[op.ref_index] = { ...next[op.ref_index], color };
+            }
+          });
+          return next;
+        });
+        setLive({ wpm: msg.wpm, accuracy: msg.accuracy });
+      } else if (msg.type === "result") {
+        setResult({
+          accuracy: msg.metrics.accuracy,
+          wpm: msg.metrics.wpm,
+          wcpm: msg.metrics.fluency?.wcpm,
+          errors: msg.metrics.errors || [],
+          feedback: msg.metrics.recommendations || "Keep practicing!",
+        });
+      } else if (msg.type === "error") {
+        console.warn("Live session:", msg.detail);
+      }
+    };
+    socket.onclose = () => {
+      if (socketRef.current === socket) socketRef.current = null;
+    };
+    socketRef.current = socket;
+  };
+
+  const sendChunk = (text, start, t) => {
+    if (!liveOpen() || !text.trim()) return;
+    socketRef.current.send(JSON.stringify({ type: "chunk", text, start, t }));
+  };
+
   // --- Fetch Lesson ---
   useEffect(() => {
     if (!lessonId) return;
@@ -139,6 +192,23 @@ export default function ReadingPractice() {
 
       const newTranscript = finalTranscript + " " + final + interim;
 
+      // A segment starts when it is first heard and ends when it is finalized
+      const now = Date.now() - startTimeRef.current;
+      if (segmentStartRef.current === null && (interim || final)) segmentStartRef.current = now;
+      if (final.trim()) {
+        const start = segmentStartRef.current ?? now;
+        chunksRef.current.push({ text: final.trim(), start: start / 1000, end: now / 1000 });
+        segmentStartRef.current = null;
+        sendChunk(final, start, now);
+      }
+
+      // Scored server-side as each segment is finalized
+      if (liveOpen()) {
+        setTranscript(newTranscript.trim());
+        if (final) setFinalTranscript((prev) => (prev + " " + final).trim());
+        return;
+      }
+
       // Debounce highlight updates to reduce lag
       if (debounceRef.current) clearTimeout(debounceRef.current);
       debounceRef.current = setTimeout(() => {
@@ -170,6 +240,12 @@ export default function ReadingPractice() {
       setListening(false);
       stopTimeRef.current = Date.now();
 
+      // The live session answers "end" with the final result
+      if (liveOpen()) {
+        socketRef.current.send(JSON.stringify({ type: "end" }));
+        return;
+      }
+
       // Delay slightly to ensure all speech results are finalized
       setTimeout(() => {
         const combinedText = (finalTranscript || "") + " " + (transcript || "");
@@ -193,6 +269,7 @@ export default function ReadingPractice() {
       } catch (err) {
         console.warn("Recognition stop error:", err);
       }
+      socketRef.current?.close();
     };
   }, [lesson, computeHighlights]);
 
@@ -206,10 +283,16 @@ export default function ReadingPractice() {
     setFinalTranscript("");
     setResult(null);
     setError(null);
+    setLive(null);
+    chunksRef.current = [];
+    segmentStartRef.current = null;
 
     startTimeRef.current = Date.now();
     stopTimeRef.current = null;
 
+    const userId = currentUserId();
+    if (userId) openLiveSession(userId);
+
     try {
       recognition.start();
       setListening(true);
@@ -234,6 +317,8 @@ export default function ReadingPractice() {
     setHighlights([]);
     setResult(null);
     setError(null);
+    setLive(null);
+    chunksRef.current = [];
   };
 
   const decodeJWT = (token) => {
@@ -246,16 +331,24 @@ export default function ReadingPractice() {
     }
   };
 
+  const currentUserId = () => {
+    const payloadUser = decodeJWT(localStorage.getItem("lexi_token") || "");
+    return payloadUser?.sub || payloadUser?.id;
+  };
+
+  // Fallback when the live session was unavailable
   const submitSession = async () => {
     try {
-      const rawToken = localStorage.getItem("lexi_token");
-      const payloadUser = decodeJWT(rawToken);
-      const userId = payloadUser?.sub || payloadUser?.id;
+      const userId = currentUserId();
 
       const sessionPayload = {
         user_id: userId,
         lesson_id: lessonId,
         spoken_text: finalTranscript || transcript,
+        chunks: chunksRef.current,
+        duration: stopTimeRef.current
+          ? (stopTimeRef.current - startTimeRef.current) / 1000
+          : undefined,
       };
 
       const res = await API.post("/sessions/", sessionPayload);
@@ -264,6 +357,7 @@ export default function ReadingPractice() {
       setResult({
         accuracy: backendMetrics.accuracy,
         wpm: backendMetrics.wpm,
+        wcpm: backendMetrics.fluency?.wcpm,
         errors: backendMetrics.errors || [],
         feedback: backendMetrics.recommendations || "Keep practicing!",
       });
@@ -300,7 +394,9 @@ export default function ReadingPractice() {
                       ? "#166534"
                       : h.color === "orange"
                         ? "#b45309"
-                        : "#6b7280",
+                        : h.color === "red"
+                          ? "#b91c1c"
+                          : "#6b7280",
                   fontWeight: h.color === "green" ? 700 : 600,
                 }}
               >
@@ -347,7 +443,14 @@ export default function ReadingPractice() {
       </div>
 
       {listening && (
-        <div className="text-green-600 font-medium mb-3">🎤 Listening...</div>
+        <div className="text-green-600 font-medium mb-3">
+          🎤 Listening...
+          {live && (
+            <span className="ml-3 text-gray-700">
+              ⚡ {live.wpm} WPM · 🎯 {live.accuracy}%
+            </span>
+          )}
+        </div>
       )}
 
       {/* Live transcript */}
@@ -365,7 +468,10 @@ export default function ReadingPractice() {
             Your Results (AI Analysis)
           </h4>
           <p>🎯 Accuracy: <strong>{result.accuracy}%</strong></p>
-          <p>⚡ Words Per Minute: <strong>{result.wpm}</strong></p>
+          <p>⚡ Words Per Minute: <strong>{result.wpm ?? "—"}</strong></p>
+          {result.wcpm != null && (
+            <p>✅ Words Correct Per Minute: <strong>{result.wcpm}</strong></p>
+          )}
 
           {result.errors?.length > 0 && (
             <p className="text-sm text-red-600 mt-2">
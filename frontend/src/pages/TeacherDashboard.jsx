@@ -6,20 +6,32 @@ export default function TeacherDashboard() {
   const [form, setForm] = useState({ title: "", content: "", reading_level: "basic" });
   const [editingId, setEditingId] = useState(null);
   const [stats, setStats] = useState([]);
+  const [query, setQuery] = useState("");
+  const [level, setLevel] = useState("");
 
   useEffect(() => {
-    fetchLessons();
     fetchStats();
   }, []);
 
+  // 🔍 Server-side search, debounced while typing
+  useEffect(() => {
+    const timer = setTimeout(fetchLessons, query ? 250 : 0);
+    return () => clearTimeout(timer);
+  }, [query, level]);
+
   const fetchLessons = async () => {
-    const res = await API.get("/lessons/");
-    setLessons(res.data.lessons);
+    const params = level ? { reading_level: level } : {};
+    const found = query.trim()
+      ? (await API.get("/lessons/search", { params: { q: query, ...params } })).data.lessons
+      : await API.getAll("/lessons/", "lessons", { params });
+    setLessons(found);
   };
 
   const fetchStats = async () => {
-    const res = await API.get("/sessions/user/1").catch(() => ({ data: { sessions: [] } }));
-    setStats(res.data.sessions || []);
+    const all = await API.getAll("/sessions/user/1", "sessions", {
+      params: { fields: "lesson_id,accuracy,wpm,created_at" },
+    }).catch(() => []);
+    setStats(all);
   };
 
   const handleSubmit = async (e) => {
@@ -34,7 +46,11 @@ export default function TeacherDashboard() {
     fetchLessons();
   };
 
-  const handleEdit = (lesson) => {
+  const handleEdit = async (lesson) => {
+    // search results carry a snippet, not the full content
+    if (lesson.content === undefined) {
+      lesson = (await API.get(`/lessons/${lesson.id}`)).data.lesson;
+    }
     setForm({ title: lesson.title, content: lesson.content, reading_level: lesson.reading_level });
     setEditingId(lesson.id);
   };
@@ -88,8 +104,29 @@ export default function TeacherDashboard() {
       {/* Lesson List */}
       <div className="bg-white shadow p-4 rounded mb-6">
         <h3 className="text-lg font-semibold mb-3">All Lessons</h3>
+        <div className="flex gap-2 mb-3">
+          <input
+            type="search"
+            placeholder="Search lessons by title or text"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            className="border p-2 rounded flex-1"
+          />
+          <select
+            value={level}
+            onChange={(e) => setLevel(e.target.value)}
+            className="border p-2 rounded"
+          >
+            <option value="">All levels</option>
+            <option value="basic">Basic</option>
+            <option value="intermediate">Intermediate</option>
+            <option value="advanced">Advanced</option>
+          </select>
+        </div>
         {lessons.length === 0 ? (
-          <p className="text-gray-500">No lessons created yet.</p>
+          <p className="text-gray-500">
+            {query || level ? "No lessons match." : "No lessons created yet."}
+          </p>
         ) : (
           lessons.map((lesson) => (
             <div
@@ -101,6 +138,13 @@ export default function TeacherDashboard() {
                 <p className="text-gray-600 text-sm">
                   Level: {lesson.reading_level}
                 </p>
+                {lesson.snippet && (
+                  <p className="text-gray-500 text-sm">
+                    {lesson.snippet.split(/\[([^\]]*)\]/).map((part, i) =>
+                      i % 2 ? <mark key={i}>{part}</mark> : part
+                    )}
+                  </p>
+                )}
               </div>
               <div className="space-x-2">
                 <button
@@ -133,7 +177,7 @@ export default function TeacherDashboard() {
               className="border-b py-2 flex justify-between items-center"
             >
               <p>
-                Lesson ID: {s.lesson_id} | WPM: {s.wpm} | Accuracy: {s.accuracy}%
+                Lesson ID: {s.lesson_id} | WPM: {s.wpm ?? "—"} | Accuracy: {s.accuracy}%
               </p>
               <p className="text-sm text-gray-500">
                 {new Date(s.created_at).toLocaleDateString()}
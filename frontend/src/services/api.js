@@ -3,9 +3,21 @@ import api from "../api/axios";
 
 export default {
   get: (url, opts) => api.get(url, opts),
+  // Follows next_cursor through a paginated list; resolves to every item under `key`
+  getAll: async (url, key, opts = {}) => {
+    const items = [];
+    let cursor;
+    do {
+      const res = await api.get(url, { ...opts, params: { limit: 500, ...opts.params, cursor } });
+      items.push(...(res.data[key] || []));
+      cursor = res.data.next_cursor;
+    } while (cursor != null);
+    return items;
+  },
   post: (url, body, opts) => api.post(url, body, opts),
   put: (url, body, opts) => api.put(url, body, opts),
   delete: (url, opts) => api.delete(url, opts),
   setToken: (token) => api.setToken(token),
   clearToken: () => api.clearToken(),
+  socket: (path) => new WebSocket(api.defaults.baseURL.replace(/^http/, "ws") + path),
 };